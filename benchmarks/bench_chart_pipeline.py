@@ -0,0 +1,321 @@
+# bench_chart_pipeline.py
+"""
+Benchmarks of the chart pipeline on synthetic season data.
+
+The season files are generated with form_nba_chart_json_data_synthetic_seasons
+(so no real data is needed) and cached in --data-dir. Each scenario is timed
+at every --scales multiple of the base data size, which is --seasons seasons
+of --games-per-season regular season games. The default base is a tenth of a
+real season, so 10x is about the size of two real seasons.
+
+Scenarios:
+
+    loader          decode the season files and build the Games
+    aggregation     group the games by point margin at the standard times,
+                    without and with a game filter
+    fit             probit maximum likelihood fits of the grouped games
+    serialization   round, encode, gzip and write a built chart's JSON
+    full_page       build the standard comparison page of charts
+
+Usage:
+    python benchmarks/bench_chart_pipeline.py
+    python benchmarks/bench_chart_pipeline.py --scales 1 10 --repeat 5 \\
+        --json after.json --baseline before.json
+
+With --baseline, scenarios more than --tolerance slower than in the baseline
+results are reported and the exit status is 1.
+"""
+
+# Standard library imports
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Put the repository root on the path, so the package imports without installing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api import (
+    ChartContext,
+    GameFilter,
+    Games,
+    Num,
+    load_chart_spec,
+    plot_biggest_deficit,
+    run_chart_spec,
+    write_synthetic_seasons,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_plot_primitives import (  # noqa: E501
+    read_json_file,
+    round_json_floats,
+    write_if_changed,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_season_game_loader import (  # noqa: E501
+    PointMarginTable,
+)
+
+START_YEAR = 2015
+
+# (start_time, down_mode) pairs of the aggregation and fit scenarios
+STANDARD_TIMES = [(time, "at") for time in [36, 24, 12, 6, 1]] + [
+    (time, "max") for time in [48, 24, 12]
+]
+
+
+class Scenario:
+    """A benchmark scenario: untimed setup, then a timed run."""
+
+    def __init__(self, name, setup):
+        """
+        Parameters:
+        -----------
+        name : str
+            Scenario name
+        setup : callable
+            setup(json_base_path, years, work_dir) returns the function to time
+        """
+        self.name = name
+        self.setup = setup
+
+
+def setup_loader(json_base_path, years, work_dir):
+    def run():
+        # A new context each time, so nothing is cached between runs
+        Games.get_games(years[0], years[-1], context=ChartContext(json_base_path))
+
+    return run
+
+
+def load_games(json_base_path, years):
+    return Games.get_games(years[0], years[-1], context=ChartContext(json_base_path))
+
+
+def setup_aggregation(json_base_path, years, work_dir):
+    games = load_games(json_base_path, years)
+    game_filter = GameFilter(for_at_home=True)
+
+    def run():
+        filter_mask_arrays = games.get_filter_mask_arrays(game_filter)
+        for start_time, down_mode in STANDARD_TIMES:
+            table = PointMarginTable(games, start_time, down_mode)
+            table.get_point_margin_groups()
+            table.get_point_margin_groups(filter_mask_arrays)
+
+    return run
+
+
+def setup_fit(json_base_path, years, work_dir):
+    games = load_games(json_base_path, years)
+    fit_data = []
+    for start_time, down_mode in STANDARD_TIMES:
+        X = []
+        Y = []
+        table = PointMarginTable(games, start_time, down_mode)
+        groups = table.get_point_margin_groups()
+        for point_margin, win_game_ids, loss_game_ids in groups:
+            X.extend([point_margin] * (len(win_game_ids) + len(loss_game_ids)))
+            Y.extend([1] * len(win_game_ids) + [0] * len(loss_game_ids))
+        fit_data.append((Num.array(X), Num.array(Y)))
+
+    def run():
+        for X, Y in fit_data:
+            Num.fit_it_mle(X=X, Y=Y, model="probit", m_est=0.1, b_est=0.0)
+
+    return run
+
+
+def setup_serialization(json_base_path, years, work_dir):
+    json_name = os.path.join(work_dir, "serialization", "down_at_24.json")
+    plot_biggest_deficit(
+        json_name,
+        [(years[0], years[-1])],
+        24,
+        "at",
+        cumulate=True,
+        context=ChartContext(json_base_path),
+    )
+    json_data = read_json_file(f"{json_name}.gz")
+    output_name = os.path.join(work_dir, "serialization", "copy.json.gz")
+
+    def run():
+        if os.path.exists(output_name):
+            os.remove(output_name)
+        json_text = json.dumps(round_json_floats(json_data, 4), indent=4)
+        write_if_changed(output_name, json_text)
+
+    return run
+
+
+def setup_full_page(json_base_path, years, work_dir):
+    spec = {
+        "seasons": json_base_path,
+        "charts": os.path.join(work_dir, "charts"),
+        "rst": os.path.join(work_dir, "rst"),
+        "pages": [
+            {
+                "name": "benchmark",
+                "year_groups": [[years[0], years[-1]]],
+                "game_filters": [{}, {"for_at_home": True}],
+            }
+        ],
+    }
+    spec_name = os.path.join(work_dir, "spec.json")
+    with open(spec_name, "w") as fileobj:
+        json.dump(spec, fileobj)
+
+    def run():
+        run_chart_spec(load_chart_spec(spec_name), workers=1, force=True)
+
+    return run
+
+
+SCENARIOS = [
+    Scenario("loader", setup_loader),
+    Scenario("aggregation", setup_aggregation),
+    Scenario("fit", setup_fit),
+    Scenario("serialization", setup_serialization),
+    Scenario("full_page", setup_full_page),
+]
+
+
+def get_season_data(data_dir, games_per_season, season_count, seed):
+    """Write the synthetic seasons of a data size, unless already cached."""
+    json_base_path = os.path.join(
+        data_dir, f"games{games_per_season}_seasons{season_count}_seed{seed}"
+    )
+    years = list(range(START_YEAR, START_YEAR + season_count))
+    if not all(
+        os.path.exists(os.path.join(json_base_path, f"nba_season_{year}.json.gz"))
+        for year in years
+    ):
+        print(f"Generating {season_count} seasons of {games_per_season} games")
+        write_synthetic_seasons(
+            json_base_path,
+            START_YEAR,
+            season_count=season_count,
+            games_per_season=games_per_season,
+            seed=seed,
+        )
+    return json_base_path, years
+
+
+def time_scenario(scenario, json_base_path, years, repeat):
+    """Time a scenario, returning the seconds of each run."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        # The pipeline prints progress, which would swamp the results
+        with contextlib.redirect_stdout(io.StringIO()):
+            run = scenario.setup(json_base_path, years, work_dir)
+            seconds = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run()
+                seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def compare_results(results, baseline, tolerance):
+    """Print the scenarios slower than the baseline, returning how many."""
+    baseline_seconds = {
+        (result["scenario"], result["scale"]): result["min_seconds"]
+        for result in baseline["results"]
+    }
+    regression_count = 0
+    for result in results:
+        key = (result["scenario"], result["scale"])
+        if key not in baseline_seconds:
+            continue
+        ratio = result["min_seconds"] / baseline_seconds[key]
+        status = "ok"
+        if ratio > 1.0 + tolerance:
+            status = "REGRESSION"
+            regression_count += 1
+        print(
+            f"  {result['scenario']:14s} {result['scale']:4d}x  {ratio:6.2f}x  {status}"
+        )
+    return regression_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time the chart pipeline on synthetic season data."
+    )
+    parser.add_argument(
+        "--scales", type=int, nargs="+", default=[1, 10, 100], help="Data sizes"
+    )
+    parser.add_argument(
+        "--games-per-season",
+        type=int,
+        default=123,
+        help="Regular season games per season at 1x (default: 123)",
+    )
+    parser.add_argument(
+        "--seasons", type=int, default=2, help="Number of seasons (default: 2)"
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=[scenario.name for scenario in SCENARIOS],
+        default=[scenario.name for scenario in SCENARIOS],
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per scenario")
+    parser.add_argument("--seed", type=int, default=0, help="Season generator seed")
+    parser.add_argument(
+        "--data-dir",
+        default=os.path.join(tempfile.gettempdir(), "nbacc_benchmark_seasons"),
+        help="Directory the generated seasons are cached in",
+    )
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Slowdown over the baseline reported as a regression (default: 0.25)",
+    )
+    args = parser.parse_args(argv)
+
+    results = []
+    for scale in args.scales:
+        games_per_season = args.games_per_season * scale
+        json_base_path, years = get_season_data(
+            args.data_dir, games_per_season, args.seasons, args.seed
+        )
+        for scenario in SCENARIOS:
+            if scenario.name not in args.scenarios:
+                continue
+            seconds = time_scenario(scenario, json_base_path, years, args.repeat)
+            result = {
+                "scenario": scenario.name,
+                "scale": scale,
+                "games_per_season": games_per_season,
+                "seasons": args.seasons,
+                "min_seconds": min(seconds),
+                "median_seconds": statistics.median(seconds),
+                "seconds": seconds,
+            }
+            results.append(result)
+            print(
+                f"{scenario.name:14s} {scale:4d}x  min {min(seconds):9.4f}s  "
+                f"median {statistics.median(seconds):9.4f}s"
+            )
+
+    if args.json:
+        with open(args.json, "w") as fileobj:
+            json.dump({"results": results}, fileobj, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as fileobj:
+            baseline = json.load(fileobj)
+        print(f"Compared to {args.baseline}:")
+        if compare_results(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
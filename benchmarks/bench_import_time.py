@@ -0,0 +1,146 @@
+# bench_import_time.py
+"""
+Benchmark of the import time of the chart modules.
+
+Each target is imported in a fresh interpreter, --repeat times, and the
+import time (measured inside the interpreter, so Python startup is excluded)
+and whether scipy was imported are reported. Importing a chart module should
+not import scipy: it is only needed once a fit or probability transform runs,
+so commands that find every chart up to date never pay for it.
+
+Usage:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --repeat 10 \\
+        --json after.json --baseline before.json
+
+With --baseline, targets more than --tolerance slower than in the baseline
+results are reported and the exit status is 1. Targets that import scipy
+always make the exit status 1.
+"""
+
+# Standard library imports
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PACKAGE = "nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api"
+
+# Target name to the module it imports
+TARGETS = {
+    "package": PACKAGE,
+    "context": f"{PACKAGE}.form_nba_chart_json_data_context",
+    "api": f"{PACKAGE}.form_nba_chart_json_data_api",
+    "chart_spec": f"{PACKAGE}.form_nba_chart_json_data_chart_spec",
+    "lookup_cube": f"{PACKAGE}.form_nba_chart_json_data_lookup_cube",
+    "server": f"{PACKAGE}.form_nba_chart_json_data_server",
+}
+
+# Run in the fresh interpreter: import the module and print the results
+IMPORT_SCRIPT = """
+import importlib, json, sys, time
+sys.path.insert(0, {repo_dir!r})
+start = time.perf_counter()
+importlib.import_module({module!r})
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "scipy": "scipy" in sys.modules}}))
+"""
+
+
+def time_import(module):
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+    --------
+    dict
+        {"seconds": import time, "scipy": True if scipy was imported}
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT.format(repo_dir=REPO_DIR, module=module)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def compare_results(results, baseline, tolerance):
+    """Print the targets slower than the baseline, returning how many."""
+    baseline_seconds = {
+        result["target"]: result["min_seconds"] for result in baseline["results"]
+    }
+    regression_count = 0
+    for result in results:
+        if result["target"] not in baseline_seconds:
+            continue
+        ratio = result["min_seconds"] / baseline_seconds[result["target"]]
+        status = "ok"
+        if ratio > 1.0 + tolerance:
+            status = "REGRESSION"
+            regression_count += 1
+        print(f"  {result['target']:12s} {ratio:6.2f}x  {status}")
+    return regression_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time importing the chart modules in fresh interpreters."
+    )
+    parser.add_argument(
+        "--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS)
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Imports per target")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="Slowdown over the baseline reported as a regression (default: 0.5)",
+    )
+    args = parser.parse_args(argv)
+
+    results = []
+    status = 0
+    for target in args.targets:
+        runs = [time_import(TARGETS[target]) for _ in range(args.repeat)]
+        seconds = [run["seconds"] for run in runs]
+        imports_scipy = any(run["scipy"] for run in runs)
+        results.append(
+            {
+                "target": target,
+                "module": TARGETS[target],
+                "min_seconds": min(seconds),
+                "median_seconds": statistics.median(seconds),
+                "seconds": seconds,
+                "imports_scipy": imports_scipy,
+            }
+        )
+        print(
+            f"{target:12s} min {min(seconds) * 1000:8.1f}ms  "
+            f"median {statistics.median(seconds) * 1000:8.1f}ms"
+            f"{'  imports scipy' if imports_scipy else ''}"
+        )
+        if imports_scipy:
+            status = 1
+
+    if args.json:
+        with open(args.json, "w") as fileobj:
+            json.dump({"results": results}, fileobj, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as fileobj:
+            baseline = json.load(fileobj)
+        print(f"Compared to {args.baseline}:")
+        if compare_results(results, baseline, args.tolerance):
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,6 +15,14 @@ window.chartInstances = chartInstances;
 // Cache key prefix for chart data in localStorage
 const CHART_CACHE_PREFIX = 'nbacc_chart_';
 
+// Shared game tables already requested, keyed by URL
+const gameTablePromises = new Map();
+// Last-Modified headers of shared game tables checked for the cache, keyed by URL
+const gameTableLastModifiedPromises = new Map();
+
+// Point keys that hold sample game lists
+const GAME_LIST_KEYS = ["win_games", "loss_games", "occurred_games", "not_occurred_games"];
+
 /**
  * Get cache key for a chart ID
  * @param {string} chartId - The chart ID
@@ -244,7 +252,9 @@ async function loadAndPlotChart(chartDiv) {
             if (isCacheValid) {
                 // Use cached data if it's still valid
                 chartData = getCachedChartData(divId);
-                useCache = true;
+                // The cached chart has its shared game table's records resolved,
+                // so the table must not have changed either
+                useCache = chartData !== null && (await isCachedGameTableCurrent(chartData));
             }
         } catch (e) {
             // Error checking cache validity, will fetch from server
@@ -281,6 +291,12 @@ async function loadAndPlotChart(chartDiv) {
                 chartData = await response.json();
             }
 
+            // Expand compact columnar chart files to one object per point
+            chartData = expandColumnarChartData(chartData);
+
+            // Replace sample game handles with the records from the game table
+            chartData = await resolveChartGameTable(chartData, jsonUrl);
+
             // Validate the required attributes early
             validateChartData(chartData);
             
@@ -460,6 +476,148 @@ document.addEventListener("DOMContentLoaded", () => {
     });
 });
 
+/**
+ * Expands chart data written in the compact columnar format (format_version 2)
+ * into the point format (one object per point in each line's y_values).
+ * Null column entries mark keys a point does not have. Data already in the
+ * point format is returned unchanged.
+ * @param {object} chartData - The chart data object read from the JSON file
+ * @returns {object} The chart data in the point format
+ */
+function expandColumnarChartData(chartData) {
+    if (!chartData || !chartData.format_version || chartData.format_version === 1) {
+        return chartData;
+    }
+    if (chartData.format_version !== 2) {
+        throw new Error(`Unsupported chart format_version: ${chartData.format_version}`);
+    }
+
+    const lines = chartData.lines.map((line) => {
+        const { length, columns, column_aliases, ...expandedLine } = line;
+        const allColumns = { ...columns };
+        Object.entries(column_aliases || {}).forEach(([key, source]) => {
+            allColumns[key] = source === "x_values" ? line.x_values : columns[source];
+        });
+        const keys = Object.keys(allColumns);
+
+        expandedLine.y_values = [];
+        for (let index = 0; index < length; index++) {
+            const point = {};
+            keys.forEach((key) => {
+                const value = allColumns[key][index];
+                if (value !== null) {
+                    point[key] = value;
+                }
+            });
+            expandedLine.y_values.push(point);
+        }
+        return expandedLine;
+    });
+
+    const { format_version, ...expandedChartData } = chartData;
+    expandedChartData.lines = lines;
+    return expandedChartData;
+}
+
+/**
+ * Fetches a shared game table once per page view
+ * @param {string} tableUrl - The URL of the gzipped game table
+ * @returns {Promise<object>} The game table data and its Last-Modified header
+ */
+function fetchGameTable(tableUrl) {
+    if (!gameTablePromises.has(tableUrl)) {
+        const tablePromise = fetch(tableUrl)
+            .then(async (response) => ({
+                gameTable: await nbacc_utils.readGzJson(response),
+                lastModified: response.headers.get("Last-Modified"),
+            }))
+            .catch((error) => {
+                gameTablePromises.delete(tableUrl);
+                throw error;
+            });
+        gameTablePromises.set(tableUrl, tablePromise);
+    }
+    return gameTablePromises.get(tableUrl);
+}
+
+/**
+ * Gets the server's Last-Modified header of a shared game table, once per page view
+ * @param {string} tableUrl - The URL of the gzipped game table
+ * @returns {Promise<string|null>} The Last-Modified header, or null if unavailable
+ */
+function getGameTableLastModified(tableUrl) {
+    if (gameTablePromises.has(tableUrl)) {
+        return gameTablePromises.get(tableUrl).then((table) => table.lastModified);
+    }
+    if (!gameTableLastModifiedPromises.has(tableUrl)) {
+        const lastModifiedPromise = fetch(tableUrl, { method: "HEAD" })
+            .then((response) => (response.ok ? response.headers.get("Last-Modified") : null))
+            .catch(() => null);
+        gameTableLastModifiedPromises.set(tableUrl, lastModifiedPromise);
+    }
+    return gameTableLastModifiedPromises.get(tableUrl);
+}
+
+/**
+ * Checks that the shared game table a cached chart was resolved with is unchanged
+ * @param {object} chartData - The cached chart data
+ * @returns {Promise<boolean>} True if the chart has no shared game table or the
+ * server's copy is not newer than the one the chart was cached with
+ */
+async function isCachedGameTableCurrent(chartData) {
+    const source = chartData.game_table_source;
+    if (!source) {
+        return true;
+    }
+    const serverLastModified = await getGameTableLastModified(source.url);
+    if (!source.last_modified || !serverLastModified) {
+        return false;
+    }
+    return new Date(source.last_modified).getTime() >= new Date(serverLastModified).getTime();
+}
+
+/**
+ * Replaces the integer game handles in chart points with game records from
+ * the chart's game table, either embedded in the chart or shared by a page.
+ * Chart data without a game table is returned unchanged. A shared table's URL
+ * and Last-Modified header are kept as game_table_source, so that a cached
+ * chart is refetched when its table changes (see isCachedGameTableCurrent).
+ * @param {object} chartData - The chart data in the point format
+ * @param {string} jsonUrl - The URL the chart was read from
+ * @returns {Promise<object>} The chart data with game records in each point
+ */
+async function resolveChartGameTable(chartData, jsonUrl) {
+    if (!chartData || !chartData.game_table) {
+        return chartData;
+    }
+
+    const { game_table, ...resolvedChartData } = chartData;
+    let gameTable = game_table;
+    if (game_table.json_name) {
+        const tableUrl = new URL(game_table.json_name, jsonUrl).href;
+        const sharedTable = await fetchGameTable(tableUrl);
+        gameTable = sharedTable.gameTable;
+        resolvedChartData.game_table_source = {
+            url: tableUrl,
+            last_modified: sharedTable.lastModified,
+        };
+    }
+
+    resolvedChartData.lines = chartData.lines.map((line) => ({
+        ...line,
+        y_values: line.y_values.map((point) => {
+            const resolvedPoint = { ...point };
+            GAME_LIST_KEYS.forEach((key) => {
+                if (Array.isArray(point[key])) {
+                    resolvedPoint[key] = point[key].map((handle) => gameTable.games[handle]);
+                }
+            });
+            return resolvedPoint;
+        }),
+    }));
+    return resolvedChartData;
+}
+
 /**
  * Validates that the chart data has all required attributes
  * @param {object} chartData - The chart data object to validate
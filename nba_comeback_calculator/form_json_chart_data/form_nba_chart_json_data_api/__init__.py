@@ -0,0 +1,63 @@
+"""
+Chart data API: builds the JSON data behind the comeback calculator charts.
+
+The main names are importable from the package:
+
+    from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api import (
+        ChartContext,
+        plot_biggest_deficit,
+    )
+
+Submodules are imported when one of their names is first used, so importing
+the package is cheap and a script only pays for the modules (and numpy and
+scipy) it needs.
+"""
+
+# Standard library imports
+import importlib
+
+# Public name to the submodule defining it
+_EXPORTS = {
+    "GameFilter": "form_nba_chart_json_data_api",
+    "plot_biggest_deficit": "form_nba_chart_json_data_api",
+    "plot_percent_versus_time": "form_nba_chart_json_data_api",
+    "parse_season_type": "form_nba_chart_json_data_api",
+    "ChartContext": "form_nba_chart_json_data_context",
+    "get_chart_context": "form_nba_chart_json_data_context",
+    "set_default_chart_context": "form_nba_chart_json_data_context",
+    "Season": "form_nba_chart_json_data_season_game_loader",
+    "Games": "form_nba_chart_json_data_season_game_loader",
+    "GAME_MINUTES": "form_nba_chart_json_data_season_game_loader",
+    "ChartProfiler": "form_nba_chart_json_data_profiler",
+    "FitCache": "form_nba_chart_json_data_fit_cache",
+    "load_chart_spec": "form_nba_chart_json_data_chart_spec",
+    "run_chart_spec": "form_nba_chart_json_data_chart_spec",
+    "PlotPages": "form_nba_chart_json_data_plot_pages",
+    "PLOT_FUNCTIONS": "form_nba_chart_json_data_plot_pages",
+    "ChartJob": "form_nba_chart_json_data_scheduler",
+    "ChartScheduler": "form_nba_chart_json_data_scheduler",
+    "BuildManifest": "form_nba_chart_json_data_build_manifest",
+    "WinProbabilityCube": "form_nba_chart_json_data_lookup_cube",
+    "fit_cube_surfaces": "form_nba_chart_json_data_surface",
+    "save_surfaces": "form_nba_chart_json_data_surface",
+    "write_synthetic_seasons": "form_nba_chart_json_data_synthetic_seasons",
+    "ChartEngine": "form_nba_chart_json_data_equivalence",
+    "run_equivalence": "form_nba_chart_json_data_equivalence",
+    "Num": "form_nba_chart_json_data_num",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    # Cache it, so __getattr__ is only called once per name
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -7,15 +7,15 @@ It contains the core functions for generating different types of analysis plots
 """
 
 # Local imports
-from form_nba_chart_json_data_season_game_loader import Season, Games
-from form_nba_chart_json_data_plot_primitives import (
+from .form_nba_chart_json_data_context import get_chart_context, with_chart_context
+from .form_nba_chart_json_data_season_game_loader import Season, Games
+from .form_nba_chart_json_data_plot_primitives import (
     PointsDownLine,
     PercentLine,
     FinalPlot,
 )
-from form_nba_chart_json_data_num import Num
-
-__LINEAR_Y_AXIS__ = False
+from .form_nba_chart_json_data_num import Num
+from .form_nba_chart_json_data_permutation_test import get_permutation_test_options
 
 
 def parse_season_type(year):
@@ -118,6 +118,31 @@ class GameFilter:
         # vs_at_home is just the inverse of for_at_home
         self.vs_at_home = None if self.for_at_home is None else not self.for_at_home
 
+    def to_json(self):
+        """
+        Convert the filter criteria to a JSON-serializable dictionary.
+
+        The result can be passed back to GameFilter(**json_data).
+        """
+        return {
+            "for_at_home": self.for_at_home,
+            "for_rank": self.for_rank,
+            "for_team_abbr": self.for_team_abbr,
+            "vs_rank": self.vs_rank,
+            "vs_team_abbr": self.vs_team_abbr,
+        }
+
+    def get_signature(self):
+        """Get a hashable signature identifying the filter criteria."""
+        return tuple(
+            (key, tuple(value) if isinstance(value, list) else value)
+            for key, value in self.to_json().items()
+        )
+
+    def matches_all_games(self):
+        """Check whether the filter has no criteria, so every game matches it."""
+        return all(value is None for _, value in self.get_signature())
+
     def is_match(self, game, is_win):
         """
         Check if a game matches the filter criteria.
@@ -295,6 +320,7 @@ class GameFilter:
             return "For All Games"
 
 
+@with_chart_context
 def plot_biggest_deficit(
     json_name,
     year_groups,
@@ -311,6 +337,15 @@ def plot_biggest_deficit(
     use_normal_labels=False,
     linear_y_axis=False,
     use_logit=False,
+    json_format="points",
+    float_digits=None,
+    game_table=None,
+    confidence_band=None,
+    binomial_intervals=None,
+    isotonic=False,
+    empirical_bayes=False,
+    permutation_test=None,
+    context=None,
 ):
     """
     Generate plots and JSON data showing win probability based on point deficit.
@@ -361,21 +396,53 @@ def plot_biggest_deficit(
         Whether to use linear y-axis instead of probit scaling
     use_logit : bool
         Whether to use logit transformation instead of probit for probabilities
+    json_format : str
+        Chart JSON format: 'points' (one dict per point) or 'columnar' (compact
+        arrays per line, read back with read_chart_json)
+    float_digits : int or None
+        Number of decimal digits to round floats to in the JSON output
+    game_table : GameSummaryTable or None
+        Table that sample games are referenced from by handle, instead of
+        embedding the game records in every point
+    confidence_band : bool, dict or None
+        Bootstrap a confidence band for each line's fit: True for the default
+        options, or a dict of 'replicates', 'level' and 'method'
+        ('parametric' or 'nonparametric'). The band is written to the line
+        JSON as "confidence_band", with 'lower' and 'upper' fit values at the
+        line's x_values. Not supported with linear_y_axis (ValueError).
+    binomial_intervals : bool, float or None
+        Add the Wilson and Clopper-Pearson confidence intervals of each
+        point's win percent to the point JSON (wilson_lower, wilson_upper,
+        clopper_pearson_lower, clopper_pearson_upper): True for 95%
+        intervals, or the confidence level
+    isotonic : bool
+        Add each point's win percent smoothed into a non-decreasing curve by
+        pool adjacent violators (isotonic_percent, and isotonic_y_value on
+        the chart's y axis)
+    empirical_bayes : bool
+        Add the win percents of filtered lines shrunk toward the all-games
+        percents of the same years and time, with a beta-binomial prior
+        estimated from every team's counts, to the point JSON (shrunk_percent,
+        and shrunk_y_value on the chart's y axis). The plotted percents and
+        the fit keep the observed counts, and the line gets the prior's
+        "empirical_bayes" concentration.
+    permutation_test : bool, dict or None
+        For a chart of two lines (e.g. two eras or two filters), test whether
+        their fit lines differ by shuffling the games between them: True for
+        the default options, or a dict of 'permutations' and 'workers' (the
+        size of the process pool, None for every CPU). The p-value is written
+        to the chart JSON as "permutation_test". Not supported with
+        linear_y_axis (ValueError).
+    context : ChartContext or None
+        Season data, output directory and caches to build with, see
+        get_chart_context. The chart gets its own copy (see with_chart_context).
     """
 
-    global __LINEAR_Y_AXIS__
-    if linear_y_axis:
-        __LINEAR_Y_AXIS__ = True
-        Num.CDF = lambda x: x
-        Num.PPF = lambda x: x
-    else:
-        __LINEAR_Y_AXIS__ = False
-
     if use_logit:
-        from scipy.special import logit, expit
-
-        Num.CDF = expit
-        Num.PPF = logit
+        context.set_y_axis("logit")
+    elif linear_y_axis:
+        context.set_y_axis("linear")
+    json_name = context.get_chart_path(json_name)
 
     if start_time == 48:
         time_desc = "Entire Game"
@@ -398,6 +465,7 @@ def plot_biggest_deficit(
         raise NotImplementedError(start_time)
 
     or_more = " Or More" if cumulate else ""
+    permutation_test = get_permutation_test_options(permutation_test)
 
     # If game_filters is None, create a list with a single None element
     if game_filters is None:
@@ -441,10 +509,11 @@ def plot_biggest_deficit(
             stop_year_numeric, _ = parse_season_type(stop_year)
 
             # Use the Games class that loads from JSON with optional game filter
-            games = Games(
+            games = Games.get_games(
                 start_year=start_year_numeric,
                 stop_year=stop_year_numeric,
                 season_type=season_type,
+                context=context,
             )
 
             if number_of_year_groups > 1 or number_of_game_filters < 2:
@@ -474,6 +543,9 @@ def plot_biggest_deficit(
                 fit_min_win_game_count=fit_min_win_game_count,
                 fit_max_points=fit_max_points,
                 calculate_occurrences=calculate_occurrences,
+                confidence_band=confidence_band,
+                isotonic=isotonic,
+                empirical_bayes=empirical_bayes,
             )
 
             # To create js objects
@@ -512,7 +584,7 @@ def plot_biggest_deficit(
         x_label=x_label,
         y_label=y_label,
         # x_ticks=xticks_new,
-        y_ticks=[Num.PPF(p) for p in y_tick_values],
+        y_ticks=Num.transform().ppf(y_tick_values).tolist(),
         y_tick_labels=y_tick_labels,
         min_x=min_x,
         max_x=max_x,
@@ -521,6 +593,11 @@ def plot_biggest_deficit(
         use_normal_labels=use_normal_labels,
         cumulate=cumulate,
         calculate_occurrences=calculate_occurrences,
+        json_format=json_format,
+        float_digits=float_digits,
+        game_table=game_table,
+        binomial_intervals=binomial_intervals,
+        permutation_test=permutation_test,
     )
 
     final_plot.to_json()
@@ -552,7 +629,7 @@ def get_points_down_normally_spaced_y_ticks(plot_lines, bound_x=float("inf")):
             next_min_y = min(next_min_y, Num.CDF(Num.min(y_fit)))
             next_max_y = max(next_max_y, Num.CDF(Num.max(y_fit)))
 
-    if __LINEAR_Y_AXIS__:
+    if get_chart_context().y_axis == "linear":
         y_ticks = {
             0.001: "0%",
             0.10: "10%",
@@ -617,6 +694,7 @@ def get_points_down_normally_spaced_y_ticks(plot_lines, bound_x=float("inf")):
     return min_x, max_x, y_tick_values, y_tick_labels
 
 
+@with_chart_context
 def plot_percent_versus_time(
     json_name,
     year_groups,
@@ -630,6 +708,12 @@ def plot_percent_versus_time(
     plot_3x_bad_guide=False,
     plot_calculated_guides=False,
     python_only_calculate_cdf_constant=False,
+    json_format="points",
+    float_digits=None,
+    game_table=None,
+    warm_start_fits=True,
+    binomial_intervals=None,
+    context=None,
 ):
     """
     Generate plots and JSON data showing win probability versus time for NBA games.
@@ -664,8 +748,29 @@ def plot_percent_versus_time(
         Whether to calculate and plot regression guides from actual data
     python_only_calculate_cdf_constant : bool
         Whether to calculate the CDF coefficient (for debugging, not used in output)
+    json_format : str
+        Chart JSON format: 'points' (one dict per point) or 'columnar' (compact
+        arrays per line, read back with read_chart_json)
+    float_digits : int or None
+        Number of decimal digits to round floats to in the JSON output
+    game_table : GameSummaryTable or None
+        Table that sample games are referenced from by handle, instead of
+        embedding the game records in every point
+    warm_start_fits : bool
+        Start each minute's probit fit from the previous minute's fit instead
+        of its least squares estimate, which takes fewer optimizer iterations
+    binomial_intervals : bool, float or None
+        Add the Wilson and Clopper-Pearson confidence intervals of each
+        point's win percent to the point JSON (wilson_lower, wilson_upper,
+        clopper_pearson_lower, clopper_pearson_upper): True for 95%
+        intervals, or the confidence level
+    context : ChartContext or None
+        Season data, output directory and caches to build with, see
+        get_chart_context. The chart gets its own copy (see with_chart_context).
     """
 
+    json_name = context.get_chart_path(json_name)
+
     # If game_filters is None, create a list with a single None element
     if game_filters is None:
         game_filters = [None]
@@ -697,10 +802,11 @@ def plot_percent_versus_time(
             stop_year_numeric, _ = parse_season_type(stop_year)
 
             # Use the Games class that loads from JSON with optional game filter
-            games = Games(
+            games = Games.get_games(
                 start_year=start_year_numeric,
                 stop_year=stop_year_numeric,
                 season_type=season_type,
+                context=context,
             )
             if game_filter_index == 0:
                 game_years_strings.append(games.get_years_string())
@@ -708,6 +814,7 @@ def plot_percent_versus_time(
                 game_filter_strings.append(game_filter.get_filter_string())
             # Get points data for each time point
             percent_data = {}
+            fit_start = None
             for current_time in times:
                 points_down_line = PointsDownLine(
                     games=games,
@@ -716,7 +823,11 @@ def plot_percent_versus_time(
                     down_mode="at",
                     max_point_margin=-1,
                     fit_max_points=-1,
+                    fit_start=fit_start,
                 )
+                if warm_start_fits:
+                    # The next minute's fit is close to this one, so start there
+                    fit_start = (points_down_line.m, points_down_line.b)
                 game_count = points_down_line.number_of_games
                 for percent in percents:
                     current_percents = percent_data.setdefault(percent, [])
@@ -810,10 +921,11 @@ def plot_percent_versus_time(
                 percent_amount = float(percent_string[:-1])
                 y = [p[0] for p in percent_value[-12:]]
                 result = Num.least_squares(x, y, slope_only=True)
-                x_final.extend(Num.PPF(percent_amount / 100.0) * p**0.5 for p in x)
+                amount = Num.PPF(percent_amount / 100.0)
+                x_final.extend(amount * p**0.5 for p in x)
                 y_final.extend(y)
             result = Num.least_squares(x_final, y_final, slope_only=True)
-            print(f"CDF coefficent: {result["m"]}.")
+            print(f"CDF coefficent: {result['m']}.")
 
     # Create the final plot
     final_plot = FinalPlot(
@@ -827,6 +939,10 @@ def plot_percent_versus_time(
         max_x=max(x_ticks),
         json_name=json_name,
         lines=percent_lines,
+        json_format=json_format,
+        float_digits=float_digits,
+        game_table=game_table,
+        binomial_intervals=binomial_intervals,
     )
     final_plot.to_json()
 
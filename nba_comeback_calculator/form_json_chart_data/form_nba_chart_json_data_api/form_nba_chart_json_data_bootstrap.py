@@ -0,0 +1,296 @@
+# form_nba_chart_json_data_bootstrap.py
+"""
+Bootstrap confidence bands for the probit lines of PointsDownLine.
+
+A line's fit only sees the (margin, wins, losses) counts of its fit window,
+so its uncertainty is estimated by resampling those counts and refitting:
+
+- "parametric" draws the wins at each margin from a binomial with the
+  fitted win probability and the margin's game count
+- "nonparametric" resamples the games of the fit window with replacement,
+  i.e. draws all the (margin, outcome) counts from one multinomial
+
+All replicates are drawn as one array and refit together by Fisher scoring,
+a Newton step per iteration over the whole (replicates, margins) array, so
+a thousand replicates take milliseconds rather than a thousand scipy fits.
+The band at each point margin is the percentile interval of the replicate
+fit lines, in the units of the fit line m * x + b.
+
+The replicates are drawn from and refit with the link of the line's fit,
+the chart's y axis: probit by default, or logit for use_logit charts. The
+likelihood of a linear y axis clips the fit line to probabilities, which
+Fisher scoring cannot follow, so linear charts have no band.
+
+Like the fit, the resampling treats the margins as independent; for
+cumulated ("or more") lines, where a game counts at several margins, the
+band is narrower than it should be.
+
+The random draws are seeded from the counts, so a line's band does not
+depend on which charts were built before it.
+"""
+
+# Standard library imports
+import hashlib
+import json
+
+# Third-party imports
+import numpy as np
+
+BOOTSTRAP_METHODS = ("parametric", "nonparametric")
+
+# Link functions (chart y axes) the batch fits support
+BOOTSTRAP_LINKS = ("probit", "logit")
+
+# Options of a confidence band and their defaults
+DEFAULT_CONFIDENCE_BAND = {"replicates": 1000, "level": 0.95, "method": "parametric"}
+
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-10
+
+# Bound of the linear predictor, where the probability reaches the clipping of
+# Num.probit_neg_log_likelihood; it keeps pdf(z) ** 2 from underflowing
+MAX_Z = 8.0
+
+# The same bound for the logit link, whose tails are much longer
+MAX_LOGIT_Z = 36.0
+
+
+def get_confidence_band_options(confidence_band):
+    """
+    Resolve the confidence_band argument of a plot function.
+
+    Parameters:
+    -----------
+    confidence_band : bool, dict or None
+        None or False for no band, True for the DEFAULT_CONFIDENCE_BAND
+        options, or a dict overriding some of them
+
+    Returns:
+    --------
+    dict or None
+        Complete options, or None for no band
+    """
+    if not confidence_band:
+        return None
+    if confidence_band is True:
+        return dict(DEFAULT_CONFIDENCE_BAND)
+    unknown_options = set(confidence_band) - set(DEFAULT_CONFIDENCE_BAND)
+    if unknown_options:
+        raise ValueError(f"Unknown confidence band options: {sorted(unknown_options)}")
+    options = dict(DEFAULT_CONFIDENCE_BAND, **confidence_band)
+    if options["method"] not in BOOTSTRAP_METHODS:
+        raise NotImplementedError(options["method"])
+    if not 0.0 < options["level"] < 1.0:
+        raise ValueError(
+            f"Confidence level must be between 0 and 1: {options['level']}"
+        )
+    return options
+
+
+def get_link_functions(link):
+    """
+    Get the functions of a link.
+
+    Parameters:
+    -----------
+    link : str
+        'probit' or 'logit', the y axis of the chart the line was fit for
+
+    Returns:
+    --------
+    tuple
+        (max_z, cdf, pdf) with the bound of the linear predictor, the
+        probability of a linear predictor value and its derivative
+    """
+    from scipy.special import expit, ndtr
+
+    if link == "probit":
+        return MAX_Z, ndtr, lambda z: np.exp(-0.5 * z * z) / np.sqrt(2.0 * np.pi)
+    if link == "logit":
+        return MAX_LOGIT_Z, expit, lambda z: expit(z) * expit(-z)
+    raise ValueError(
+        f"Bootstrap fits support the {' and '.join(BOOTSTRAP_LINKS)} links, "
+        f"not {link!r}"
+    )
+
+
+def get_bootstrap_seed(point_margin_counts):
+    """Seed of the random draws, from the counts of the fit window."""
+    counts_json = json.dumps(
+        [[int(value) for value in counts] for counts in point_margin_counts]
+    )
+    return int(hashlib.sha256(counts_json.encode("utf-8")).hexdigest()[:16], 16)
+
+
+def resample_counts(point_margin_counts, m, b, replicates, method, rng, link="probit"):
+    """
+    Draw bootstrap replicates of the counts of a fit window.
+
+    Parameters:
+    -----------
+    point_margin_counts : list of tuples
+        (point_margin, win_count, loss_count) of every margin in the fit window
+    m, b : float
+        Fitted line, used by the parametric bootstrap
+    replicates : int
+        Number of replicates
+    method : str
+        'parametric' or 'nonparametric'
+    rng : numpy.random.Generator
+        Source of the draws
+    link : str
+        Link of the fitted line, see get_link_functions
+
+    Returns:
+    --------
+    tuple
+        (margins, win_counts, game_counts); the counts are arrays of shape
+        (replicates, margins)
+    """
+    max_z, cdf, _ = get_link_functions(link)
+    counts = np.array(point_margin_counts, dtype=np.int64).reshape(-1, 3)
+    margins = counts[:, 0].astype(float)
+    game_counts = counts[:, 1] + counts[:, 2]
+    if method == "parametric":
+        percents = cdf(np.clip(m * margins + b, -max_z, max_z))
+        win_counts = rng.binomial(
+            game_counts, percents, size=(replicates, len(margins))
+        )
+        game_counts = np.broadcast_to(game_counts, win_counts.shape)
+    elif method == "nonparametric":
+        # One multinomial over the (margin, win) and (margin, loss) cells
+        cells = np.concatenate([counts[:, 1], counts[:, 2]])
+        draws = rng.multinomial(cells.sum(), cells / cells.sum(), size=replicates)
+        win_counts = draws[:, : len(margins)]
+        game_counts = win_counts + draws[:, len(margins) :]
+    else:
+        raise NotImplementedError(method)
+    return margins, win_counts.astype(float), game_counts.astype(float)
+
+
+def fit_probit_counts(margins, win_counts, game_counts, m_est, b_est, link="probit"):
+    """
+    Fit probit (or logit) lines to many sets of binomial counts at once.
+
+    Each Fisher scoring iteration updates every replicate's (m, b) by
+    solving its 2x2 expected information system in closed form.
+
+    Parameters:
+    -----------
+    margins : numpy.ndarray
+        Point margins, shape (margins,)
+    win_counts, game_counts : numpy.ndarray
+        Counts at each margin, shape (replicates, margins)
+    m_est, b_est : float
+        Starting line of every replicate
+    link : str
+        'probit' or 'logit', see get_link_functions
+
+    Returns:
+    --------
+    dict
+        Arrays 'm', 'b' and 'converged' with one value per replicate
+    """
+    max_z, cdf, get_pdf = get_link_functions(link)
+    replicates = len(win_counts)
+    m = np.full(replicates, float(m_est))
+    b = np.full(replicates, float(b_est))
+    converged = np.zeros(replicates, dtype=bool)
+    active = np.ones(replicates, dtype=bool)
+    for _ in range(MAX_ITERATIONS):
+        z = np.clip(m[active, None] * margins + b[active, None], -max_z, max_z)
+        percents = cdf(z)
+        variances = percents * (1.0 - percents)
+        pdf = get_pdf(z)
+        # Score and expected information of the linear predictor at each margin
+        scores = pdf * (win_counts[active] - game_counts[active] * percents) / variances
+        weights = game_counts[active] * pdf * pdf / variances
+
+        score_m = scores @ margins
+        score_b = scores.sum(axis=1)
+        info_mm = weights @ (margins * margins)
+        info_mb = weights @ margins
+        info_bb = weights.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            determinant = info_mm * info_bb - info_mb * info_mb
+            step_m = (info_bb * score_m - info_mb * score_b) / determinant
+            step_b = (info_mm * score_b - info_mb * score_m) / determinant
+            # Replicates without a fit (e.g. no wins at all) are dropped
+            failed = ~(np.isfinite(step_m) & np.isfinite(step_b) & (determinant > 0.0))
+            done = ~failed & (np.maximum(np.abs(step_m), np.abs(step_b)) < TOLERANCE)
+
+        indexes = np.flatnonzero(active)
+        m[indexes[~failed]] += step_m[~failed]
+        b[indexes[~failed]] += step_b[~failed]
+        converged[indexes[done]] = True
+        active[indexes[failed | done]] = False
+        if not active.any():
+            break
+    return {"m": m, "b": b, "converged": converged}
+
+
+def bootstrap_probit_fits(
+    point_margin_counts,
+    m,
+    b,
+    replicates=1000,
+    method="parametric",
+    seed=None,
+    link="probit",
+):
+    """
+    Refit a line to bootstrap replicates of its counts.
+
+    Parameters:
+    -----------
+    point_margin_counts : list of tuples
+        (point_margin, win_count, loss_count) of every margin in the fit window
+    m, b : float
+        The line fitted to the counts
+    replicates : int
+        Number of replicates
+    method : str
+        'parametric' or 'nonparametric'
+    seed : int or None
+        Seed of the draws, None for get_bootstrap_seed of the counts
+    link : str
+        Link of the fitted line, see get_link_functions
+
+    Returns:
+    --------
+    dict
+        Arrays 'm' and 'b' of the replicate fits that converged
+    """
+    if seed is None:
+        seed = get_bootstrap_seed(point_margin_counts)
+    rng = np.random.default_rng(seed)
+    margins, win_counts, game_counts = resample_counts(
+        point_margin_counts, m, b, replicates, method, rng, link
+    )
+    fits = fit_probit_counts(margins, win_counts, game_counts, m, b, link)
+    return {"m": fits["m"][fits["converged"]], "b": fits["b"][fits["converged"]]}
+
+
+def get_confidence_band(fits, margins, level):
+    """
+    Percentile interval of bootstrap fit lines at some point margins.
+
+    Parameters:
+    -----------
+    fits : dict
+        Replicate fits from bootstrap_probit_fits
+    margins : array-like
+        Point margins to evaluate the lines at
+    level : float
+        Confidence level, e.g. 0.95
+
+    Returns:
+    --------
+    tuple
+        (lower, upper) arrays in the units of the fit line m * x + b
+    """
+    margins = np.asarray(margins, dtype=float)
+    lines = fits["m"][:, None] * margins + fits["b"][:, None]
+    tail = (1.0 - level) / 2.0
+    lower, upper = np.quantile(lines, [tail, 1.0 - tail], axis=0)
+    return lower, upper
@@ -0,0 +1,314 @@
+# form_nba_chart_json_data_build_manifest.py
+"""
+Incremental build manifest for NBA chart JSON files.
+
+The manifest records, for every generated chart, a fingerprint of everything
+the chart was built from: the plot function and its arguments (year groups,
+GameFilter signatures and options), the hashes of the season files those year
+groups read, and a hash of the API source code. Charts whose fingerprint is
+unchanged since the last build are not regenerated; the stored plot function
+results (titles) are returned instead. After a new game day only the charts
+that include the current season are rebuilt.
+"""
+
+# Standard library imports
+import hashlib
+import json
+import os
+import time
+
+# Local imports
+from .form_nba_chart_json_data_api import GameFilter, parse_season_type
+from .form_nba_chart_json_data_context import get_chart_context
+from .form_nba_chart_json_data_plot_primitives import write_if_changed
+
+MANIFEST_VERSION = 1
+
+# Arguments that do not change a chart's content
+UNFINGERPRINTED_KWARGS = ("json_name", "game_table", "plot", "context")
+
+_code_version = None
+
+
+def get_code_version():
+    """
+    Hash the source of the chart API modules.
+
+    Returns:
+    --------
+    str
+        Hex digest that changes whenever any API module changes
+    """
+    global _code_version
+    if _code_version is None:
+        api_dir = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for filename in sorted(os.listdir(api_dir)):
+            if filename.endswith(".py"):
+                digest.update(filename.encode("utf-8"))
+                with open(os.path.join(api_dir, filename), "rb") as fileobj:
+                    digest.update(fileobj.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def get_season_years(year_groups):
+    """Get the sorted season years read by a list of (start_year, stop_year) groups."""
+    years = set()
+    for start_year, stop_year in year_groups:
+        start_year_numeric, _ = parse_season_type(start_year)
+        stop_year_numeric, _ = parse_season_type(stop_year)
+        years.update(range(start_year_numeric, stop_year_numeric + 1))
+    return sorted(years)
+
+
+def encode_fingerprint_value(value):
+    """Convert a plot function argument to a JSON-serializable value."""
+    if isinstance(value, GameFilter):
+        return value.to_json()
+    if isinstance(value, (list, tuple)):
+        return [encode_fingerprint_value(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): encode_fingerprint_value(item) for key, item in value.items()}
+    return value
+
+
+def get_output_name(json_name):
+    """The file FinalPlot.to_json writes for a json_name."""
+    return json_name if json_name.endswith(".gz") else json_name + ".gz"
+
+
+def build_chart_group(chart_calls, game_table=None, context=None):
+    """
+    Run a group of plot function calls in order.
+
+    Parameters:
+    -----------
+    chart_calls : list of tuples
+        List of (plot_function, kwargs) calls
+    game_table : GameSummaryTable or None
+        Shared table passed to every chart and saved afterwards
+    context : ChartContext or None
+        Context active while the charts are built, see get_chart_context
+
+    Returns:
+    --------
+    tuple
+        (results, elapsed) lists with the plot function result and the
+        seconds taken by each call
+    """
+    results = []
+    elapsed = []
+    with get_chart_context(context).activate():
+        for plot_function, kwargs in chart_calls:
+            if game_table is not None:
+                kwargs = dict(kwargs, game_table=game_table)
+            start = time.perf_counter()
+            results.append(plot_function(**kwargs))
+            elapsed.append(time.perf_counter() - start)
+    if game_table is not None:
+        game_table.save()
+    return results, elapsed
+
+
+class BuildManifest:
+    """
+    Fingerprints and plot results of previously built charts.
+
+    Charts are keyed by their output path relative to the manifest file, so
+    the manifest stays valid when the repository is checked out elsewhere.
+    """
+
+    def __init__(self, filename, context=None):
+        """
+        Load the manifest, starting empty if it does not exist or is outdated.
+
+        Parameters:
+        -----------
+        filename : str
+            Path of the manifest JSON file
+        context : ChartContext or None
+            Context whose season files are hashed and whose charts are built,
+            see get_chart_context
+        """
+        self.filename = filename
+        self.context = context
+        self.charts = {}
+        self.season_hashes = {}
+        self.used_chart_keys = set()
+        self.built_count = 0
+        self.skipped_count = 0
+
+        if os.path.exists(filename):
+            with open(filename, "r") as fileobj:
+                json_data = json.load(fileobj)
+            if json_data.get("version") == MANIFEST_VERSION:
+                self.charts = json_data["charts"]
+                self.season_hashes = json_data["season_hashes"]
+
+    def get_chart_key(self, json_name):
+        manifest_dir = os.path.dirname(os.path.abspath(self.filename))
+        return os.path.relpath(
+            os.path.abspath(get_output_name(json_name)), manifest_dir
+        ).replace(os.sep, "/")
+
+    def get_season_hash(self, year):
+        """
+        Hash a season file, reusing the stored hash if its size and mtime match.
+
+        Returns None if the season file does not exist.
+        """
+        filename = get_chart_context(self.context).get_season_filename(year)
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            return None
+
+        key = os.path.basename(filename)
+        stored = self.season_hashes.get(key)
+        if (
+            stored is not None
+            and stored["size"] == stat.st_size
+            and stored["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return stored["sha256"]
+
+        digest = hashlib.sha256()
+        with open(filename, "rb") as fileobj:
+            for block in iter(lambda: fileobj.read(1 << 20), b""):
+                digest.update(block)
+        self.season_hashes[key] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest.hexdigest(),
+        }
+        return digest.hexdigest()
+
+    def get_fingerprint(self, plot_function, kwargs):
+        """
+        Fingerprint the inputs of a plot function call.
+
+        Parameters:
+        -----------
+        plot_function : callable
+            plot_biggest_deficit or plot_percent_versus_time
+        kwargs : dict
+            Keyword arguments of the call
+
+        Returns:
+        --------
+        str
+            Hex digest of the inputs
+        """
+        seasons = {
+            str(year): self.get_season_hash(year)
+            for year in get_season_years(kwargs["year_groups"])
+        }
+        inputs = {
+            "function": plot_function.__name__,
+            "kwargs": {
+                key: encode_fingerprint_value(value)
+                for key, value in kwargs.items()
+                if key not in UNFINGERPRINTED_KWARGS
+            },
+            "seasons": seasons,
+            "code_version": get_code_version(),
+        }
+        inputs_json = json.dumps(inputs, sort_keys=True)
+        return hashlib.sha256(inputs_json.encode("utf-8")).hexdigest()
+
+    def is_current(self, json_name, fingerprint):
+        """Whether a chart was built from the same inputs and its file still exists."""
+        entry = self.charts.get(self.get_chart_key(json_name))
+        return (
+            entry is not None
+            and entry["fingerprint"] == fingerprint
+            and os.path.exists(get_output_name(json_name))
+        )
+
+    def check_group(self, chart_calls, game_table=None):
+        """
+        Check whether a group of charts needs to be rebuilt.
+
+        Charts that share a GameSummaryTable refer to games by their position
+        in the table, so a group is only up to date if every chart in it is.
+
+        Parameters:
+        -----------
+        chart_calls : list of tuples
+            List of (plot_function, kwargs) calls
+        game_table : GameSummaryTable or None
+            Shared table (with a json_name) used by the charts
+
+        Returns:
+        --------
+        tuple
+            (fingerprints, results) where results holds the stored plot
+            function results, or is None if the group must be rebuilt
+        """
+        fingerprints = [
+            self.get_fingerprint(plot_function, kwargs)
+            for plot_function, kwargs in chart_calls
+        ]
+        keys = [self.get_chart_key(kwargs["json_name"]) for _, kwargs in chart_calls]
+        self.used_chart_keys.update(keys)
+
+        is_current = all(
+            self.is_current(kwargs["json_name"], fingerprint)
+            for (_, kwargs), fingerprint in zip(chart_calls, fingerprints)
+        )
+        if is_current and game_table is not None:
+            is_current = os.path.exists(get_output_name(game_table.json_name))
+        if not is_current:
+            return fingerprints, None
+        self.skipped_count += len(chart_calls)
+        return fingerprints, [tuple(self.charts[key]["result"]) for key in keys]
+
+    def record_group(self, chart_calls, fingerprints, results):
+        """Store the fingerprints and plot function results of a rebuilt group."""
+        for (_, kwargs), fingerprint, result in zip(chart_calls, fingerprints, results):
+            self.charts[self.get_chart_key(kwargs["json_name"])] = {
+                "fingerprint": fingerprint,
+                "result": encode_fingerprint_value(result),
+            }
+        self.built_count += len(chart_calls)
+
+    def run_group(self, chart_calls, game_table=None):
+        """
+        Build a group of charts in this process, skipping it if it is up to date.
+
+        See check_group for the arguments.
+
+        Returns:
+        --------
+        list
+            The plot function result of each call
+        """
+        fingerprints, results = self.check_group(chart_calls, game_table)
+        if results is None:
+            results, _ = build_chart_group(chart_calls, game_table, self.context)
+            self.record_group(chart_calls, fingerprints, results)
+        return results
+
+    def run(self, plot_function, **kwargs):
+        """Build a single chart if its inputs changed, returning the plot result."""
+        return self.run_group([(plot_function, kwargs)])[0]
+
+    def prune(self):
+        """Forget charts that were not part of this build."""
+        self.charts = {
+            key: entry
+            for key, entry in self.charts.items()
+            if key in self.used_chart_keys
+        }
+
+    def save(self):
+        """Write the manifest, returning True if it changed."""
+        json_data = {
+            "version": MANIFEST_VERSION,
+            "season_hashes": self.season_hashes,
+            "charts": self.charts,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+        json_text = json.dumps(json_data, indent=4, sort_keys=True)
+        return write_if_changed(self.filename, json_text)
@@ -0,0 +1,395 @@
+# form_nba_chart_json_data_chart_spec.py
+"""
+Declarative chart spec files and the batch runner behind the nbacc-charts command.
+
+A chart spec is a JSON (or, with PyYAML installed, YAML) file listing the
+season and output directories and the plot pages to build:
+
+    {
+        "seasons": "../../../docs/frontend/source/_static/json/seasons",
+        "charts": "../../../docs/frontend/source/_static/json/charts",
+        "rst": "../../../docs/frontend/source/plots",
+        "manifest": "../../../.nbacc_build_manifest.json",
+        "fit_cache": "../../../.nbacc_fit_cache",
+        "filters": {"home": {"for_at_home": true}},
+        "pages": [
+            {"name": "all_time_v_modern",
+             "year_groups": [[1996, 2024], [2017, 2024]]},
+            {"name": "modern_home_v_away", "year_groups": [[2017, 2024]],
+             "game_filters": [{}, "home", {"for_at_home": false}]},
+            {"name": "late_deficits", "title": "Late Deficits",
+             "year_groups": [[2017, 2024]],
+             "charts": [{"id": "down_at_6", "kind": "biggest_deficit",
+                         "section": "Points Down At Time",
+                         "start_time": 6, "down_mode": "at"}]}
+        ]
+    }
+
+Paths are relative to the spec file. Game filters are GameFilter arguments,
+names from "filters", or null for no filter. A page without "charts" gets the
+standard comparison charts of the plots page; otherwise each chart names its
+kind (see PLOT_FUNCTIONS) and passes the remaining keys to the plot function,
+with the page's year_groups and game_filters as defaults. The build
+"manifest" defaults to .nbacc_build_manifest.json next to the spec; keep it
+out of the charts directory, which is published. The optional
+"fit_cache" directory keeps the line fits between builds (see FitCache), so
+rebuilt charts whose games did not change skip the optimization.
+
+The runner plans every page into one ChartScheduler, so charts that are up
+to date in the build manifest are skipped, seasons are decoded once for all
+pages and the stale pages are built in parallel.
+
+Usage:
+    nbacc-charts plan <spec>
+    nbacc-charts build <spec> [--workers N] [--force] [--no-clean]
+                              [--profile REPORT] [--profile-memory]
+                              [--cprofile DUMP] [--no-fit-cache]
+"""
+
+# Standard library imports
+import argparse
+import json
+import os
+
+# Local imports
+from .form_nba_chart_json_data_api import GameFilter
+from .form_nba_chart_json_data_build_manifest import BuildManifest
+from .form_nba_chart_json_data_context import ChartContext
+from .form_nba_chart_json_data_fit_cache import FitCache
+from .form_nba_chart_json_data_plot_pages import PLOT_FUNCTIONS, PlotPages
+from .form_nba_chart_json_data_profiler import ChartProfiler
+from .form_nba_chart_json_data_scheduler import ChartScheduler
+
+# Default build manifest, next to the spec file and outside the published charts
+DEFAULT_MANIFEST_NAME = ".nbacc_build_manifest.json"
+
+# Chart spec keys that are not plot function arguments
+CHART_SPEC_KEYS = ("id", "kind", "section", "title")
+
+
+def load_chart_spec(filename):
+    """
+    Read a chart spec file and resolve its paths.
+
+    Parameters:
+    -----------
+    filename : str
+        Path of a .json, .yaml or .yml spec file
+
+    Returns:
+    --------
+    dict
+        The spec, with "seasons", "charts", "rst", "manifest" and
+        "fit_cache" (None if not set) as absolute paths
+    """
+    with open(filename, "r") as fileobj:
+        if filename.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError(
+                    "PyYAML is required for YAML chart specs (pip install pyyaml)"
+                )
+            spec = yaml.safe_load(fileobj)
+        else:
+            spec = json.load(fileobj)
+
+    for key in ["seasons", "charts", "pages"]:
+        if key not in spec:
+            raise ValueError(f"Chart spec {filename} is missing '{key}'")
+
+    spec_dir = os.path.dirname(os.path.abspath(filename))
+
+    def resolve(path):
+        return os.path.abspath(os.path.join(spec_dir, path))
+
+    spec["seasons"] = resolve(spec["seasons"])
+    spec["charts"] = resolve(spec["charts"])
+    spec["rst"] = resolve(spec.get("rst", os.path.join(spec["charts"], "rst")))
+    spec["manifest"] = resolve(spec.get("manifest", DEFAULT_MANIFEST_NAME))
+    spec["fit_cache"] = resolve(spec["fit_cache"]) if spec.get("fit_cache") else None
+    return spec
+
+
+def get_game_filters(game_filters, named_filters):
+    """
+    Convert spec game filters into GameFilter objects.
+
+    Parameters:
+    -----------
+    game_filters : list or None
+        GameFilter argument dictionaries, names of named_filters or None
+    named_filters : dict
+        Filter name to GameFilter argument dictionary
+
+    Returns:
+    --------
+    list or None
+        List of GameFilter objects (or None for no filter)
+    """
+    if game_filters is None:
+        return None
+    result = []
+    for game_filter in game_filters:
+        if isinstance(game_filter, str):
+            if game_filter not in named_filters:
+                raise ValueError(f"Unknown game filter name: {game_filter}")
+            game_filter = named_filters[game_filter]
+        result.append(None if game_filter is None else GameFilter(**game_filter))
+    return result
+
+
+def get_year_groups(year_groups):
+    """Convert spec year groups into (start_year, stop_year) tuples."""
+    return [tuple(year_group) for year_group in year_groups]
+
+
+def collect_spec_page(plot_pages, page_spec, named_filters):
+    """
+    Collect the charts of one spec page.
+
+    Parameters:
+    -----------
+    plot_pages : PlotPages
+        Collects the page and later writes its RST file
+    page_spec : dict
+        The page entry of the spec
+    named_filters : dict
+        Filter name to GameFilter argument dictionary
+
+    Returns:
+    --------
+    dict
+        The page, with its ChartJob under "job"
+    """
+    page_name = page_spec["name"]
+    year_groups = get_year_groups(page_spec["year_groups"])
+    game_filters = get_game_filters(page_spec.get("game_filters"), named_filters)
+
+    if "charts" not in page_spec:
+        if not (
+            (len(year_groups) == 2 and game_filters is None)
+            or (len(year_groups) == 1 and game_filters is not None)
+        ):
+            raise ValueError(
+                f"Page {page_name} needs two year groups or one year group with "
+                "game filters to use the comparison charts"
+            )
+        page = plot_pages.collect_comparison_page(page_name, year_groups, game_filters)
+        if "title" in page_spec:
+            page["rst_title"] = page_spec["title"]
+        return page
+
+    page = plot_pages.create_page(page_name, page_spec.get("title"))
+    for chart_spec in page_spec["charts"]:
+        kind = chart_spec.get("kind")
+        if kind not in PLOT_FUNCTIONS:
+            raise ValueError(
+                f"Unknown chart kind {kind!r} on page {page_name}, expected one "
+                f"of {', '.join(PLOT_FUNCTIONS)}"
+            )
+        kwargs = {
+            key: value
+            for key, value in chart_spec.items()
+            if key not in CHART_SPEC_KEYS
+        }
+        kwargs["year_groups"] = (
+            get_year_groups(kwargs["year_groups"])
+            if "year_groups" in kwargs
+            else year_groups
+        )
+        kwargs["game_filters"] = (
+            get_game_filters(kwargs["game_filters"], named_filters)
+            if "game_filters" in kwargs
+            else game_filters
+        )
+        plot_pages.add_chart(
+            page,
+            chart_spec["id"],
+            chart_spec.get("section", "Charts"),
+            PLOT_FUNCTIONS[kind],
+            title=chart_spec.get("title"),
+            **kwargs,
+        )
+    return plot_pages.finish_page(page)
+
+
+def plan_chart_spec(spec, workers=None, force=False, profiler=None):
+    """
+    Collect every page of a spec into a scheduler.
+
+    Parameters:
+    -----------
+    spec : dict
+        Spec returned by load_chart_spec
+    workers : int, optional
+        Number of worker processes, defaults to the CPU count
+    force : bool
+        If True, rebuild every chart regardless of the build manifest
+    profiler : ChartProfiler or None
+        Profiler recording the build, see ChartContext
+
+    Returns:
+    --------
+    tuple
+        (plot_pages, pages, scheduler, manifest)
+    """
+    plot_pages = PlotPages(spec["charts"], spec["rst"])
+    fit_cache = FitCache(spec["fit_cache"]) if spec.get("fit_cache") else None
+    context = ChartContext(
+        spec["seasons"], spec["charts"], profiler=profiler, fit_cache=fit_cache
+    )
+
+    # Loaded even when forced, so the rebuilt charts are recorded
+    manifest = BuildManifest(spec["manifest"], context)
+    if force:
+        manifest.charts = {}
+    scheduler = ChartScheduler(context, workers=workers, manifest=manifest)
+
+    named_filters = spec.get("filters", {})
+    pages = []
+    for page_spec in spec["pages"]:
+        page = collect_spec_page(plot_pages, page_spec, named_filters)
+        scheduler.add(page["job"])
+        pages.append(page)
+    return plot_pages, pages, scheduler, manifest
+
+
+def run_chart_spec(spec, workers=None, force=False, clean=True, profiler=None):
+    """
+    Build the charts and RST files of a spec.
+
+    Parameters:
+    -----------
+    spec : dict
+        Spec returned by load_chart_spec
+    workers : int, optional
+        Number of worker processes, defaults to the CPU count
+    force : bool
+        If True, rebuild every chart regardless of the build manifest
+    clean : bool
+        If True, remove files in the plots and RST directories that this
+        spec did not produce
+    profiler : ChartProfiler or None
+        Profiler recording the build, see ChartContext
+
+    Returns:
+    --------
+    BuildManifest
+        The saved manifest, with the built and skipped chart counts
+    """
+    plot_pages, pages, scheduler, manifest = plan_chart_spec(
+        spec, workers, force, profiler
+    )
+    results = scheduler.run()
+    for page in pages:
+        plot_pages.write_page_rst(page, results[page["page_name"]])
+
+    # Write index.rst last, once all the pages are known
+    plot_pages.write_index_rst()
+    if clean:
+        plot_pages.remove_stale_files()
+
+    manifest.prune()
+    manifest.save()
+    if scheduler.context.fit_cache is not None:
+        scheduler.context.fit_cache.prune()
+    print(
+        f"Built {manifest.built_count} charts, {manifest.skipped_count} were up to date"
+    )
+    return manifest
+
+
+def print_plan(spec, force=False):
+    """Print the pages of a spec, their seasons and whether they need building."""
+    _, pages, scheduler, manifest = plan_chart_spec(spec, workers=1, force=force)
+    season_years = set()
+    stale_count = 0
+    for page in pages:
+        # Charts shared with an earlier page are counted there
+        job = scheduler.get_build_job(page["job"])
+        _, results = manifest.check_group(job.chart_calls, job.game_table)
+        stale_count += results is None
+        season_years.update(job.season_years)
+        status = "build" if results is None else "up to date"
+        years = job.season_years
+        if not years:
+            print(f"{page['page_name']}: every chart shared with another page")
+            continue
+        print(
+            f"{page['page_name']}: {len(job.chart_calls)} charts, "
+            f"seasons {years[0]}-{years[-1]}, {status}"
+        )
+    print(
+        f"{len(pages)} pages, {stale_count} to build, "
+        f"{len(season_years)} season files"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="nbacc-charts",
+        description="Plan or build the chart JSON and RST files of a chart spec.",
+    )
+    parser.add_argument("command", choices=["plan", "build"])
+    parser.add_argument("spec", help="Chart spec file (.json, .yaml or .yml)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of processes building charts (default: CPU count)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild every chart, even if its inputs did not change",
+    )
+    parser.add_argument(
+        "--no-clean",
+        action="store_true",
+        help="Keep files in the output directories that the spec did not produce",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="REPORT",
+        help="Write a JSON report of the time spent in each build stage",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Also record the peak memory of each stage (slows the build down)",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="DUMP",
+        help="Write a cProfile dump of the build (builds in one process)",
+    )
+    parser.add_argument(
+        "--no-fit-cache",
+        action="store_true",
+        help="Refit every line instead of using the spec's fit cache",
+    )
+    args = parser.parse_args(argv)
+
+    spec = load_chart_spec(args.spec)
+    if args.no_fit_cache:
+        spec["fit_cache"] = None
+    if args.command == "plan":
+        print_plan(spec, force=args.force)
+        return 0
+
+    profiler = None
+    if args.profile or args.profile_memory or args.cprofile:
+        profiler = ChartProfiler(
+            args.profile, memory=args.profile_memory, cprofile_filename=args.cprofile
+        )
+    run_chart_spec(
+        spec,
+        workers=args.workers,
+        force=args.force,
+        clean=not args.no_clean,
+        profiler=profiler,
+    )
+    if profiler is not None:
+        profiler.print_summary(profiler.finish())
+    return 0
@@ -0,0 +1,290 @@
+# form_nba_chart_json_data_context.py
+"""
+Chart build context for NBA chart data generation.
+
+A ChartContext owns everything a chart build used to keep in process-wide
+state: the season data directory, the chart output directory, the season and
+game collection caches, the example game sampler and the y axis probability
+transforms, and the optional ChartProfiler. Games, plot_biggest_deficit and
+plot_percent_versus_time take a context argument, so independent builds (for
+example a test fixture and the production data) can run in one process or in
+threads without interfering.
+
+Code below the plot functions (Num.CDF, the game samplers) finds the context
+through get_chart_context, which returns the context activated in the current
+thread, or the default context set with set_default_chart_context.
+"""
+
+# Standard library imports
+import contextlib
+import contextvars
+import functools
+import itertools
+import multiprocessing
+import os
+import random as random_lib
+import sys
+
+# Local imports
+from .form_nba_chart_json_data_fit_cache import get_environment_fit_cache
+from .form_nba_chart_json_data_profiler import get_environment_profiler
+
+# Seed for sampling example games, so generated charts are reproducible
+RANDOM_SEED = 0
+
+# Y axes, each with a ProbabilityTransform (see form_nba_chart_json_data_num)
+Y_AXES = ("probit", "logit", "linear")
+
+
+class ChartContext:
+    """
+    Data and output locations, caches and numeric state of a chart build.
+
+    Usage:
+        context = ChartContext(json_base_path, chart_base_path)
+        plot_biggest_deficit(json_name, year_groups, 24, "at", context=context)
+
+        with context.activate():
+            games = Games.get_games(2017, 2024)
+    """
+
+    def __init__(
+        self,
+        json_base_path,
+        chart_base_path=None,
+        random_seed=RANDOM_SEED,
+        profiler=None,
+        fit_cache=None,
+    ):
+        """
+        Parameters:
+        -----------
+        json_base_path : str or None
+            Directory of the nba_season_{year}.json.gz files
+        chart_base_path : str or None
+            Directory that relative chart json_name paths are written under.
+            If None, relative paths are relative to the working directory.
+        random_seed : int
+            Seed of the example game sampler
+        profiler : ChartProfiler or None
+            Records the pipeline stages. If None, the profiler configured by
+            the NBACC_PROFILE environment variables is used, if any.
+        fit_cache : FitCache or None
+            Stores the line fits across builds. If None, the cache in the
+            NBACC_FIT_CACHE directory is used, if set.
+        """
+        self.json_base_path = (
+            None if json_base_path is None else os.path.abspath(json_base_path)
+        )
+        self.chart_base_path = (
+            None if chart_base_path is None else os.path.abspath(chart_base_path)
+        )
+        # Season year to Season, and (start_year, stop_year, season_type) to Games
+        self.seasons = {}
+        self.games = {}
+        # Index of each Game in load order, shared with the chart contexts
+        self.game_indexes = itertools.count()
+        self.random_seed = random_seed
+        self.random = random_lib.Random(random_seed)
+        self.set_y_axis("probit")
+        self.profiler = get_environment_profiler() if profiler is None else profiler
+        self.fit_cache = get_environment_fit_cache() if fit_cache is None else fit_cache
+
+    def set_y_axis(self, y_axis):
+        """
+        Set the probability transform used by Num.transform, Num.CDF and Num.PPF.
+
+        Parameters:
+        -----------
+        y_axis : str
+            'probit' (normal), 'logit' or 'linear'
+        """
+        if y_axis not in Y_AXES:
+            raise ValueError(
+                f"Unknown y axis {y_axis!r}, expected one of {', '.join(Y_AXES)}"
+            )
+        self.y_axis = y_axis
+
+    def for_chart(self, y_axis="probit"):
+        """
+        Get a context for building one chart.
+
+        The chart context shares the season and game caches, but has its own
+        y axis transforms and sampler, so charts built at the same time or one
+        after another do not change each other's settings.
+
+        Parameters:
+        -----------
+        y_axis : str
+            Y axis of the chart, see set_y_axis
+
+        Returns:
+        --------
+        ChartContext
+        """
+        # Not copy.copy, which would drop the caches (see __getstate__)
+        chart_context = object.__new__(ChartContext)
+        chart_context.__dict__.update(self.__dict__)
+        chart_context.random = random_lib.Random(self.random_seed)
+        chart_context.set_y_axis(y_axis)
+        return chart_context
+
+    def get_season_filename(self, year):
+        """Path of the season data file of a year."""
+        if self.json_base_path is None:
+            raise ValueError(
+                "No season data directory, create a ChartContext with a "
+                "json_base_path"
+            )
+        return f"{self.json_base_path}/nba_season_{year}.json.gz"
+
+    def get_chart_path(self, json_name):
+        """Resolve a chart json_name against the chart output directory."""
+        if self.chart_base_path is None or os.path.isabs(json_name):
+            return json_name
+        return os.path.join(self.chart_base_path, json_name)
+
+    def profile(self, name):
+        """
+        Record a pipeline stage if this context has a profiler.
+
+        Parameters:
+        -----------
+        name : str
+            Stage name, see form_nba_chart_json_data_profiler
+
+        Returns:
+        --------
+        context manager
+        """
+        if self.profiler is None:
+            return _NOT_PROFILED
+        return self.profiler.stage(name)
+
+    def profile_chart(self, chart_name):
+        """Record a whole chart if this context has a profiler (see profile)."""
+        if self.profiler is None:
+            return _NOT_PROFILED
+        return self.profiler.chart(chart_name)
+
+    def count(self, name, amount=1):
+        """Add to a profiler counter if this context has a profiler."""
+        if self.profiler is not None:
+            self.profiler.count(name, amount)
+
+    def __getstate__(self):
+        # Processes started without fork load the seasons they need themselves,
+        # and are not profiled
+        state = dict(self.__dict__)
+        state.update(seasons={}, games={}, game_indexes=None, profiler=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.game_indexes = itertools.count()
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Make this the context returned by get_chart_context in this thread."""
+        token = _active_context.set(self)
+        try:
+            yield self
+        finally:
+            _active_context.reset(token)
+
+
+_NOT_PROFILED = contextlib.nullcontext()
+_active_context = contextvars.ContextVar("chart_context", default=None)
+_default_context = ChartContext(None)
+
+
+def get_chart_context(context=None):
+    """
+    Get the context to build with.
+
+    Parameters:
+    -----------
+    context : ChartContext or None
+        Explicit context, returned as is
+
+    Returns:
+    --------
+    ChartContext
+        The given context, else the active context of this thread, else the
+        default context
+    """
+    if context is not None:
+        return context
+    active_context = _active_context.get()
+    return _default_context if active_context is None else active_context
+
+
+def set_default_chart_context(context):
+    """
+    Set the context used when none is passed or active, e.g. by a page script.
+
+    Returns:
+    --------
+    ChartContext
+        The previous default context
+    """
+    global _default_context
+    previous_context = _default_context
+    _default_context = context
+    return previous_context
+
+
+def get_pool_context():
+    """
+    Get the multiprocessing context to start worker pools with.
+
+    Workers are forked on Linux, where they inherit the seasons already loaded
+    in this process. Other platforms keep their default start method, as fork
+    is unsafe on macOS, and their workers load the seasons they need
+    themselves (see ChartContext.__getstate__).
+
+    Returns:
+    --------
+    multiprocessing.context.BaseContext
+    """
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def with_chart_context(plot_function):
+    """
+    Decorate a plot function to build with a chart context of its own.
+
+    The function is called with context set to a ChartContext.for_chart copy
+    of the context argument (or of get_chart_context()), which is active
+    while it runs.
+    """
+
+    @functools.wraps(plot_function)
+    def wrapper(*args, context=None, **kwargs):
+        chart_context = get_chart_context(context).for_chart()
+        chart_name = kwargs.get("json_name", args[0] if args else None)
+        with chart_context.activate(), chart_context.profile_chart(chart_name):
+            return plot_function(*args, context=chart_context, **kwargs)
+
+    return wrapper
+
+
+def profile_stage(name):
+    """Record a stage with the active context's profiler (see ChartContext.profile)."""
+    return get_chart_context().profile(name)
+
+
+def profiled(name):
+    """Decorate a function to be recorded as a stage (see profile_stage)."""
+
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with get_chart_context().profile(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,215 @@
+# form_nba_chart_json_data_empirical_bayes.py
+"""
+Empirical Bayes shrinkage of the win percents of filtered lines.
+
+A line filtered to one team (or a rank group) has a few hundred games, so
+its per-margin win percents are noisy. Shrinkage treats the win percent of
+a group of games at a margin as drawn from a beta prior centered on the
+all-games percent at that margin:
+
+    p ~ Beta(k * p0, k * (1 - p0)),  wins ~ Binomial(games, p)
+
+and estimates the percent by the posterior mean
+
+    (wins + k * p0) / (games + k)
+
+so a margin with few games moves most of the way to the all-games line and
+one with many games keeps close to its own percent. The concentration k is
+estimated from the data: it maximizes the beta-binomial likelihood of the
+counts of every team (the games each team is "for") at every margin, which
+measures how far real team lines spread around the all-games line.
+
+The shrunk percents are written next to the observed ones (see
+PointsDownLine.set_sigma_final); the plotted points and the probit fit keep
+the observed counts.
+
+The team counts come from one bincount over the PointMarginTable entries,
+and the prior is cached on the Games collection per (start_time, down_mode,
+cumulate), so a batch of team pages estimates it once.
+
+The margins of a cumulated line share games, so the likelihood counts them
+as more evidence than they are; the concentration is then a rough estimate.
+"""
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from .form_nba_chart_json_data_context import profiled
+
+# Bounds of the concentration k, in games
+MIN_CONCENTRATION = 1.0
+MAX_CONCENTRATION = 1e6
+
+# Prior percents are kept off 0 and 1, where the beta prior is undefined
+MIN_PRIOR_PERCENT = 1e-6
+
+
+def get_team_counts(games, point_margin_table, cumulate):
+    """
+    Count the wins and games of every team at every point margin.
+
+    Parameters:
+    -----------
+    games : Games
+        Collection the table was built from
+    point_margin_table : PointMarginTable
+        Margins of every game for one (start_time, down_mode)
+    cumulate : bool
+        Whether to cumulate the counts from the lowest margin up, as
+        PointsDownLine does for "or more" lines
+
+    Returns:
+    --------
+    tuple
+        (point_margins, win_counts, game_counts); the counts are arrays of
+        shape (teams, point_margins)
+    """
+    # The team each entry is "for": the winner for a win entry and the loser
+    # for a loss entry (see GameFilter.is_match)
+    team_abbrs = []
+    for game in games:
+        if game.score_diff > 0:
+            team_abbrs.extend([game.home_team_abbr, game.away_team_abbr])
+        else:
+            team_abbrs.extend([game.away_team_abbr, game.home_team_abbr])
+    teams, entry_teams = np.unique(team_abbrs, return_inverse=True)
+
+    order = point_margin_table.order
+    point_margins, margin_indexes = np.unique(
+        point_margin_table.sorted_values, return_inverse=True
+    )
+    cells = entry_teams[order] * len(point_margins) + margin_indexes
+    shape = (len(teams), len(point_margins))
+    game_counts = np.bincount(cells, minlength=shape[0] * shape[1])
+    # Entries in even positions are wins
+    win_counts = np.bincount(
+        cells, weights=(order % 2 == 0), minlength=shape[0] * shape[1]
+    )
+    game_counts = game_counts.reshape(shape).astype(float)
+    win_counts = win_counts.reshape(shape)
+    if cumulate:
+        game_counts = np.cumsum(game_counts, axis=1)
+        win_counts = np.cumsum(win_counts, axis=1)
+    return point_margins, win_counts, game_counts
+
+
+def beta_binomial_log_likelihood(
+    concentration, prior_percents, win_counts, game_counts
+):
+    """
+    Log likelihood of counts under a beta prior, up to a constant.
+
+    Parameters:
+    -----------
+    concentration : float
+        Prior concentration k
+    prior_percents : numpy.ndarray
+        Prior mean p0 of each margin
+    win_counts, game_counts : numpy.ndarray
+        Counts of shape (groups, margins)
+
+    Returns:
+    --------
+    float
+    """
+    from scipy.special import betaln
+
+    alpha = concentration * prior_percents
+    beta = concentration * (1.0 - prior_percents)
+    return float(
+        np.sum(
+            betaln(alpha + win_counts, beta + game_counts - win_counts)
+            - betaln(alpha, beta)
+        )
+    )
+
+
+class ShrinkagePrior:
+    """
+    Beta prior of the win percent at each point margin.
+
+    Usage:
+        prior = games.get_shrinkage_prior(start_time, down_mode, cumulate)
+        percents = prior.shrink(point_margins, win_counts, game_counts)
+    """
+
+    def __init__(self, point_margins, prior_percents, concentration):
+        """
+        Parameters:
+        -----------
+        point_margins : array-like
+            Increasing point margins
+        prior_percents : array-like
+            All-games win percent at each margin, 0-1
+        concentration : float
+            Prior concentration k, in games
+        """
+        self.point_margins = np.asarray(point_margins, dtype=float)
+        self.prior_percents = np.asarray(prior_percents, dtype=float)
+        self.concentration = float(concentration)
+
+    @classmethod
+    @profiled("shrinkage_prior")
+    def build(cls, games, point_margin_table, cumulate):
+        """
+        Estimate the prior of a Games collection, see get_team_counts.
+
+        Returns:
+        --------
+        ShrinkagePrior
+        """
+        from scipy.optimize import minimize_scalar
+
+        point_margins, win_counts, game_counts = get_team_counts(
+            games, point_margin_table, cumulate
+        )
+        prior_percents = win_counts.sum(axis=0) / game_counts.sum(axis=0)
+
+        # Margins where every game was won or lost say nothing about the spread
+        is_informative = (prior_percents > 0.0) & (prior_percents < 1.0)
+        informative_percents = np.clip(
+            prior_percents[is_informative], MIN_PRIOR_PERCENT, 1 - MIN_PRIOR_PERCENT
+        )
+        informative_wins = win_counts[:, is_informative]
+        informative_games = game_counts[:, is_informative]
+        if not is_informative.any():
+            return cls(point_margins, prior_percents, MAX_CONCENTRATION)
+
+        result = minimize_scalar(
+            lambda log_concentration: -beta_binomial_log_likelihood(
+                np.exp(log_concentration),
+                informative_percents,
+                informative_wins,
+                informative_games,
+            ),
+            bounds=(np.log(MIN_CONCENTRATION), np.log(MAX_CONCENTRATION)),
+            method="bounded",
+        )
+        return cls(point_margins, prior_percents, np.exp(result.x))
+
+    def shrink(self, point_margins, win_counts, game_counts):
+        """
+        Posterior mean win percents of a line's counts.
+
+        Parameters:
+        -----------
+        point_margins : array-like
+            Margins of the line; margins between the prior's margins get an
+            interpolated prior percent
+        win_counts, game_counts : array-like
+            Counts of the line at each margin
+
+        Returns:
+        --------
+        numpy.ndarray
+            Shrunk win percents, 0-1
+        """
+        prior_percents = np.interp(
+            np.asarray(point_margins, dtype=float),
+            self.point_margins,
+            self.prior_percents,
+        )
+        return (
+            np.asarray(win_counts, dtype=float) + self.concentration * prior_percents
+        ) / (np.asarray(game_counts, dtype=float) + self.concentration)
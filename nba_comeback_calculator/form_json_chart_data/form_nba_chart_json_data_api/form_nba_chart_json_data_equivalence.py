@@ -0,0 +1,417 @@
+# form_nba_chart_json_data_equivalence.py
+"""
+Equivalence harness for alternative chart engines.
+
+A ChartEngine maps chart kinds (see PLOT_FUNCTIONS) to the functions that
+build them. The reference engine is the current plot_biggest_deficit and
+plot_percent_versus_time; a faster implementation is checked by building the
+same charts with both engines from the same seasons and diffing the chart
+JSON field by field:
+
+- Fitted values (FIT_KEYS, e.g. the probit slope m and intercept b) may
+  differ by fit_tolerance, relative to their size.
+- Other floats (percents, sigmas) may differ by float_tolerance, which only
+  allows for rounding.
+- Everything else must match exactly: counts, margins, titles and the
+  sample games, which every engine draws with the same seed.
+
+Each engine builds with its own ChartContext, with the seasons decoded
+before timing starts, so the reported speedups compare chart building only.
+
+Usage:
+    python -m nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_equivalence \\
+        --synthetic 600 --engine my_engines:FAST_ENGINE
+
+    report = run_equivalence(get_comparison_chart_calls([(2017, 2018)]),
+                             json_base_path, [REFERENCE_ENGINE, engine], work_dir)
+    report.print_summary()
+"""
+
+# Standard library imports
+import argparse
+import collections
+import importlib
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+# Local imports
+from .form_nba_chart_json_data_build_manifest import get_season_years
+from .form_nba_chart_json_data_context import RANDOM_SEED, ChartContext
+from .form_nba_chart_json_data_plot_pages import PLOT_FUNCTIONS, PlotPages
+from .form_nba_chart_json_data_plot_primitives import read_chart_json
+from .form_nba_chart_json_data_season_game_loader import Season
+
+# Chart JSON keys holding fitted values, compared with fit_tolerance (the
+# bootstrap confidence band moves with the fit it resamples)
+FIT_KEYS = ("m", "b", "y_fit_value", "confidence_band")
+
+DEFAULT_FIT_TOLERANCE = 1e-6
+DEFAULT_FLOAT_TOLERANCE = 1e-12
+
+# A field that differs between the reference and a candidate chart
+ChartDifference = collections.namedtuple(
+    "ChartDifference", ["path", "reference", "candidate"]
+)
+
+
+class ChartEngine:
+    """A named set of chart building functions."""
+
+    def __init__(self, name, plot_functions=None):
+        """
+        Parameters:
+        -----------
+        name : str
+            Engine name, also the output subdirectory of its charts
+        plot_functions : dict, optional
+            Chart kind to plot function, taking the same arguments as the
+            reference function. Kinds that are missing use the reference.
+        """
+        self.name = name
+        self.plot_functions = dict(PLOT_FUNCTIONS)
+        self.plot_functions.update(plot_functions or {})
+
+    @classmethod
+    def load(cls, engine_path):
+        """
+        Load an engine from a "module:attribute" path.
+
+        The attribute is a ChartEngine, or a dict of plot functions, which is
+        named after the attribute.
+        """
+        module_name, _, attribute = engine_path.partition(":")
+        engine = getattr(importlib.import_module(module_name), attribute)
+        if isinstance(engine, ChartEngine):
+            return engine
+        return cls(attribute, engine)
+
+
+REFERENCE_ENGINE = ChartEngine("reference")
+
+
+def get_comparison_chart_calls(years_groups, game_filters=None):
+    """
+    Get the standard comparison page charts (see PlotPages.collect_comparison_page).
+
+    Returns:
+    --------
+    list of tuples
+        (kind, kwargs) chart calls, with json_name relative to the chart
+        directory
+    """
+    kinds = {function: kind for kind, function in PLOT_FUNCTIONS.items()}
+    plot_pages = PlotPages("", "")
+    page = plot_pages.collect_comparison_page("equivalence", years_groups, game_filters)
+    chart_calls = []
+    for plot_function, kwargs in page["job"].chart_calls:
+        kwargs = dict(kwargs)
+        kwargs["json_name"] = os.path.relpath(
+            kwargs["json_name"], plot_pages.chart_base_path
+        )
+        chart_calls.append((kinds[plot_function], kwargs))
+    return chart_calls
+
+
+def is_close(reference, candidate, tolerance):
+    return math.isclose(reference, candidate, rel_tol=tolerance, abs_tol=tolerance)
+
+
+def diff_chart_json(
+    reference,
+    candidate,
+    fit_tolerance=DEFAULT_FIT_TOLERANCE,
+    float_tolerance=DEFAULT_FLOAT_TOLERANCE,
+    path="",
+):
+    """
+    Compare two chart JSON values field by field.
+
+    Parameters:
+    -----------
+    reference, candidate : JSON value
+        Charts (or parts of charts) read with read_chart_json
+    fit_tolerance : float
+        Relative and absolute tolerance of the FIT_KEYS values
+    float_tolerance : float
+        Relative and absolute tolerance of other non-integer numbers
+    path : str
+        Path of the values, used in the differences
+
+    Returns:
+    --------
+    list of ChartDifference
+        The fields that differ, empty if the charts are equivalent
+    """
+    if isinstance(reference, dict) and isinstance(candidate, dict):
+        differences = []
+        for key in sorted(set(reference) | set(candidate), key=str):
+            key_path = f"{path}.{key}" if path else str(key)
+            if key not in reference or key not in candidate:
+                differences.append(
+                    ChartDifference(key_path, reference.get(key), candidate.get(key))
+                )
+                continue
+            tolerance = fit_tolerance if key in FIT_KEYS else float_tolerance
+            differences.extend(
+                diff_chart_json(
+                    reference[key], candidate[key], fit_tolerance, tolerance, key_path
+                )
+            )
+        return differences
+
+    if isinstance(reference, list) and isinstance(candidate, list):
+        if len(reference) != len(candidate):
+            return [ChartDifference(f"{path}.length", len(reference), len(candidate))]
+        differences = []
+        for index, (reference_item, candidate_item) in enumerate(
+            zip(reference, candidate)
+        ):
+            differences.extend(
+                diff_chart_json(
+                    reference_item,
+                    candidate_item,
+                    fit_tolerance,
+                    float_tolerance,
+                    f"{path}[{index}]",
+                )
+            )
+        return differences
+
+    is_number = [
+        isinstance(value, (int, float)) and not isinstance(value, bool)
+        for value in (reference, candidate)
+    ]
+    if all(is_number) and (
+        isinstance(reference, float) or isinstance(candidate, float)
+    ):
+        if is_close(reference, candidate, float_tolerance):
+            return []
+    elif reference == candidate:
+        return []
+    return [ChartDifference(path, reference, candidate)]
+
+
+class EquivalenceReport:
+    """Timings and differences of the charts built by each engine."""
+
+    def __init__(self, engines, chart_calls):
+        self.engines = engines
+        self.chart_calls = chart_calls
+        # json_name to engine name to seconds
+        self.seconds = collections.defaultdict(dict)
+        # json_name to engine name to differences from the reference engine
+        self.differences = collections.defaultdict(dict)
+
+    @property
+    def reference(self):
+        return self.engines[0]
+
+    @property
+    def ok(self):
+        """True if every engine's charts are equivalent to the reference."""
+        return not any(
+            differences
+            for engine_differences in self.differences.values()
+            for differences in engine_differences.values()
+        )
+
+    def get_total_seconds(self, engine):
+        return sum(seconds[engine.name] for seconds in self.seconds.values())
+
+    def to_json(self):
+        """JSON-serializable report."""
+        return {
+            "engines": [engine.name for engine in self.engines],
+            "ok": self.ok,
+            "charts": {
+                kwargs["json_name"]: {
+                    "kind": kind,
+                    "seconds": self.seconds[kwargs["json_name"]],
+                    "differences": {
+                        engine_name: [
+                            difference._asdict() for difference in differences
+                        ]
+                        for engine_name, differences in self.differences[
+                            kwargs["json_name"]
+                        ].items()
+                    },
+                }
+                for kind, kwargs in self.chart_calls
+            },
+        }
+
+    def print_summary(self, max_differences=5):
+        """Print each engine's speedup and its first differences per chart."""
+        reference_seconds = self.get_total_seconds(self.reference)
+        for engine in self.engines[1:]:
+            seconds = self.get_total_seconds(engine)
+            speedup = reference_seconds / seconds if seconds else float("inf")
+            chart_count = sum(
+                bool(differences[engine.name])
+                for differences in self.differences.values()
+            )
+            print(
+                f"{engine.name}: {seconds:.2f}s vs {reference_seconds:.2f}s "
+                f"({speedup:.2f}x), {chart_count} of {len(self.chart_calls)} "
+                f"charts differ"
+            )
+            for kind, kwargs in self.chart_calls:
+                json_name = kwargs["json_name"]
+                differences = self.differences[json_name][engine.name]
+                chart_speedup = self.seconds[json_name][self.reference.name] / max(
+                    self.seconds[json_name][engine.name], 1e-9
+                )
+                status = f"{len(differences)} differences" if differences else "same"
+                print(f"  {chart_speedup:6.2f}x  {json_name}  {status}")
+                for difference in differences[:max_differences]:
+                    print(
+                        f"      {difference.path}: {difference.reference!r} != "
+                        f"{difference.candidate!r}"
+                    )
+
+
+def run_equivalence(
+    chart_calls,
+    json_base_path,
+    engines,
+    work_dir,
+    random_seed=RANDOM_SEED,
+    fit_tolerance=DEFAULT_FIT_TOLERANCE,
+    float_tolerance=DEFAULT_FLOAT_TOLERANCE,
+    repeat=1,
+):
+    """
+    Build charts with each engine and compare them with the first engine's.
+
+    Parameters:
+    -----------
+    chart_calls : list of tuples
+        (kind, kwargs) chart calls, json_name relative to the chart directory
+    json_base_path : str
+        Directory of the season files
+    engines : list of ChartEngine
+        Engines to build with, the first is the reference
+    work_dir : str
+        Directory the charts are written to, in a subdirectory per engine
+    random_seed : int
+        Sample game seed, the same for every engine
+    fit_tolerance, float_tolerance : float
+        Tolerances of the comparison, see diff_chart_json
+    repeat : int
+        Number of times each chart is built, the fastest time is reported
+
+    Returns:
+    --------
+    EquivalenceReport
+    """
+    report = EquivalenceReport(engines, chart_calls)
+    years = sorted(
+        {
+            year
+            for _, kwargs in chart_calls
+            for year in get_season_years(kwargs["year_groups"])
+        }
+    )
+    charts = collections.defaultdict(dict)
+    for engine in engines:
+        context = ChartContext(
+            json_base_path, os.path.join(work_dir, engine.name), random_seed
+        )
+        for year in years:
+            Season.get_season(year, context).games
+        for kind, kwargs in chart_calls:
+            seconds = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                engine.plot_functions[kind](**kwargs, context=context)
+                seconds.append(time.perf_counter() - start)
+            report.seconds[kwargs["json_name"]][engine.name] = min(seconds)
+            chart_name = context.get_chart_path(kwargs["json_name"])
+            charts[kwargs["json_name"]][engine.name] = read_chart_json(
+                f"{chart_name}.gz"
+            )
+
+    for json_name, engine_charts in charts.items():
+        reference = engine_charts[report.reference.name]
+        for engine in engines[1:]:
+            report.differences[json_name][engine.name] = diff_chart_json(
+                reference, engine_charts[engine.name], fit_tolerance, float_tolerance
+            )
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check that chart engines build the same charts as the "
+        "reference, and compare their speed."
+    )
+    data = parser.add_mutually_exclusive_group(required=True)
+    data.add_argument("--seasons", help="Directory of the season files")
+    data.add_argument(
+        "--synthetic",
+        type=int,
+        metavar="GAMES",
+        help="Generate synthetic seasons with this many games per season",
+    )
+    parser.add_argument(
+        "--years",
+        type=int,
+        nargs=2,
+        default=[2017, 2018],
+        help="First and last season year (default: 2017 2018)",
+    )
+    parser.add_argument(
+        "--engine",
+        action="append",
+        default=[],
+        help="Engine to check, as module:attribute (repeatable)",
+    )
+    parser.add_argument("--fit-tolerance", type=float, default=DEFAULT_FIT_TOLERANCE)
+    parser.add_argument(
+        "--float-tolerance", type=float, default=DEFAULT_FLOAT_TOLERANCE
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Builds of each chart to time"
+    )
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args(argv)
+
+    engines = [REFERENCE_ENGINE] + [ChartEngine.load(path) for path in args.engine]
+    chart_calls = get_comparison_chart_calls([tuple(args.years)])
+    with tempfile.TemporaryDirectory() as work_dir:
+        json_base_path = args.seasons
+        if json_base_path is None:
+            from .form_nba_chart_json_data_synthetic_seasons import (
+                write_synthetic_seasons,
+            )
+
+            json_base_path = os.path.join(work_dir, "seasons")
+            write_synthetic_seasons(
+                json_base_path,
+                args.years[0],
+                season_count=args.years[1] - args.years[0] + 1,
+                games_per_season=args.synthetic,
+            )
+        report = run_equivalence(
+            chart_calls,
+            json_base_path,
+            engines,
+            os.path.join(work_dir, "charts"),
+            fit_tolerance=args.fit_tolerance,
+            float_tolerance=args.float_tolerance,
+            repeat=args.repeat,
+        )
+
+    report.print_summary()
+    if args.json:
+        with open(args.json, "w") as fileobj:
+            json.dump(report.to_json(), fileobj, indent=4)
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+# form_nba_chart_json_data_fit_cache.py
+"""
+Persistent cache of the probit maximum likelihood fits of chart lines.
+
+Every PointsDownLine ends with a scipy fit of the games up to its fit
+window, which is most of the cost of rebuilding a chart. The fit only
+depends on the (margin, wins, losses) counts in the window and the link
+function, so a FitCache attached to the ChartContext stores each fit's m, b
+and diagnostics under a hash of those inputs. A rebuilt chart whose games
+did not change (e.g. after --force, or after a template change) then skips
+the optimization entirely, and the cached values are exactly the ones the
+fit returned.
+
+The starting estimates are left out of the key: they only move where the
+optimizer stops within its tolerance, and keying on them would make every
+fit warm started from the line of the neighboring time (see
+plot_percent_versus_time) miss.
+
+Entries are small JSON files in a directory, written atomically, so worker
+processes can share one cache. Reading an entry marks it as recently used,
+and prune removes the least recently used entries beyond max_entries, after
+a chart spec build or when a process first uses the NBACC_FIT_CACHE cache.
+
+The cache is enabled by the "fit_cache" directory of a chart spec, or for
+the page scripts by the NBACC_FIT_CACHE environment variable.
+"""
+
+# Standard library imports
+import hashlib
+import json
+import os
+import tempfile
+
+# Part of every key: change it when the fit itself changes, so old fits are unused
+FIT_CACHE_VERSION = 2
+
+DEFAULT_MAX_ENTRIES = 20000
+
+_environment_fit_cache = None
+
+
+def get_fit_key(point_margin_counts, max_fit_point, model):
+    """
+    Hash the inputs of a fit.
+
+    Parameters:
+    -----------
+    point_margin_counts : list of tuples
+        (point_margin, win_count, loss_count) of every margin in the fit window
+    max_fit_point : float
+        Last point margin of the fit window
+    model : str
+        Link function, the chart context's y axis ('probit', 'logit' or
+        'linear')
+
+    Returns:
+    --------
+    str
+        Hex digest identifying the fit
+    """
+    key_data = [
+        FIT_CACHE_VERSION,
+        model,
+        float(max_fit_point),
+        [[int(value) for value in counts] for counts in point_margin_counts],
+    ]
+    return hashlib.sha256(json.dumps(key_data).encode("utf-8")).hexdigest()
+
+
+class FitCache:
+    """
+    Directory of fit results keyed by get_fit_key.
+
+    Usage:
+        context = ChartContext(json_base_path, fit_cache=FitCache("fit_cache"))
+    """
+
+    def __init__(self, cache_dir, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Parameters:
+        -----------
+        cache_dir : str
+            Directory of the cache entries, created when the first one is
+            written
+        max_entries : int
+            Number of entries prune keeps
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_entries = max_entries
+        # Lookups in this process
+        self.hits = 0
+        self.misses = 0
+
+    def get_filename(self, key):
+        # Two character subdirectories keep the directories small
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """
+        Get a cached fit.
+
+        Parameters:
+        -----------
+        key : str
+            Key from get_fit_key
+
+        Returns:
+        --------
+        dict or None
+            The fit result, or None if it is not cached
+        """
+        filename = self.get_filename(key)
+        try:
+            with open(filename, "r") as fileobj:
+                entry = json.load(fileobj)
+            # The modification time is the last use, for prune
+            os.utime(filename)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if entry.get("version") != FIT_CACHE_VERSION:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["fit"]
+
+    def put(self, key, fit):
+        """
+        Store a fit.
+
+        Parameters:
+        -----------
+        key : str
+            Key from get_fit_key
+        fit : dict
+            Fit result of Num.fit_it_mle
+        """
+        filename = self.get_filename(key)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        entry = {
+            "version": FIT_CACHE_VERSION,
+            "fit": {
+                name: value.item() if hasattr(value, "item") else value
+                for name, value in fit.items()
+            },
+        }
+        # Written to a temporary file and renamed, so readers in other
+        # processes never see a partial entry
+        fileno, temp_filename = tempfile.mkstemp(
+            dir=os.path.dirname(filename), suffix=".tmp"
+        )
+        with os.fdopen(fileno, "w") as fileobj:
+            json.dump(entry, fileobj)
+        os.replace(temp_filename, filename)
+
+    def get_entries(self):
+        """Get the (last use time, filename) of every entry."""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for subdir in os.scandir(self.cache_dir):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if entry.name.endswith(".json"):
+                    entries.append((entry.stat().st_mtime, entry.path))
+        return entries
+
+    def prune(self):
+        """
+        Remove the least recently used entries beyond max_entries.
+
+        Returns:
+        --------
+        int
+            Number of removed entries
+        """
+        entries = self.get_entries()
+        if len(entries) <= self.max_entries:
+            return 0
+        entries.sort()
+        removed_count = 0
+        for _, filename in entries[: len(entries) - self.max_entries]:
+            try:
+                os.remove(filename)
+                removed_count += 1
+            except OSError:
+                pass
+        return removed_count
+
+
+def get_environment_fit_cache():
+    """
+    Get the process fit cache configured by the NBACC_FIT_CACHE variable.
+
+    The page scripts have no build step after their charts to prune the
+    cache, as run_chart_spec does, so it is pruned when this process first
+    uses it.
+
+    Returns:
+    --------
+    FitCache or None
+        Cache in the NBACC_FIT_CACHE directory, or None if it is not set
+    """
+    global _environment_fit_cache
+    cache_dir = os.environ.get("NBACC_FIT_CACHE") or None
+    if cache_dir is None:
+        return None
+    if _environment_fit_cache is None or (
+        _environment_fit_cache.cache_dir != os.path.abspath(cache_dir)
+    ):
+        _environment_fit_cache = FitCache(cache_dir)
+        _environment_fit_cache.prune()
+    return _environment_fit_cache
@@ -0,0 +1,127 @@
+# form_nba_chart_json_data_isotonic.py
+"""
+Monotone (isotonic) smoothing of empirical win percents.
+
+The win percent of a PointsDownLine should not fall as the point margin
+rises, but the empirical percents of sparse margins often do. The weighted
+isotonic regression of the percents, with each margin weighted by its game
+count, is the closest non-decreasing curve to them. Pool adjacent violators
+finds it in one pass: each margin is pushed on a stack of blocks, and while
+the top block's percent is below the one under it the two are merged into
+their weighted mean. Every block is pushed once and merged at most once, so
+the pass is O(n).
+
+An IsotonicCurve interpolates the smoothed percents linearly between the
+margins, which keeps it monotone, so it also answers win percent lookups
+without the probit fit.
+"""
+
+# Third-party imports
+import numpy as np
+
+
+def pool_adjacent_violators(values, weights):
+    """
+    Weighted non-decreasing isotonic regression.
+
+    Parameters:
+    -----------
+    values : array-like
+        Values in x order
+    weights : array-like
+        Positive weight of each value
+
+    Returns:
+    --------
+    numpy.ndarray
+        The non-decreasing values minimizing the weighted squared error
+    """
+    # Blocks of pooled values: their mean, total weight and number of values
+    means = []
+    block_weights = []
+    sizes = []
+    for value, weight in zip(values, weights):
+        mean = float(value)
+        weight = float(weight)
+        size = 1
+        while means and means[-1] > mean:
+            previous_weight = block_weights.pop()
+            mean = (means.pop() * previous_weight + mean * weight) / (
+                previous_weight + weight
+            )
+            weight += previous_weight
+            size += sizes.pop()
+        means.append(mean)
+        block_weights.append(weight)
+        sizes.append(size)
+    return np.repeat(means, sizes)
+
+
+class IsotonicCurve:
+    """
+    Non-decreasing win percent curve over point margins.
+
+    Usage:
+        curve = IsotonicCurve.from_counts(margins, win_counts, loss_counts)
+        curve.percent_at([-12, -5.5])
+    """
+
+    def __init__(self, point_margins, percents, game_counts):
+        """
+        Parameters:
+        -----------
+        point_margins : array-like
+            Increasing point margins
+        percents : array-like
+            Smoothed (non-decreasing) win percent at each margin, 0-1
+        game_counts : array-like
+            Number of games at each margin
+        """
+        self.point_margins = np.asarray(point_margins, dtype=float)
+        self.percents = np.asarray(percents, dtype=float)
+        self.game_counts = np.asarray(game_counts, dtype=float)
+
+    @classmethod
+    def from_counts(cls, point_margins, win_counts, loss_counts):
+        """
+        Smooth the win percents of aggregated counts.
+
+        Parameters:
+        -----------
+        point_margins : array-like
+            Increasing point margins
+        win_counts, loss_counts : array-like
+            Wins and losses at each margin; margins without games are skipped
+
+        Returns:
+        --------
+        IsotonicCurve
+        """
+        point_margins = np.asarray(point_margins, dtype=float)
+        win_counts = np.asarray(win_counts, dtype=float)
+        game_counts = win_counts + np.asarray(loss_counts, dtype=float)
+        has_games = game_counts > 0
+        point_margins = point_margins[has_games]
+        win_counts = win_counts[has_games]
+        game_counts = game_counts[has_games]
+        percents = pool_adjacent_violators(win_counts / game_counts, game_counts)
+        return cls(point_margins, percents, game_counts)
+
+    def percent_at(self, margins):
+        """
+        Look up the smoothed win percent at point margins.
+
+        Margins between the curve's margins are interpolated linearly, and
+        margins beyond its ends get the end percents.
+
+        Parameters:
+        -----------
+        margins : float or array-like
+            Point margins
+
+        Returns:
+        --------
+        float or numpy.ndarray
+            Win percents, 0-1
+        """
+        return np.interp(margins, self.point_margins, self.percents)
@@ -0,0 +1,382 @@
+# form_nba_chart_json_data_lookup_cube.py
+"""
+Precomputed win probability lookup cube for NBA game data.
+
+This module materializes, for a set of eras and standard game filters, the
+win/loss counts at every point margin and GAME_MINUTES time point, along with
+the fitted probit parameters (m, b) at each time. The cube is stored as a
+compressed NumPy archive so that batches of (time, margin, filter) questions
+can be answered with array indexing, without loading any season files.
+"""
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from .form_nba_chart_json_data_season_game_loader import (
+    GAME_MINUTES,
+    TIME_TO_INDEX_MAP,
+    Games,
+)
+from .form_nba_chart_json_data_plot_primitives import PointsDownLine
+from .form_nba_chart_json_data_api import GameFilter, parse_season_type
+from .form_nba_chart_json_data_context import get_chart_context
+
+# Eras used across the generated plot pages
+STANDARD_ERAS = [
+    (1996, 2024),
+    (1996, 2016),
+    (2017, 2024),
+    (1996, 2006),
+    (2007, 2016),
+    (2017, 2020),
+    (2021, 2024),
+]
+
+# Point margin ending the fit window of the cube's lines
+FIT_MAX_POINT = -1
+
+
+def get_standard_game_filters():
+    """
+    Get the standard named game filters stored in the cube.
+
+    Returns:
+    --------
+    dict
+        Mapping of filter name to GameFilter
+    """
+    return {
+        "all": GameFilter(),
+        "home": GameFilter(for_at_home=True),
+        "away": GameFilter(for_at_home=False),
+        "top_5_v_bot_5": GameFilter(for_rank="top_5", vs_rank="bot_5"),
+        "bot_5_v_top_5": GameFilter(for_rank="bot_5", vs_rank="top_5"),
+        "top_10_v_bot_10": GameFilter(for_rank="top_10", vs_rank="bot_10"),
+        "bot_10_v_top_10": GameFilter(for_rank="bot_10", vs_rank="top_10"),
+        "top_10_v_mid_10": GameFilter(for_rank="top_10", vs_rank="mid_10"),
+        "mid_10_v_top_10": GameFilter(for_rank="mid_10", vs_rank="top_10"),
+        "bot_10_v_mid_10": GameFilter(for_rank="bot_10", vs_rank="mid_10"),
+        "mid_10_v_bot_10": GameFilter(for_rank="mid_10", vs_rank="bot_10"),
+    }
+
+
+def has_fit_window(point_margin_map, max_fit_point=FIT_MAX_POINT):
+    """
+    Check whether a line has enough point margins to be fit up to max_fit_point.
+
+    PointsDownLine keeps one all-loss margin below the first margin with a
+    win and one all-win margin above the last margin with a loss, folding the
+    margins beyond them into those ends. The fit then needs max_fit_point
+    among the margins that remain, and at least three of them, which there
+    are not at tip-off or for very sparse filters.
+
+    Parameters:
+    -----------
+    point_margin_map : dict
+        Mapping of point margin to PointMarginPercent, see get_point_margin_map
+    max_fit_point : int
+        Point margin ending the fit window
+
+    Returns:
+    --------
+    bool
+    """
+    point_margins = sorted(point_margin_map)
+    win_indices = [
+        index
+        for index, margin in enumerate(point_margins)
+        if point_margin_map[margin].wins
+    ]
+    loss_indices = [
+        index
+        for index, margin in enumerate(point_margins)
+        if point_margin_map[margin].losses
+    ]
+    if not win_indices or not loss_indices:
+        return False
+    fit_point_margins = point_margins[max(win_indices[0] - 1, 0) : loss_indices[-1] + 2]
+    return max_fit_point in fit_point_margins and len(fit_point_margins) >= 3
+
+
+def get_era_name(era):
+    """Format an era (start_year, stop_year) tuple as a cube key, e.g. '2017-2024'."""
+    start_year, stop_year = era
+    return f"{start_year}-{stop_year}"
+
+
+class WinProbabilityCube:
+    """
+    Win/loss counts and fitted probit lines by era, filter, time and margin.
+
+    The counts array has shape (eras, filters, times, margins, 2) where the
+    last axis holds (win_count, loss_count) for the "for" team at that point
+    margin. Margins beyond +/- max_margin are folded into the end bins.
+    The m and b arrays have shape (eras, filters, times) and hold NaN where no
+    line could be fit (e.g. at tip-off, or for very sparse filters, see
+    has_fit_window).
+    """
+
+    def __init__(self, counts, m, b, era_names, filter_names, min_margin):
+        """
+        Initialize the cube from its arrays.
+
+        Parameters:
+        -----------
+        counts : numpy.ndarray
+            Win/loss counts with shape (eras, filters, times, margins, 2)
+        m : numpy.ndarray
+            Fitted slopes with shape (eras, filters, times)
+        b : numpy.ndarray
+            Fitted intercepts with shape (eras, filters, times)
+        era_names : list of str
+            Era keys as formed by get_era_name
+        filter_names : list of str
+            Game filter names
+        min_margin : int
+            Point margin of the first margin bin
+        """
+        self.counts = counts
+        self.m = m
+        self.b = b
+        self.era_names = [str(name) for name in era_names]
+        self.filter_names = [str(name) for name in filter_names]
+        self.min_margin = int(min_margin)
+        self.max_margin = self.min_margin + counts.shape[3] - 1
+
+        self.era_index_map = {name: i for i, name in enumerate(self.era_names)}
+        self.filter_index_map = {name: i for i, name in enumerate(self.filter_names)}
+
+        # Accept time points either as GAME_MINUTES values or their strings
+        self.time_index_map = dict(TIME_TO_INDEX_MAP)
+        self.time_index_map.update(
+            {str(time): index for time, index in TIME_TO_INDEX_MAP.items()}
+        )
+
+    @classmethod
+    def build(cls, eras=None, game_filters=None, max_margin=60, context=None):
+        """
+        Build a cube by analyzing the season data for each era and filter.
+
+        Parameters:
+        -----------
+        eras : list of tuples or None
+            List of (start_year, stop_year) ranges, defaults to STANDARD_ERAS
+        game_filters : dict or None
+            Mapping of filter name to GameFilter, defaults to the standard filters
+        max_margin : int
+            Largest absolute point margin stored in its own bin
+        context : ChartContext or None
+            Context the seasons are loaded through, see get_chart_context; the
+            lines are fit with the probit link whatever its y axis
+
+        Returns:
+        --------
+        WinProbabilityCube
+        """
+        eras = STANDARD_ERAS if eras is None else eras
+        if game_filters is None:
+            game_filters = get_standard_game_filters()
+
+        margin_count = 2 * max_margin + 1
+        shape = (len(eras), len(game_filters), len(GAME_MINUTES))
+        counts = np.zeros(shape + (margin_count, 2), dtype=np.int32)
+        m = np.full(shape, np.nan)
+        b = np.full(shape, np.nan)
+
+        # The fits use the probit link whatever the ambient chart's y axis,
+        # as lookup and margins_at_percents do
+        context = get_chart_context(context).for_chart("probit")
+        with context.activate():
+            for era_index, (start_year, stop_year) in enumerate(eras):
+                start_year_numeric, season_type = parse_season_type(start_year)
+                stop_year_numeric, _ = parse_season_type(stop_year)
+                games = Games.get_games(
+                    start_year=start_year_numeric,
+                    stop_year=stop_year_numeric,
+                    season_type=season_type,
+                    context=context,
+                )
+                for filter_index, game_filter in enumerate(game_filters.values()):
+                    for time_index, time in enumerate(GAME_MINUTES):
+                        point_margin_map = PointsDownLine.get_point_margin_map(
+                            games, game_filter, time, "at"
+                        )
+                        for point_margin, data in point_margin_map.items():
+                            margin_index = int(
+                                min(max(point_margin, -max_margin), max_margin)
+                                + max_margin
+                            )
+                            cell = counts[era_index, filter_index, time_index]
+                            cell[margin_index, 0] += len(data.wins)
+                            cell[margin_index, 1] += len(data.losses)
+
+                        # Same fit settings as plot_percent_versus_time
+                        if not has_fit_window(point_margin_map):
+                            context.count("lookup_cube_skipped_fits")
+                            continue
+                        line = PointsDownLine(
+                            games=games,
+                            game_filter=game_filter,
+                            start_time=time,
+                            down_mode="at",
+                            max_point_margin=-1,
+                            fit_max_points=FIT_MAX_POINT,
+                        )
+                        m[era_index, filter_index, time_index] = line.m
+                        b[era_index, filter_index, time_index] = line.b
+
+        era_names = [get_era_name(era) for era in eras]
+        return cls(counts, m, b, era_names, list(game_filters), -max_margin)
+
+    def save(self, filename):
+        """Save the cube as a compressed NumPy archive."""
+        np.savez_compressed(
+            filename,
+            counts=self.counts,
+            m=self.m,
+            b=self.b,
+            era_names=np.array(self.era_names),
+            filter_names=np.array(self.filter_names),
+            game_minutes=np.array([str(time) for time in GAME_MINUTES]),
+            min_margin=np.array(self.min_margin),
+        )
+
+    @classmethod
+    def load(cls, filename):
+        """Load a cube written by save."""
+        with np.load(filename, allow_pickle=False) as data:
+            game_minutes = [str(time) for time in GAME_MINUTES]
+            if list(data["game_minutes"]) != game_minutes:
+                raise ValueError(
+                    f"Cube time points do not match GAME_MINUTES: {filename}"
+                )
+            return cls(
+                counts=data["counts"],
+                m=data["m"],
+                b=data["b"],
+                era_names=list(data["era_names"]),
+                filter_names=list(data["filter_names"]),
+                min_margin=int(data["min_margin"]),
+            )
+
+    def get_time_indices(self, times):
+        """Map GAME_MINUTES time points (scalar or sequence) to time indices."""
+        if np.ndim(times) == 0:
+            return np.array(self.time_index_map[times])
+        return np.array(
+            [self.time_index_map[time] for time in np.asarray(times).tolist()],
+            dtype=np.intp,
+        )
+
+    def get_margin_indices(self, margins):
+        """Map point margins to margin bins, folding extremes into the end bins."""
+        margins = np.rint(np.asarray(margins, dtype=float)).astype(np.intp)
+        return np.clip(margins, self.min_margin, self.max_margin) - self.min_margin
+
+    @staticmethod
+    def _get_name_indices(names, index_map):
+        if isinstance(names, str):
+            return np.array(index_map[names])
+        names = np.asarray(names)
+        unique_names, inverse = np.unique(names, return_inverse=True)
+        unique_indices = np.array([index_map[name] for name in unique_names])
+        return unique_indices[inverse].reshape(names.shape)
+
+    def lookup(self, times, margins, game_filter="all", era=None):
+        """
+        Look up win probabilities for a batch of game states.
+
+        All arguments broadcast against each other, so a single filter or era
+        can be combined with arrays of times and margins.
+
+        Parameters:
+        -----------
+        times : int, str or sequence
+            GAME_MINUTES time points (e.g. 6, "45s")
+        margins : int or array-like
+            Point margins from the "for" team's perspective (negative = down)
+        game_filter : str or sequence of str
+            Name(s) of the stored game filters
+        era : str or sequence of str or None
+            Era key(s) as formed by get_era_name, defaults to the first era
+
+        Returns:
+        --------
+        dict
+            Arrays of 'win_count', 'loss_count', 'percent' (empirical, NaN when
+            there are no games) and 'fit_percent' (from the fitted probit
+            line), both win probabilities on a 0-1 scale
+        """
+        from scipy.special import ndtr
+
+        era = self.era_names[0] if era is None else era
+        era_indices = self._get_name_indices(era, self.era_index_map)
+        filter_indices = self._get_name_indices(game_filter, self.filter_index_map)
+        time_indices = self.get_time_indices(times)
+        margin_indices = self.get_margin_indices(margins)
+
+        era_indices, filter_indices, time_indices, margin_indices = np.broadcast_arrays(
+            era_indices, filter_indices, time_indices, margin_indices
+        )
+
+        cells = self.counts[era_indices, filter_indices, time_indices, margin_indices]
+        win_count = cells[..., 0]
+        loss_count = cells[..., 1]
+        total = win_count + loss_count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            percent = np.where(total > 0, win_count / np.maximum(total, 1), np.nan)
+
+        m = self.m[era_indices, filter_indices, time_indices]
+        b = self.b[era_indices, filter_indices, time_indices]
+        # Only the counts are clamped to the cube, the fit line covers every margin
+        with np.errstate(invalid="ignore"):
+            fit_percent = ndtr(m * np.asarray(margins, dtype=float) + b)
+
+        return {
+            "win_count": win_count,
+            "loss_count": loss_count,
+            "percent": percent,
+            "fit_percent": fit_percent,
+        }
+
+    def margins_at_percents(self, times, fit_percents, game_filter="all", era=None):
+        """
+        Find the fitted point margins for a batch of win probabilities.
+
+        This is the inverse of the 'fit_percent' of lookup, on the same 0-1
+        scale.
+
+        Parameters:
+        -----------
+        times : int, str or sequence
+            GAME_MINUTES time points (e.g. 6, "45s")
+        fit_percents : float or array-like
+            Win probabilities on a 0-1 scale
+        game_filter : str or sequence of str
+            Name(s) of the stored game filters
+        era : str or sequence of str or None
+            Era key(s) as formed by get_era_name, defaults to the first era
+
+        Returns:
+        --------
+        dict
+            Arrays of 'margin' (fitted, NaN where no line was fit) plus the
+            lookup results at the nearest whole point margin
+        """
+        from scipy.special import ndtri
+
+        era = self.era_names[0] if era is None else era
+        era_indices = self._get_name_indices(era, self.era_index_map)
+        filter_indices = self._get_name_indices(game_filter, self.filter_index_map)
+        time_indices = self.get_time_indices(times)
+
+        m = self.m[era_indices, filter_indices, time_indices]
+        b = self.b[era_indices, filter_indices, time_indices]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            margins = (ndtri(np.asarray(fit_percents, dtype=float)) - b) / m
+
+        nearest_margins = np.where(np.isnan(margins), self.min_margin, margins)
+        result = self.lookup(times, nearest_margins, game_filter, era)
+        result["margin"] = margins
+        return result
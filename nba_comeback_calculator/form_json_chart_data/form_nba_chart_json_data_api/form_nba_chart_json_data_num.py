@@ -5,24 +5,82 @@ Numerical operations module for NBA chart data analysis.
 This module provides a wrapper around numpy and scipy functionality used for
 statistical analysis of NBA game data. It includes methods for array operations,
 regression, probability calculations, and various mathematical functions.
-"""
 
-import random as random_lib
+scipy is imported by the methods that use it, since importing it takes far
+longer than anything a cached or up to date build does.
+"""
 
 # Third-party imports
 import numpy as np
-from scipy import optimize
-from scipy.special import logit, expit
-from scipy.stats import norm
+
+# Local imports
+from .form_nba_chart_json_data_context import get_chart_context
 
 np.seterr(all="raise")  # Make all numpy warnings raise errors
 
 
-class Num:
-    norm = norm()
+def get_probit_functions():
+    # The standard normal CDF and PPF, as computed by scipy.stats.norm
+    from scipy.special import ndtr, ndtri
+
+    return ndtr, ndtri
+
+
+def get_logit_functions():
+    from scipy.special import expit, logit
+
+    return expit, logit
+
 
-    random = random_lib
+def get_linear_functions():
+    # np.positive is the identity as a ufunc, so it returns the same types
+    return np.positive, np.positive
+
+
+class ProbabilityTransform:
+    """
+    Maps a y axis between fit values and probabilities.
+
+    cdf and ppf are ufuncs: they take a scalar or a whole array, so a line's
+    values are transformed in one call rather than one call per value. scipy
+    is only imported when a transform is first used.
+    """
+
+    def __init__(self, name, get_functions):
+        """
+        Parameters:
+        -----------
+        name : str
+            Y axis name
+        get_functions : callable
+            Returns the (cdf, ppf) ufuncs
+        """
+        self.name = name
+        self.get_functions = get_functions
+        self.functions = None
 
+    def cdf(self, x):
+        """Map fit values to probabilities."""
+        if self.functions is None:
+            self.functions = self.get_functions()
+        return self.functions[0](x)
+
+    def ppf(self, p):
+        """Map probabilities to fit values (the inverse of cdf)."""
+        if self.functions is None:
+            self.functions = self.get_functions()
+        return self.functions[1](p)
+
+
+# Y axis name (see ChartContext.set_y_axis) to its transform
+PROBABILITY_TRANSFORMS = {
+    "probit": ProbabilityTransform("probit", get_probit_functions),
+    "logit": ProbabilityTransform("logit", get_logit_functions),
+    "linear": ProbabilityTransform("linear", get_linear_functions),
+}
+
+
+class Num:
     @staticmethod
     def array(x):
         """Convert input to numpy array."""
@@ -33,6 +91,16 @@ class Num:
         """Create array of ones with same shape as x."""
         return np.ones_like(x)
 
+    @staticmethod
+    def zeros_like(x):
+        """Create array of zeros with same shape as x."""
+        return np.zeros_like(x)
+
+    @staticmethod
+    def searchsorted(a, v):
+        """Find indices where elements of v should be inserted into sorted a."""
+        return np.searchsorted(a, v)
+
     @staticmethod
     def column_stack(arrays):
         """Stack 1-D arrays as columns."""
@@ -94,25 +162,45 @@ class Num:
         return np.floor(x)
 
     @staticmethod
-    def minimize(fun, x0, args=()):
-        """Minimize a function."""
-        return optimize.minimize(fun, x0, args=args)
+    def isfinite(x):
+        """Test for values that are neither infinite nor NaN."""
+        return np.isfinite(x)
 
     @staticmethod
-    def CDF(x):
-        """Compute normal CDF."""
-        # from scipy.special import expit
+    def minimize(fun, x0, args=(), jac=None):
+        """Minimize a function (jac=True if fun also returns the gradient)."""
+        from scipy import optimize
 
-        # return expit(x)
-        return Num.norm.cdf(x)
+        return optimize.minimize(fun, x0, args=args, jac=jac)
 
     @staticmethod
-    def PPF(x):
-        """Compute normal PPF."""
-        # from scipy.special import logit
+    def transform(y_axis=None):
+        """
+        Get the ProbabilityTransform of a y axis.
+
+        Parameters:
+        -----------
+        y_axis : str or None
+            'probit', 'logit' or 'linear'; None for the chart context's y axis
 
-        # return logit(x)
-        return Num.norm.ppf(x)
+        Returns:
+        --------
+        ProbabilityTransform
+            Transform whose cdf and ppf apply to whole arrays
+        """
+        if y_axis is None:
+            y_axis = get_chart_context().y_axis
+        return PROBABILITY_TRANSFORMS[y_axis]
+
+    @staticmethod
+    def CDF(x):
+        """Compute the CDF of the chart context's y axis (normal by default)."""
+        return Num.transform().cdf(x)
+
+    @staticmethod
+    def PPF(x):
+        """Compute the PPF of the chart context's y axis (normal by default)."""
+        return Num.transform().ppf(x)
 
     @staticmethod
     def power(x, p):
@@ -187,7 +275,9 @@ class Num:
         Returns:
         --------
         dict
-            Dictionary containing model parameters and fit statistics
+            Dictionary containing model parameters m and b, and the fit
+            diagnostics neg_log_likelihood, iterations, function_evaluations
+            and converged
         """
         initial_params = Num.array([m_est, b_est])
 
@@ -202,8 +292,84 @@ class Num:
         return {
             "m": params_opt[0],
             "b": params_opt[1],
+            "neg_log_likelihood": float(result["fun"]),
+            "iterations": int(result["nit"]),
+            "function_evaluations": int(result["nfev"]),
+            "converged": bool(result["success"]),
         }
 
+    @staticmethod
+    def wilson_interval(win_counts, trial_counts, level=0.95):
+        """
+        Wilson score intervals of binomial proportions, for whole arrays.
+
+        Parameters:
+        -----------
+        win_counts, trial_counts : array-like
+            Successes and trials of each proportion
+        level : float
+            Confidence level
+
+        Returns:
+        --------
+        tuple
+            (lower, upper) arrays; [0, 1] where there are no trials
+        """
+        from scipy.special import ndtri
+
+        k = np.asarray(win_counts, dtype=float)
+        n = np.asarray(trial_counts, dtype=float)
+        n_safe = np.where(n > 0, n, 1.0)
+        z = ndtri(1.0 - (1.0 - level) / 2.0)
+        denominator = n_safe + z * z
+        center = (k + z * z / 2.0) / denominator
+        half_width = z / denominator * np.sqrt(k * (n_safe - k) / n_safe + z * z / 4.0)
+        # The bounds are exactly 0 with no wins and 1 with no losses
+        lower = np.where(k > 0, np.maximum(center - half_width, 0.0), 0.0)
+        upper = np.where(k < n, np.minimum(center + half_width, 1.0), 1.0)
+        return lower, upper
+
+    @staticmethod
+    def clopper_pearson_interval(win_counts, trial_counts, level=0.95):
+        """
+        Clopper-Pearson (exact) intervals of binomial proportions, for whole arrays.
+
+        The bounds are beta distribution quantiles, computed with one
+        betaincinv call per bound over all the proportions.
+
+        Parameters:
+        -----------
+        win_counts, trial_counts : array-like
+            Successes and trials of each proportion
+        level : float
+            Confidence level
+
+        Returns:
+        --------
+        tuple
+            (lower, upper) arrays; [0, 1] where there are no trials
+        """
+        from scipy.special import betaincinv
+
+        k = np.asarray(win_counts, dtype=float)
+        n = np.asarray(trial_counts, dtype=float)
+        alpha = 1.0 - level
+        # The beta parameters must be positive; the bounds at k = 0 and k = n
+        # are 0 and 1, so those points get placeholder parameters
+        has_lower = k > 0
+        has_upper = k < n
+        lower = betaincinv(
+            np.where(has_lower, k, 1.0),
+            np.where(has_lower, n - k + 1.0, 1.0),
+            alpha / 2.0,
+        )
+        upper = betaincinv(
+            np.where(has_upper, k + 1.0, 1.0),
+            np.where(has_upper, n - k, 1.0),
+            1.0 - alpha / 2.0,
+        )
+        return np.where(has_lower, lower, 0.0), np.where(has_upper, upper, 1.0)
+
     @staticmethod
     def probit_neg_log_likelihood(params, X, Y, model):
         """
@@ -232,6 +398,8 @@ class Num:
 
         # Calculate probabilities using normal CDF
         if model == "logit":
+            from scipy.special import expit
+
             prob = expit(z)
         elif model == "probit":
             prob = Num.CDF(z)
@@ -0,0 +1,268 @@
+# form_nba_chart_json_data_permutation_test.py
+"""
+Permutation test of the difference between the fit lines of two groups.
+
+Charts like the old school versus modern pages draw two lines, one per era
+or GameFilter, side by side. The test asks whether their fitted win
+probability curves differ by more than the luck of which games fell in which
+group would explain. Under the null hypothesis the group labels of the games
+are exchangeable, so:
+
+1. the two lines' (margin, outcome) counts over a common fit window are
+   pooled,
+2. each permutation deals the pooled entries back out to groups of the
+   original sizes and refits both groups,
+3. the p-value is the share of permutations whose statistic is at least the
+   observed one, (1 + hits) / (1 + permutations).
+
+The statistic is the largest absolute difference of the two fitted win
+probabilities over the margins of the common window, which ends at the lower
+of the two lines' fit window ends.
+
+Entries in the same (margin, outcome) cell are interchangeable, so dealing
+out a random permutation of the labels is a multivariate hypergeometric draw
+of the first group's cell counts from the pooled cells. All the draws of a
+chunk of permutations are one array, refit together by the batch Fisher
+scoring of fit_probit_counts. Chunks are seeded from the counts by
+SeedSequence.spawn, so the p-value does not depend on how many workers ran
+them, and spread over a process pool when there are several.
+
+The groups are refit with the link of the lines' fits, the chart's y axis
+(probit or logit, see get_link_functions).
+
+Like the fits, the test treats the entries as independent: for cumulated
+("or more") lines, where a game counts at several margins, or for groups
+that share games, the p-value is smaller than it should be.
+"""
+
+# Standard library imports
+import multiprocessing
+import os
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from .form_nba_chart_json_data_bootstrap import (
+    fit_probit_counts,
+    get_bootstrap_seed,
+    get_link_functions,
+)
+from .form_nba_chart_json_data_context import (
+    get_chart_context,
+    get_pool_context,
+    profiled,
+)
+
+# Options of a permutation test and their defaults; workers None uses every CPU
+DEFAULT_PERMUTATION_TEST = {"permutations": 10000, "workers": None}
+
+# Permutations drawn and refit as one array, the unit of work of the pool
+PERMUTATION_CHUNK_SIZE = 1000
+
+
+def get_permutation_test_options(permutation_test):
+    """
+    Resolve the permutation_test argument of a plot function.
+
+    Parameters:
+    -----------
+    permutation_test : bool, dict or None
+        None or False for no test, True for the DEFAULT_PERMUTATION_TEST
+        options, or a dict overriding some of them
+
+    Returns:
+    --------
+    dict or None
+        Complete options, or None for no test
+    """
+    if not permutation_test:
+        return None
+    if permutation_test is True:
+        return dict(DEFAULT_PERMUTATION_TEST)
+    unknown_options = set(permutation_test) - set(DEFAULT_PERMUTATION_TEST)
+    if unknown_options:
+        raise ValueError(f"Unknown permutation test options: {sorted(unknown_options)}")
+    options = dict(DEFAULT_PERMUTATION_TEST, **permutation_test)
+    if options["permutations"] < 1:
+        raise ValueError(
+            f"Permutation count must be positive: {options['permutations']}"
+        )
+    return options
+
+
+def get_common_counts(lines):
+    """
+    Counts of two lines over their common fit window.
+
+    Parameters:
+    -----------
+    lines : list of PointsDownLine
+        The two fitted lines
+
+    Returns:
+    --------
+    tuple
+        (margins, win_counts, loss_counts); the counts are arrays of shape
+        (2, margins)
+    """
+    max_fit_point = min(line.fit_point_margin_counts[-1][0] for line in lines)
+    margins = sorted(
+        {
+            point_margin
+            for line in lines
+            for point_margin in line.point_margin_map
+            if point_margin <= max_fit_point
+        }
+    )
+    win_counts = np.zeros((len(lines), len(margins)))
+    loss_counts = np.zeros((len(lines), len(margins)))
+    for line_index, line in enumerate(lines):
+        for margin_index, point_margin in enumerate(margins):
+            data = line.point_margin_map.get(point_margin)
+            if data is not None:
+                win_counts[line_index, margin_index] = len(data.wins)
+                loss_counts[line_index, margin_index] = len(data.losses)
+    return np.array(margins, dtype=float), win_counts, loss_counts
+
+
+def get_fit_difference(margins, fits, other_fits, link="probit"):
+    """Largest absolute difference of the fitted win probabilities."""
+    _, cdf, _ = get_link_functions(link)
+    lines = fits["m"][:, None] * margins + fits["b"][:, None]
+    other_lines = other_fits["m"][:, None] * margins + other_fits["b"][:, None]
+    return np.abs(cdf(lines) - cdf(other_lines)).max(axis=1)
+
+
+def run_permutation_chunk(
+    margins, cells, group_size, permutations, seed, m, b, link="probit"
+):
+    """
+    Draw and refit a chunk of permutations.
+
+    Parameters:
+    -----------
+    margins : numpy.ndarray
+        Point margins of the common window
+    cells : numpy.ndarray
+        Pooled win counts followed by pooled loss counts at each margin
+    group_size : int
+        Number of entries of the first group
+    permutations : int
+        Number of permutations in the chunk
+    seed : numpy.random.SeedSequence
+        Seed of the chunk's draws
+    m, b : float
+        Starting line of the fits
+    link : str
+        Link of the fits, see get_link_functions
+
+    Returns:
+    --------
+    numpy.ndarray
+        Statistic of each permutation whose fits converged
+    """
+    rng = np.random.default_rng(seed)
+    draws = rng.multivariate_hypergeometric(cells, group_size, size=permutations)
+    other_draws = cells - draws
+    group_fits = []
+    for group_draws in [draws, other_draws]:
+        win_counts = group_draws[:, : len(margins)].astype(float)
+        game_counts = win_counts + group_draws[:, len(margins) :]
+        group_fits.append(
+            fit_probit_counts(margins, win_counts, game_counts, m, b, link)
+        )
+    converged = group_fits[0]["converged"] & group_fits[1]["converged"]
+    statistics = get_fit_difference(margins, *group_fits, link=link)
+    return statistics[converged]
+
+
+def _run_permutation_chunk(args):
+    """Pool entry point of run_permutation_chunk."""
+    return run_permutation_chunk(*args)
+
+
+@profiled("permutation_test")
+def permutation_test_lines(lines, options):
+    """
+    Test whether the fit lines of two groups differ.
+
+    Parameters:
+    -----------
+    lines : list of PointsDownLine
+        The two fitted lines
+    options : dict
+        Options from get_permutation_test_options
+
+    Returns:
+    --------
+    dict
+        Chart JSON "permutation_test": the permutations, the common window, the
+        observed statistic, the number of permutations whose fits converged
+        and the p-value
+    """
+    if len(lines) != 2 or any(line.m is None for line in lines):
+        raise ValueError("A permutation test needs a chart of two fitted lines")
+
+    link = get_chart_context().y_axis
+    margins, win_counts, loss_counts = get_common_counts(lines)
+    game_counts = win_counts + loss_counts
+    observed_fits = [
+        fit_probit_counts(
+            margins, win_counts[[index]], game_counts[[index]], line.m, line.b, link
+        )
+        for index, line in enumerate(lines)
+    ]
+    observed_statistic = float(
+        get_fit_difference(margins, *observed_fits, link=link)[0]
+    )
+
+    # Permutations start from the fit of the pooled counts, the null hypothesis
+    pooled_fit = fit_probit_counts(
+        margins,
+        win_counts.sum(axis=0, keepdims=True),
+        game_counts.sum(axis=0, keepdims=True),
+        lines[0].m,
+        lines[0].b,
+        link,
+    )
+    m, b = pooled_fit["m"][0], pooled_fit["b"][0]
+    if not pooled_fit["converged"][0]:
+        m, b = lines[0].m, lines[0].b
+
+    cells = np.concatenate([win_counts.sum(axis=0), loss_counts.sum(axis=0)])
+    cells = cells.astype(np.int64)
+    group_size = int(game_counts[0].sum())
+    seed = get_bootstrap_seed(
+        np.concatenate([margins[:, None], win_counts.T, loss_counts.T], axis=1)
+    )
+
+    permutations = options["permutations"]
+    chunk_sizes = [PERMUTATION_CHUNK_SIZE] * (permutations // PERMUTATION_CHUNK_SIZE)
+    if permutations % PERMUTATION_CHUNK_SIZE:
+        chunk_sizes.append(permutations % PERMUTATION_CHUNK_SIZE)
+    chunk_seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    chunks = [
+        (margins, cells, group_size, chunk_size, chunk_seed, m, b, link)
+        for chunk_size, chunk_seed in zip(chunk_sizes, chunk_seeds)
+    ]
+
+    workers = min(options["workers"] or os.cpu_count() or 1, len(chunks))
+    # Scheduler workers are daemonic and cannot start a pool of their own
+    if workers <= 1 or multiprocessing.current_process().daemon:
+        chunk_statistics = [_run_permutation_chunk(chunk) for chunk in chunks]
+    else:
+        with get_pool_context().Pool(processes=workers) as pool:
+            chunk_statistics = pool.map(_run_permutation_chunk, chunks)
+    statistics = np.concatenate(chunk_statistics)
+    get_chart_context().count("permutations", permutations)
+
+    hits = int(np.count_nonzero(statistics >= observed_statistic))
+    return dict(
+        permutations=permutations,
+        min_point_margin=float(margins[0]),
+        max_point_margin=float(margins[-1]),
+        statistic=observed_statistic,
+        fit_permutations=len(statistics),
+        p_value=(1 + hits) / (1 + len(statistics)),
+    )
@@ -0,0 +1,387 @@
+# form_nba_chart_json_data_plot_pages.py
+"""
+Chart collection and RST writing for the Sphinx plot pages.
+
+A PlotPages object collects the charts of each page into a ChartJob and,
+once the scheduler has built them, writes the page's RST file from the plot
+function results. The plots page script and the chart spec runner both use
+it, so pages defined either way come out the same.
+"""
+
+# Standard library imports
+import io
+import os
+import re
+
+# Local imports
+from .form_nba_chart_json_data_api import plot_biggest_deficit, plot_percent_versus_time
+from .form_nba_chart_json_data_plot_primitives import GameSummaryTable, write_if_changed
+from .form_nba_chart_json_data_scheduler import ChartJob
+
+# Section titles of the standard comparison page, in page order
+MAX_DOWN_OR_MORE_SECTION = "Max Points Down or More"
+MAX_DOWN_SECTION = "Max Points Down"
+DOWN_AT_TIME_SECTION = "Points Down At Time"
+OCCURS_DOWN_OR_MORE_SECTION = "Occurrence of Max Points Down Or More"
+PERCENT_SECTION = "Percent Chance of Winning: Time Remaining Versus Points Down"
+
+# Chart kinds that can be named in a chart spec
+PLOT_FUNCTIONS = {
+    "biggest_deficit": plot_biggest_deficit,
+    "percent_versus_time": plot_percent_versus_time,
+}
+
+
+def remove_game_count(title):
+    """
+    Remove the game count '(XXXX Games)' from a title, including the preceding space.
+
+    Parameters:
+    -----------
+    title : str
+        The title with potential game count
+
+    Returns:
+    --------
+    str
+        The title with game count removed
+    """
+    return re.sub(r" \(\d+ Games\)", "", title)
+
+
+class PlotPages:
+    """
+    Collects plot pages and writes their RST files.
+
+    Usage:
+        plot_pages = PlotPages(chart_base_path, sphinx_dir)
+        page = plot_pages.collect_comparison_page(page_name, years_groups)
+        scheduler.add(page["job"])
+        results = scheduler.run()
+        plot_pages.write_page_rst(page, results[page_name])
+        plot_pages.write_index_rst()
+    """
+
+    def __init__(self, chart_base_path, sphinx_dir):
+        """
+        Parameters:
+        -----------
+        chart_base_path : str
+            Directory of the chart JSON files, pages are written to its plots
+            subdirectory
+        sphinx_dir : str
+            Directory of the page RST files
+        """
+        self.chart_base_path = os.path.abspath(chart_base_path)
+        self.plots_dir = f"{self.chart_base_path}/plots"
+        self.sphinx_dir = os.path.abspath(sphinx_dir)
+        # Files produced by this run, anything else in the output directories
+        # is stale
+        self.output_files = set()
+        # Pages listed in index.rst
+        self.page_names = []
+
+    def create_page(self, page_name, rst_title=None):
+        """
+        Start a page with an empty chart job.
+
+        Parameters:
+        -----------
+        page_name : str
+            The name of the page, also its chart directory and RST file name
+        rst_title : str, optional
+            The page title. If None, collect_comparison_page's title is used
+            for comparison pages and the first chart title otherwise.
+
+        Returns:
+        --------
+        dict
+            The page, whose charts are added with add_chart
+        """
+        page_dir = f"{self.plots_dir}/{page_name}"
+
+        # Sample games for every chart on the page are stored once in a shared table
+        game_table = GameSummaryTable(f"{page_dir}/game_table.json.gz")
+        return {
+            "page_name": page_name,
+            "page_dir": page_dir,
+            "rst_title": rst_title,
+            "job": ChartJob(page_name, game_table=game_table),
+            # (plot_id, section, custom title or None) of each chart in the job
+            "charts": [],
+        }
+
+    def add_chart(self, page, plot_id, section, plot_function, title=None, **kwargs):
+        """
+        Add a chart to a page.
+
+        Parameters:
+        -----------
+        page : dict
+            The page returned by create_page
+        plot_id : str
+            Chart name, also its JSON file name
+        section : str
+            Title of the page section the chart is listed under
+        plot_function : callable
+            plot_biggest_deficit or plot_percent_versus_time
+        title : str, optional
+            Title used instead of the plot function title
+        **kwargs
+            Arguments of the plot function, except json_name
+        """
+        json_name = f"{page['page_dir']}/{plot_id}.json"
+        page["job"].add(plot_function, json_name=json_name, **kwargs)
+        page["charts"].append((plot_id, section, title))
+
+    def finish_page(self, page):
+        """Register the files of a fully collected page and return it."""
+        self.output_files.update(
+            os.path.abspath(name) for name in page["job"].output_names
+        )
+        return page
+
+    def collect_comparison_page(self, page_name, years_groups, game_filters=None):
+        """
+        Collect the standard comparison charts of a plot page.
+
+        Two year groups without filters compare eras; one year group with
+        filters compares the last two filters.
+
+        Parameters:
+        -----------
+        page_name : str
+            The name of the page to create
+        years_groups : list
+            A list of tuples with (start_year, end_year)
+        game_filters : list, optional
+            A list of GameFilter objects for filtering the games
+
+        Returns:
+        --------
+        dict
+            The page, with its ChartJob under "job"
+        """
+        page = self.create_page(page_name)
+        page["years_groups"] = years_groups
+        page["game_filters"] = game_filters
+
+        # 1. Call plot_biggest_deficit with different parameters
+        for start_time in [48, 24, 12]:
+            self.add_chart(
+                page,
+                f"max_down_or_more_{start_time}",
+                MAX_DOWN_OR_MORE_SECTION,
+                plot_biggest_deficit,
+                year_groups=years_groups,
+                game_filters=game_filters,
+                start_time=start_time,
+                down_mode="max",
+                cumulate=True,
+            )
+
+        for start_time in [48, 24, 12]:
+            self.add_chart(
+                page,
+                f"max_down_{start_time}",
+                MAX_DOWN_SECTION,
+                plot_biggest_deficit,
+                year_groups=years_groups,
+                game_filters=game_filters,
+                start_time=start_time,
+                down_mode="max",
+                cumulate=False,
+            )
+
+        for start_time in [24, 12, 6]:
+            self.add_chart(
+                page,
+                f"down_at_{start_time}",
+                DOWN_AT_TIME_SECTION,
+                plot_biggest_deficit,
+                year_groups=years_groups,
+                game_filters=game_filters,
+                start_time=start_time,
+                down_mode="at",
+                cumulate=False,
+            )
+
+        for start_time in [48, 24, 12]:
+            self.add_chart(
+                page,
+                f"occurs_down_or_more_{start_time}",
+                OCCURS_DOWN_OR_MORE_SECTION,
+                plot_biggest_deficit,
+                year_groups=years_groups,
+                game_filters=game_filters,
+                start_time=start_time,
+                down_mode="max",
+                cumulate=True,
+                calculate_occurrences=True,
+            )
+
+        # 2. Call plot_percent_versus_time
+        # Handle different cases based on input parameters
+        if len(years_groups) == 2 and game_filters is None:
+            # If two year groups and no filters, one plot per year group
+            for index, years_group in enumerate(years_groups):
+                self.add_chart(
+                    page,
+                    f"percent_plot_group_{index}",
+                    PERCENT_SECTION,
+                    plot_percent_versus_time,
+                    year_groups=[years_group],
+                    game_filters=game_filters,
+                    start_time=12,
+                    percents=["20%", "10%", "5%", "1%", "Record"],
+                )
+        elif len(years_groups) == 1 and game_filters is not None:
+            # One plot for each of the last two filters
+            for index, game_filter in enumerate(game_filters[-2:]):
+                self.add_chart(
+                    page,
+                    f"percent_plot_group_{index}",
+                    PERCENT_SECTION,
+                    plot_percent_versus_time,
+                    year_groups=years_groups,
+                    game_filters=[game_filter],
+                    start_time=12,
+                    percents=["20%", "10%", "5%", "1%", "Record"],
+                )
+
+        # 10% and 1% Chance comparison plots using all game filters
+        years_str = " to ".join(
+            [f"{year[0]}-{str(year[0]+1)[2:]}" for year in years_groups]
+        )
+        for percent in [10, 1]:
+            self.add_chart(
+                page,
+                f"percent_plot_{percent}_percent",
+                PERCENT_SECTION,
+                plot_percent_versus_time,
+                title=(
+                    f"{percent}% Chance of Coming Back Deficit Versus Time | {years_str}"
+                ),
+                year_groups=years_groups,
+                game_filters=game_filters,
+                start_time=12,
+                percents=[f"{percent}%"],
+            )
+
+        return self.finish_page(page)
+
+    def get_rst_title(self, page, results):
+        """Get the title of a page from its settings or its first chart's result."""
+        if page["rst_title"] is not None:
+            return page["rst_title"]
+        if "years_groups" not in page:
+            return remove_game_count(results[0][0])
+
+        years_groups = page["years_groups"]
+        game_filters = page["game_filters"]
+        _, game_years_strings, game_filter_strings = results[0]
+        if len(years_groups) > 1 and game_filters is None:
+            # Year group comparison
+            return f"Comeback Plots: {game_years_strings[0]} v. {game_years_strings[1]}"
+        elif len(years_groups) == 1 and game_filters is not None:
+            return f"Comebacks {game_filter_strings[-2]} v. Comebacks {game_filter_strings[-1]}"
+        raise AssertionError
+
+    def write_page_rst(self, page, results):
+        """
+        Write the RST file of a page once its charts are built.
+
+        Charts are listed under their section titles, in the order each
+        section first appears on the page.
+
+        Parameters:
+        -----------
+        page : dict
+            The page returned by collect_comparison_page or finish_page
+        results : list
+            The plot function result of each chart in the page's job
+        """
+        page_name = page["page_name"]
+        rst_title = self.get_rst_title(page, results)
+
+        # Group plots by their section titles
+        sections = {}
+        for (plot_id, section, title), (_, kwargs), result in zip(
+            page["charts"], page["job"].chart_calls, results
+        ):
+            # Remove game count from title
+            clean_title = title if title is not None else remove_game_count(result[0])
+            sections.setdefault(section, []).append(
+                (plot_id, clean_title, kwargs["json_name"])
+            )
+
+        os.makedirs(self.sphinx_dir, exist_ok=True)
+        rst_path = f"{self.sphinx_dir}/{page_name}.rst"
+        with io.StringIO() as f:
+            # Write the page title with asterisks above and below
+            f.write(f"{'*' * len(rst_title)}\n")
+            f.write(f"{rst_title}\n")
+            f.write(f"{'*' * len(rst_title)}\n\n")
+
+            for section_title, plot_data in sections.items():
+                f.write(f"{section_title}\n")
+                f.write(f"{'=' * len(section_title)}\n\n")
+
+                for plot_id, plot_title, plot_json in plot_data:
+                    # Write the subsection title and reference
+                    f.write(f"{plot_title}\n")
+                    f.write(f"{'-' * len(plot_title)}\n\n")
+                    f.write(f".. _{page_name}_{plot_id}:\n\n")
+
+                    # Add the chart div
+                    f.write(".. raw:: html\n\n")
+                    div_id = (
+                        plot_json.split(self.chart_base_path)[-1]
+                        .lstrip("/")
+                        .replace(".json", "")
+                    )
+                    f.write(f'    <div id="{div_id}" class="nbacc-chart"></div>\n\n')
+
+            write_if_changed(rst_path, f.getvalue())
+        self.output_files.add(os.path.abspath(rst_path))
+
+        # Include this page in index.rst
+        self.page_names.append(page_name)
+
+    def write_index_rst(self):
+        """
+        Create an index.rst file in the RST directory listing all pages.
+        """
+        os.makedirs(self.sphinx_dir, exist_ok=True)
+        index_rst_path = f"{self.sphinx_dir}/index.rst"
+        with io.StringIO() as f:
+            f.write("*****\nPlots\n*****\n\n")
+            f.write(".. toctree::\n   :maxdepth: 1\n\n")
+            for page_name in self.page_names:
+                f.write(f"   {page_name}\n")
+            write_if_changed(index_rst_path, f.getvalue())
+        self.output_files.add(os.path.abspath(index_rst_path))
+
+    def remove_stale_files(self, output_dir=None):
+        """
+        Remove files in output_dir that were not produced by this run.
+
+        Parameters:
+        -----------
+        output_dir : str, optional
+            Directory to clean up, along with its subdirectories. By default
+            both the chart plots directory and the RST directory are cleaned.
+        """
+        if output_dir is None:
+            self.remove_stale_files(self.plots_dir)
+            self.remove_stale_files(self.sphinx_dir)
+            return
+
+        for dirpath, dirnames, filenames in os.walk(output_dir, topdown=False):
+            for filename in filenames:
+                path = os.path.abspath(os.path.join(dirpath, filename))
+                if path not in self.output_files:
+                    print(f"Removing stale file: {path}")
+                    os.remove(path)
+            if dirpath != output_dir and not os.listdir(dirpath):
+                os.rmdir(dirpath)
@@ -8,12 +8,347 @@ points, and complete plots that can be serialized to JSON.
 """
 
 # Standard library imports
+import gzip
 import json
 import os
+import tempfile
 
 # Local imports
-from form_nba_chart_json_data_season_game_loader import GAME_MINUTES, TIME_TO_INDEX_MAP
-from form_nba_chart_json_data_num import Num
+from .form_nba_chart_json_data_bootstrap import (
+    bootstrap_probit_fits,
+    get_confidence_band,
+    get_confidence_band_options,
+)
+from .form_nba_chart_json_data_context import get_chart_context, profiled
+from .form_nba_chart_json_data_fit_cache import get_fit_key
+from .form_nba_chart_json_data_isotonic import IsotonicCurve
+from .form_nba_chart_json_data_num import Num
+from .form_nba_chart_json_data_permutation_test import permutation_test_lines
+
+# Chart JSON formats written by FinalPlot.to_json and their format_version
+CHART_JSON_FORMAT_VERSIONS = {"points": 1, "columnar": 2}
+
+# Mode of the files written by write_if_changed, readable by the web server
+WRITTEN_FILE_MODE = 0o644
+
+
+def round_json_floats(json_data, float_digits):
+    """
+    Round every float in a JSON-serializable structure.
+
+    Parameters:
+    -----------
+    json_data : dict, list or scalar
+        Data to round
+    float_digits : int or None
+        Number of decimal digits to keep, None leaves values unchanged
+
+    Returns:
+    --------
+    dict, list or scalar
+        Data with rounded floats
+    """
+    if float_digits is None:
+        return json_data
+    if isinstance(json_data, float):
+        return round(json_data, float_digits)
+    if isinstance(json_data, dict):
+        return {
+            key: round_json_floats(value, float_digits)
+            for key, value in json_data.items()
+        }
+    if isinstance(json_data, (list, tuple)):
+        return [round_json_floats(value, float_digits) for value in json_data]
+    return json_data
+
+
+# Point keys of the binomial intervals added by add_binomial_intervals
+BINOMIAL_INTERVAL_KEYS = (
+    "wilson_lower",
+    "wilson_upper",
+    "clopper_pearson_lower",
+    "clopper_pearson_upper",
+)
+
+
+@profiled("binomial_intervals")
+def add_binomial_intervals(json_lines, level=0.95):
+    """
+    Add the confidence intervals of their win percent to the points of chart lines.
+
+    The win and loss counts of every point of every line are gathered into
+    arrays, so the Wilson and Clopper-Pearson intervals of the whole chart
+    are two vectorized calls. Points without counts (occurrence charts and
+    guide lines) are left unchanged.
+
+    Parameters:
+    -----------
+    json_lines : list of dict
+        Line JSON with "y_values" points, updated in place
+    level : float
+        Confidence level of the intervals
+    """
+    points = [
+        point
+        for line in json_lines
+        for point in line["y_values"]
+        if "win_count" in point and "loss_count" in point
+    ]
+    if not points:
+        return
+    win_counts = Num.array([point["win_count"] for point in points])
+    trial_counts = win_counts + Num.array([point["loss_count"] for point in points])
+    intervals = Num.wilson_interval(win_counts, trial_counts, level) + (
+        Num.clopper_pearson_interval(win_counts, trial_counts, level)
+    )
+    for key, values in zip(BINOMIAL_INTERVAL_KEYS, intervals):
+        for point, value in zip(points, values.tolist()):
+            point[key] = value
+
+
+def to_columnar_chart_json(json_data):
+    """
+    Convert chart JSON from one dict per point to columnar arrays per line.
+
+    Each line's y_values list is replaced by a "columns" dict holding one array
+    per point key, with null where a point does not have that key. Columns
+    that repeat x_values or an earlier column are stored in "column_aliases"
+    instead of being written twice.
+
+    Parameters:
+    -----------
+    json_data : dict
+        Chart JSON in the "points" format
+
+    Returns:
+    --------
+    dict
+        Chart JSON in the "columnar" format
+    """
+    json_data = dict(json_data)
+    json_data["format_version"] = CHART_JSON_FORMAT_VERSIONS["columnar"]
+    lines = json_data.pop("lines")
+    json_data["lines"] = json_lines = []
+    for line in lines:
+        line = dict(line)
+        points = line.pop("y_values")
+        keys = list(dict.fromkeys(key for point in points for key in point))
+        columns = {}
+        column_aliases = {}
+        # Only columns of numbers are compared, since they may hold numpy
+        # scalars which do not compare cleanly against lists of games
+        number_columns = {"x_values": line.get("x_values")}
+        for key in keys:
+            column = [point.get(key) for point in points]
+            if any(isinstance(value, (list, dict)) for value in column):
+                columns[key] = column
+                continue
+            for other_key, other_column in number_columns.items():
+                if column == other_column:
+                    column_aliases[key] = other_key
+                    break
+            else:
+                columns[key] = number_columns[key] = column
+        line["length"] = len(points)
+        line["columns"] = columns
+        if column_aliases:
+            line["column_aliases"] = column_aliases
+        json_lines.append(line)
+    return json_data
+
+
+def from_columnar_chart_json(json_data):
+    """
+    Expand chart JSON in the "columnar" format back to one dict per point.
+
+    Null column entries are treated as keys the point does not have. Chart
+    JSON already in the "points" format is returned unchanged.
+    """
+    if json_data.get("format_version", 1) == CHART_JSON_FORMAT_VERSIONS["points"]:
+        return json_data
+    json_data = dict(json_data)
+    json_data.pop("format_version")
+    lines = json_data.pop("lines")
+    json_data["lines"] = json_lines = []
+    for line in lines:
+        line = dict(line)
+        length = line.pop("length")
+        columns = dict(line.pop("columns"))
+        for key, source in line.pop("column_aliases", {}).items():
+            columns[key] = line[source] if source == "x_values" else columns[source]
+        line["y_values"] = [
+            {
+                key: column[index]
+                for key, column in columns.items()
+                if column[index] is not None
+            }
+            for index in range(length)
+        ]
+        json_lines.append(line)
+    return json_data
+
+
+@profiled("write_output")
+def write_if_changed(filename, text):
+    """
+    Write text to a file, leaving the file untouched if its content is unchanged.
+
+    Files ending with .gz are gzip compressed with a fixed header timestamp,
+    so the same text always produces the same bytes. Unchanged outputs keep
+    their modification time, which lets Sphinx and the browser caches (via
+    Last-Modified) skip them.
+
+    Parameters:
+    -----------
+    filename : str
+        Path of the file to write
+    text : str
+        Content to write
+
+    Returns:
+    --------
+    bool
+        True if the file was written, False if it was already up to date
+    """
+    data = text.encode("utf-8")
+    if filename.endswith(".gz"):
+        data = gzip.compress(data, mtime=0)
+
+    try:
+        with open(filename, "rb") as fileobj:
+            if fileobj.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+
+    # Write to a temporary file first so readers never see a partial file; it
+    # is uniquely named, so concurrent writers of one file do not share it
+    fileno, temp_filename = tempfile.mkstemp(
+        dir=os.path.dirname(filename) or ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fileno, "wb") as fileobj:
+            fileobj.write(data)
+        # mkstemp makes the file readable by its owner only
+        os.chmod(temp_filename, WRITTEN_FILE_MODE)
+        os.replace(temp_filename, filename)
+    except BaseException:
+        os.remove(temp_filename)
+        raise
+    return True
+
+
+def read_json_file(filename):
+    """Read a JSON file, gzip compressed if the name ends with .gz."""
+    if filename.endswith(".gz"):
+        with gzip.open(filename, "rt") as fileobj:
+            return json.load(fileobj)
+    with open(filename, "r") as fileobj:
+        return json.load(fileobj)
+
+
+def read_chart_json(filename):
+    """
+    Read a chart JSON file written by FinalPlot.to_json in either format.
+
+    Game handles are replaced by the records from the chart's game table, so
+    the result matches a chart written without one.
+
+    Returns:
+    --------
+    dict
+        Chart JSON in the "points" format
+    """
+    json_data = from_columnar_chart_json(read_json_file(filename))
+    if "game_table" in json_data:
+        json_data = dict(json_data)
+        table_json = json_data.pop("game_table")
+        if "json_name" in table_json:
+            table_filename = os.path.join(
+                os.path.dirname(filename), table_json["json_name"]
+            )
+            table_json = read_json_file(table_filename)
+        json_data["lines"] = [
+            GameSummaryTable.resolve_line_json(line, table_json["games"])
+            for line in json_data["lines"]
+        ]
+    return json_data
+
+
+class GameSummaryTable:
+    """
+    Deduplicated table of the sample games shown in chart tooltips.
+
+    Chart points refer to games by their integer handle (index) in the table
+    instead of repeating the game record. A table without a json_name is
+    embedded in each chart that uses it; a table with a json_name is shared
+    by several charts (e.g. all charts on a page), which record its path
+    relative to the chart file, and must be written with save().
+    """
+
+    # Point keys that hold sample game lists
+    game_list_keys = ("win_games", "loss_games", "occurred_games", "not_occurred_games")
+
+    def __init__(self, json_name=None):
+        self.json_name = json_name
+        self.games = []
+        self.handles = {}
+
+    def __len__(self):
+        return len(self.games)
+
+    def get_handle(self, game):
+        """Get the handle of a Game, adding it to the table if needed."""
+        handle = self.handles.get(game.game_id)
+        if handle is None:
+            handle = self.handles[game.game_id] = len(self.games)
+            self.games.append(
+                {
+                    "game_id": game.game_id,
+                    "game_date": game.game_date,
+                    "game_summary": game.get_game_summary_json_string(),
+                }
+            )
+        return handle
+
+    def to_chart_json(self, chart_json_name):
+        """The game_table entry written into a chart that uses this table."""
+        if self.json_name is None:
+            return {"games": self.games}
+        table_json_name = self.json_name
+        if not table_json_name.endswith(".gz"):
+            table_json_name = table_json_name + ".gz"
+        return {
+            "json_name": os.path.relpath(
+                table_json_name, os.path.dirname(chart_json_name)
+            )
+        }
+
+    def save(self):
+        """
+        Write a shared table to its json_name (gzip compressed).
+
+        Returns True if the file was written, False if it was unchanged.
+        """
+        os.makedirs(os.path.dirname(self.json_name), exist_ok=True)
+        if not self.json_name.endswith(".gz"):
+            self.json_name = self.json_name + ".gz"
+        json_text = json.dumps({"games": self.games}, separators=(",", ":"))
+        return write_if_changed(self.json_name, json_text)
+
+    @classmethod
+    def resolve_line_json(cls, line, games):
+        """Replace the game handles in a line's points with the game records."""
+        line = dict(line)
+        y_values = []
+        for point in line["y_values"]:
+            point = dict(point)
+            for key in cls.game_list_keys:
+                if key in point:
+                    point[key] = [games[handle] for handle in point[key]]
+            y_values.append(point)
+        line["y_values"] = y_values
+        return line
 
 
 # Define PointMarginPercent class here to avoid circular imports
@@ -42,7 +377,7 @@ class PointMarginPercent:
     def win_plus_loss_count(self):
         return float(len(self.wins) + len(self.losses))
 
-    def to_json(self, games, all_game_ids, calculate_occurrences):
+    def to_json(self, games, all_game_ids, calculate_occurrences, game_table=None):
         number_of_games = len(all_game_ids)
         if not calculate_occurrences:
             json_data = {
@@ -71,11 +406,19 @@ class PointMarginPercent:
 
         for mode in mode_keys:
             game_ids = locals()[f"{mode}_games"]
-            game_sample = Num.random.sample(list(game_ids), min(10, len(game_ids)))
+            # Sort first since set order changes between runs
+            game_sample = get_chart_context().random.sample(
+                sorted(game_ids), min(10, len(game_ids))
+            )
 
             # Create Game objects for the samples
             sorted_games = [games[game_id] for game_id in game_sample]
             sorted_games.sort(key=lambda game: game.game_date)
+            if game_table is not None:
+                json_data[f"{mode}_games"] = [
+                    game_table.get_handle(game) for game in sorted_games
+                ]
+                continue
             json_data[f"{mode}_games"] = [
                 {
                     "game_id": game.game_id,
@@ -106,6 +449,12 @@ class PointsDownLine(PlotLine):
     min_percent = 1 / 10000000000.0
     max_percent = 1.0 - min_percent
 
+    # IsotonicCurve of the win percents, if the line was built with isotonic
+    isotonic_curve = None
+    # ShrinkagePrior of the shrunk win percents, if the line was built with
+    # empirical_bayes
+    shrinkage_prior = None
+
     def __init__(
         self,
         games,
@@ -119,6 +468,10 @@ class PointsDownLine(PlotLine):
         fit_min_win_game_count=None,
         fit_max_points=float("inf"),
         calculate_occurrences=False,
+        fit_start=None,
+        confidence_band=None,
+        isotonic=False,
+        empirical_bayes=False,
     ):
         """
         Initialize a line for analyzing point deficit vs. win probability.
@@ -147,6 +500,20 @@ class PointsDownLine(PlotLine):
             Maximum points to include in regression fit
         calculate_occurrences : bool
             Whether to calculate occurrence percentages instead of win percentages
+        fit_start : tuple or None
+            (m, b) to start the probit fit from instead of the least squares
+            estimate, e.g. the fit of the line at the neighboring start time
+        confidence_band : bool, dict or None
+            Whether to bootstrap a confidence band for the fit line, or the
+            options of the band (see get_confidence_band_options)
+        isotonic : bool
+            Whether to smooth the win percents into a non-decreasing
+            IsotonicCurve, written with the points and used by query_margins
+        empirical_bayes : bool
+            Whether to add the win percents of a filtered line shrunk toward
+            the all-games percents (see Games.get_shrinkage_prior) to the
+            points; the plotted percents and the fit keep the observed counts,
+            and lines of every game (no filter, or GameFilter()) are not shrunk
         """
         self.plot_type = "percent_v_margin"
         self.games = games
@@ -168,7 +535,7 @@ class PointsDownLine(PlotLine):
         if cumulate:
             self.cumulate_point_totals(point_margin_map)
 
-        import form_nba_chart_json_data_season_game_loader as loader
+        from . import form_nba_chart_json_data_season_game_loader as loader
 
         or_less_point_margin, or_more_point_margin = (
             self.clean_point_margin_map_end_points(point_margin_map)
@@ -185,16 +552,29 @@ class PointsDownLine(PlotLine):
         ]
         if calculate_occurrences:
             self.percents = self.occurs
+        elif (
+            empirical_bayes
+            and game_filter is not None
+            and not game_filter.matches_all_games()
+        ):
+            self.shrinkage_prior = games.get_shrinkage_prior(
+                start_time, down_mode, cumulate
+            )
 
         self.percents = [max(self.min_percent, percent) for percent in self.percents]
         self.percents = [min(self.max_percent, percent) for percent in self.percents]
-        self.sigmas = [Num.PPF(percent) for percent in self.percents]
+        self.sigmas = Num.transform().ppf(self.percents).tolist()
 
         fix_max_points = self.fit_regression_lines(
             fit_min_win_game_count,
             fit_max_points,
             calculate_occurrences=calculate_occurrences,
+            fit_start=fit_start,
         )
+        self.confidence_band = get_confidence_band_options(confidence_band)
+        self.bootstrap_fits = None
+        if self.confidence_band is not None and self.m is not None:
+            self.bootstrap_fits = self.bootstrap_fit_line(self.confidence_band)
         if max_point_margin == "auto":
             max_point_margin = fix_max_points + 6
 
@@ -203,6 +583,11 @@ class PointsDownLine(PlotLine):
 
         self.max_point_margin = max_point_margin
 
+        if isotonic and not calculate_occurrences:
+            self.isotonic_curve = IsotonicCurve.from_counts(
+                self.point_margins, self.wins_count, self.losses_count
+            )
+
         self.or_less_point_margin = or_less_point_margin
         self.or_more_point_margin = or_more_point_margin
 
@@ -213,7 +598,13 @@ class PointsDownLine(PlotLine):
             all_game_ids.update(data.losses)
         return all_game_ids
 
+    @profiled("setup_point_margin_map")
     def setup_point_margin_map(self, games, game_filter, start_time, down_mode):
+        """Create the point margin map for this line (see get_point_margin_map)."""
+        return self.get_point_margin_map(games, game_filter, start_time, down_mode)
+
+    @staticmethod
+    def get_point_margin_map(games, game_filter, start_time, down_mode):
         """
         Create a mapping of point margins to win/loss outcomes for analysis.
 
@@ -228,7 +619,9 @@ class PointsDownLine(PlotLine):
         game_filter : GameFilter or None
             Filter to apply to games
         start_time : int or str
-            Time point to start analysis from
+            Time point to start analysis from. Times not in TIME_TO_INDEX_MAP
+            (e.g. "7:30" or 2.25) are answered from the per-second game
+            timelines when the season files include them.
         down_mode : str
             Analysis mode ('at' or 'max')
 
@@ -240,78 +633,32 @@ class PointsDownLine(PlotLine):
         Raises:
         -------
         AssertionError
-            If start_time is not in TIME_TO_INDEX_MAP
+            If start_time is not in TIME_TO_INDEX_MAP and a game has no timeline
         NotImplementedError
             If down_mode is not 'at' or 'max'
         """
-        point_margin_map = {}
-        if start_time not in TIME_TO_INDEX_MAP:
-            raise AssertionError(
-                f"Invalid start_time: {start_time}, not found in TIME_TO_INDEX_MAP"
-            )
+        if game_filter is None:
+            filter_mask_arrays = None
+        else:
+            filter_mask_arrays = games.get_filter_mask_arrays(game_filter)
 
-        for game in games:
-            if down_mode == "at":
-                # Analyze point deficit at the specific time point
-                sign = 1 if game.score_diff > 0 else -1
-                point_margin = game.point_margin_map[start_time]["point_margin"]
-                win_point_margin = sign * point_margin
-                lose_point_margin = -1 * win_point_margin
-
-            elif down_mode == "max":
-                # Analyze maximum point deficit faced during the period
-                point_margin = game.point_margin_map[start_time]["point_margin"]
-                win_point_margin = float("inf")
-                lose_point_margin = float("inf")
-
-                # Determine the range of time to analyze
-                start_index = TIME_TO_INDEX_MAP[start_time]
-                stop_index = TIME_TO_INDEX_MAP[0]  # End of game
-
-                # Find the maximum deficit throughout the period
-                for index in range(start_index, stop_index + 1):
-                    time = GAME_MINUTES[index]
-                    point_margin_data = game.point_margin_map[time]
-
-                    # For first time point, use the current margin
-                    if index == start_index:
-                        min_point_margin = point_margin_data["point_margin"]
-                        max_point_margin = point_margin_data["point_margin"]
-                    else:
-                        # For subsequent time points, use min/max values
-                        min_point_margin = point_margin_data["min_point_margin"]
-                        max_point_margin = point_margin_data["max_point_margin"]
-
-                    if game.score_diff > 0:  # Home team won
-                        win_point_margin = min(min_point_margin, win_point_margin)
-                        lose_point_margin = min(
-                            -1.0 * max_point_margin, lose_point_margin
-                        )
-                    elif game.score_diff < 0:  # Away team won
-                        win_point_margin = min(
-                            -1.0 * max_point_margin, win_point_margin
-                        )
-                        lose_point_margin = min(min_point_margin, lose_point_margin)
-                    else:
-                        raise AssertionError("NBA games can't end in a tie")
-            else:
-                raise NotImplementedError(f"Unsupported down_mode: {down_mode}")
+        # The games are scanned once per (start_time, down_mode) and shared by
+        # every line that uses them
+        point_margin_table = games.get_point_margin_table(start_time, down_mode)
 
-            # Record the outcomes based on the game filter
-            if game_filter is None or game_filter.is_match(game, is_win=True):
-                win_point_margin_percent = point_margin_map.setdefault(
-                    win_point_margin, PointMarginPercent()
-                )
-                win_point_margin_percent.wins.add(game.game_id)
+        point_margin_groups = point_margin_table.get_point_margin_groups(
+            filter_mask_arrays
+        )
 
-            if game_filter is None or game_filter.is_match(game, is_win=False):
-                lose_point_margin_percent = point_margin_map.setdefault(
-                    lose_point_margin, PointMarginPercent()
-                )
-                lose_point_margin_percent.losses.add(game.game_id)
+        point_margin_map = {}
+        for point_margin, win_game_ids, loss_game_ids in point_margin_groups:
+            point_margin_percent = point_margin_map[point_margin] = PointMarginPercent()
+            point_margin_percent.wins.update(win_game_ids)
+            point_margin_percent.losses.update(loss_game_ids)
 
         return point_margin_map
 
+    @profiled("cumulate_point_totals")
     def cumulate_point_totals(self, point_margin_map):
         point_margin_items = sorted(point_margin_map.items())
         for index, value in enumerate(point_margin_items):
@@ -364,9 +711,12 @@ class PointsDownLine(PlotLine):
                 point_margin_map.pop(point_margin)
         return first_point_margin, last_point_margin
 
+    @profiled("fit_regression_lines")
     def fit_regression_lines(
-        self, min_game_count, max_fit_point, calculate_occurrences
+        self, min_game_count, max_fit_point, calculate_occurrences, fit_start=None
     ):
+        self.fit_result = None
+        self.fit_point_margin_counts = None
         if calculate_occurrences:
             self.m = None
             self.b = None
@@ -420,34 +770,88 @@ class PointsDownLine(PlotLine):
         self.m = m
         self.b = b
 
-        X = []
-        Y = []
-        x = []
-        y = []
+        point_margin_counts = []
         for point_margin, data in sorted(self.point_margin_map.items()):
-            x.append(point_margin)
-            y.append(data.odds[0])
-            for game_id in data.wins:
-                Y.append(1)
-                X.append(point_margin)
-            for game_id in data.losses:
-                Y.append(0)
-                X.append(point_margin)
+            point_margin_counts.append((point_margin, len(data.wins), len(data.losses)))
             if point_margin >= max_fit_point:
                 break
 
-        X = Num.array(X)
-        Y = Num.array(Y)
-        x = Num.array(x)
-        y = Num.array(y)
-
-        model_probit = Num.fit_it_mle(X=X, Y=Y, model="probit", m_est=m, b_est=b)
+        context = get_chart_context()
+        m_est, b_est = (m, b) if fit_start is None else fit_start
+        fit_cache = context.fit_cache
+        model_probit = None
+        if fit_cache is not None:
+            # The likelihood uses the y axis transform (Num.CDF) as its link
+            fit_key = get_fit_key(point_margin_counts, max_fit_point, context.y_axis)
+            model_probit = fit_cache.get(fit_key)
+            if model_probit is not None:
+                context.count("fit_cache_hits")
+        if model_probit is None:
+            X = []
+            Y = []
+            for point_margin, win_count, loss_count in point_margin_counts:
+                X.extend([point_margin] * (win_count + loss_count))
+                Y.extend([1] * win_count + [0] * loss_count)
+            X = Num.array(X)
+            Y = Num.array(Y)
+            model_probit = Num.fit_it_mle(
+                X=X, Y=Y, model="probit", m_est=m_est, b_est=b_est
+            )
+            self.count_fit(context, model_probit, fit_start is not None)
+            if fit_start is not None and not Num.isfinite(
+                model_probit["neg_log_likelihood"]
+            ):
+                # A poor starting point, refit from the least squares estimate
+                model_probit = Num.fit_it_mle(
+                    X=X, Y=Y, model="probit", m_est=m, b_est=b
+                )
+                self.count_fit(context, model_probit, False)
+            if fit_cache is not None:
+                fit_cache.put(fit_key, model_probit)
 
+        self.fit_result = model_probit
+        self.fit_point_margin_counts = point_margin_counts
         self.m = model_probit["m"]
         self.b = model_probit["b"]
 
         return max_fit_point
 
+    @profiled("confidence_band")
+    def bootstrap_fit_line(self, options):
+        """
+        Refit the line to bootstrap replicates of its fit window counts.
+
+        The replicates use the link of the line's fit, the chart's y axis;
+        a linear y axis raises ValueError (see get_link_functions).
+
+        Parameters:
+        -----------
+        options : dict
+            Options from get_confidence_band_options
+
+        Returns:
+        --------
+        dict
+            Arrays 'm' and 'b' of the replicate fits, see bootstrap_probit_fits
+        """
+        return bootstrap_probit_fits(
+            self.fit_point_margin_counts,
+            self.m,
+            self.b,
+            replicates=options["replicates"],
+            method=options["method"],
+            link=get_chart_context().y_axis,
+        )
+
+    @staticmethod
+    def count_fit(context, model_probit, warm_started):
+        """Add a fit to the context profiler's counters."""
+        context.count("fits")
+        context.count("fit_iterations", model_probit["iterations"])
+        context.count("fit_function_evaluations", model_probit["function_evaluations"])
+        if warm_started:
+            context.count("warm_started_fits")
+
     @property
     def wins_count(self):
         return [
@@ -455,6 +859,13 @@ class PointsDownLine(PlotLine):
             for point_margin in self.point_margins
         ]
 
+    @property
+    def losses_count(self):
+        return [
+            len(self.point_margin_map[point_margin].losses)
+            for point_margin in self.point_margins
+        ]
+
     def margin_at_percent(self, percent):
         percent = percent * 0.01
         amount = Num.PPF(percent)
@@ -470,6 +881,83 @@ class PointsDownLine(PlotLine):
         else:
             return margin, int(Num.floor(margin)), point_B
 
+    def query_margins(self, margins):
+        """
+        Evaluate the line for a batch of point margins in one call.
+
+        Parameters:
+        -----------
+        margins : array-like
+            Point margins to evaluate
+
+        Returns:
+        --------
+        dict
+            Arrays of 'margin', 'fit_percent' (from the fitted line, 0-1), and
+            the nearest empirical point: 'point_margin', 'win_count',
+            'loss_count' and 'percent'. Lines with an isotonic curve also
+            have 'isotonic_percent' (0-1).
+        """
+        margins = Num.array(margins).astype(float)
+        result = self.get_nearest_point_margin_counts(margins)
+        result["margin"] = margins
+        result["fit_percent"] = Num.array(Num.CDF(self.m * margins + self.b))
+        if self.isotonic_curve is not None:
+            result["isotonic_percent"] = self.isotonic_curve.percent_at(margins)
+        return result
+
+    def query_percents(self, percents):
+        """
+        Find the point margins for a batch of win percents in one call.
+
+        This is the vectorized form of margin_at_percent.
+
+        Parameters:
+        -----------
+        percents : array-like
+            Win percents on a 0-100 scale, as for margin_at_percent
+
+        Returns:
+        --------
+        dict
+            Same arrays as query_margins, with 'margin' holding the fitted
+            point margin for each percent
+        """
+        fit_percents = Num.array(percents) * 0.01
+        margins = (Num.array(Num.PPF(fit_percents)) - self.b) / self.m
+        result = self.get_nearest_point_margin_counts(margins)
+        result["margin"] = margins
+        result["fit_percent"] = fit_percents
+        return result
+
+    def get_nearest_point_margin_counts(self, margins):
+        """Counts at the point margin in this line closest to each given margin."""
+        point_margins = Num.array(self.point_margins)
+        if len(point_margins) == 1:
+            index = Num.zeros_like(margins).astype(int)
+        else:
+            index = Num.clip(
+                Num.searchsorted(point_margins, margins), 1, len(point_margins) - 1
+            )
+            # Step back where the lower neighbor is at least as close
+            lower_is_closer = (margins - point_margins[index - 1]) <= (
+                point_margins[index] - margins
+            )
+            index = index - lower_is_closer
+
+        win_count = Num.array(
+            [len(self.point_margin_map[p].wins) for p in self.point_margins]
+        )
+        loss_count = Num.array(
+            [len(self.point_margin_map[p].losses) for p in self.point_margins]
+        )
+        return {
+            "point_margin": point_margins[index],
+            "win_count": win_count[index],
+            "loss_count": loss_count[index],
+            "percent": Num.array(self.percents)[index],
+        }
+
     def margin_at_record(self):
         for point_margin, data in sorted(self.point_margin_map.items()):
             if data.wins:
@@ -496,7 +984,7 @@ class PointsDownLine(PlotLine):
     def get_xy(self):
         return self.point_margins, self.sigmas
 
-    def to_json(self, calculate_occurrences=False):
+    def to_json(self, calculate_occurrences=False, game_table=None):
         json_data = {
             "legend": self.legend,
             "m": self.m,
@@ -512,12 +1000,33 @@ class PointsDownLine(PlotLine):
                 self.games,
                 self.get_all_game_ids(),
                 calculate_occurrences,
+                game_table,
             )
             point_margin_json["percent"] = self.percents[index]
             point_margin_json["sigma"] = self.sigma_final[index]
             point_margin_json["y_value"] = self.sigma_final[index]
             point_margin_json["x_value"] = self.point_margins[index]
+            if self.shrinkage_prior is not None:
+                point_margin_json["shrunk_percent"] = self.shrunk_percents[index]
+                point_margin_json["shrunk_y_value"] = self.shrunk_sigma_final[index]
+            if self.isotonic_curve is not None:
+                point_margin_json["isotonic_percent"] = self.isotonic_percents[index]
+                point_margin_json["isotonic_y_value"] = self.isotonic_sigma_final[index]
             y_values.append(point_margin_json)
+        if self.shrinkage_prior is not None:
+            json_data["empirical_bayes"] = {
+                "concentration": self.shrinkage_prior.concentration
+            }
+        if self.bootstrap_fits is not None and len(self.bootstrap_fits["m"]):
+            lower, upper = get_confidence_band(
+                self.bootstrap_fits, self.point_margins, self.confidence_band["level"]
+            )
+            json_data["confidence_band"] = dict(
+                self.confidence_band,
+                fit_replicates=len(self.bootstrap_fits["m"]),
+                lower=lower.tolist(),
+                upper=upper.tolist(),
+            )
         return json_data
 
     def plot_point_raw_margins(self, games):
@@ -529,8 +1038,23 @@ class PointsDownLine(PlotLine):
         y = self.percents
         y = [max(min_y, p) for p in y]
         y = [min(max_y, p) for p in y]
-        y = [Num.PPF(p) for p in y]
-        self.sigma_final = y
+        self.sigma_final = Num.transform().ppf(y).tolist()
+        if self.isotonic_curve is not None:
+            isotonic_percents = self.isotonic_curve.percent_at(self.point_margins)
+            self.isotonic_percents = isotonic_percents.tolist()
+            self.isotonic_sigma_final = (
+                Num.transform().ppf(Num.clip(isotonic_percents, min_y, max_y)).tolist()
+            )
+        if self.shrinkage_prior is not None:
+            shrunk_percents = self.shrinkage_prior.shrink(
+                self.point_margins,
+                self.wins_count,
+                Num.array(self.wins_count) + Num.array(self.losses_count),
+            )
+            self.shrunk_percents = shrunk_percents.tolist()
+            self.shrunk_sigma_final = (
+                Num.transform().ppf(Num.clip(shrunk_percents, min_y, max_y)).tolist()
+            )
 
 
 class PercentLine(PlotLine):
@@ -584,7 +1108,7 @@ class PercentLine(PlotLine):
         )
         return x_values, y_values
 
-    def to_json(self, calculate_occurrences=False):
+    def to_json(self, calculate_occurrences=False, game_table=None):
         """
         Convert line data to JSON format.
 
@@ -596,6 +1120,9 @@ class PercentLine(PlotLine):
         calculate_occurrences : bool
             Parameter for compatibility with PointsDownLine.to_json()
             (not used in this class)
+        game_table : GameSummaryTable or None
+            Table to reference the Record line's sample games from, instead
+            of embedding the game records in each point
 
         Returns:
         --------
@@ -627,8 +1154,12 @@ class PercentLine(PlotLine):
                 if point_margin_percent is None:
                     point_json = {}
                 else:
+                    # Only the Record line keeps its sample games
                     point_json = point_margin_percent.to_json(
-                        self.games, set(self.games.keys()), calculate_occurrences=False
+                        self.games,
+                        set(self.games.keys()),
+                        calculate_occurrences=False,
+                        game_table=game_table if self.legend == "Record" else None,
                     )
                     if self.legend != "Record":
                         if "win_games" in point_json:
@@ -666,7 +1197,14 @@ class FinalPlot:
         use_normal_labels=False,
         cumulate=False,
         calculate_occurrences=False,
+        json_format="points",
+        float_digits=None,
+        game_table=None,
+        binomial_intervals=None,
+        permutation_test=None,
     ):
+        if json_format not in CHART_JSON_FORMAT_VERSIONS:
+            raise NotImplementedError(json_format)
         self.plot_type = plot_type
         self.title = title
         self.min_x = min_x
@@ -693,26 +1231,64 @@ class FinalPlot:
         self.y_tick_labels = y_tick_labels
         self.lines = lines
         self.json_name = json_name
+        self.json_format = json_format
+        self.float_digits = float_digits
+        self.game_table = game_table
+        # Confidence level of the point intervals, None for no intervals
+        self.binomial_intervals = (
+            0.95 if binomial_intervals is True else (binomial_intervals or None)
+        )
+        # Options from get_permutation_test_options, None for no test
+        self.permutation_test = permutation_test
 
+    @profiled("to_json")
     def to_json(self):
+        """
+        Write the chart JSON file.
+
+        Returns True if the file was written, False if it was unchanged.
+        """
+        if not self.json_name.endswith(".gz"):
+            self.json_name = self.json_name + ".gz"
+
+        # Seed the example game sampling from the file name, so a chart comes
+        # out the same whichever charts were generated before it (and whether
+        # it was named with or without .gz)
+        seed_name = os.path.basename(self.json_name)[: -len(".gz")]
+        get_chart_context().random.seed(seed_name)
+
         json_data = dict(self.__dict__)
         json_data.pop("json_name")
+        json_data.pop("json_format")
+        json_data.pop("float_digits")
+        json_data.pop("game_table")
+        json_data.pop("binomial_intervals")
+        json_data.pop("permutation_test")
         lines = json_data.pop("lines")
 
         json_data["lines"] = json_lines = []
 
         for line in lines:
-            json_lines.append(line.to_json(self.calculate_occurrences))
+            json_lines.append(line.to_json(self.calculate_occurrences, self.game_table))
 
-        # Make sure the directory exists
-        os.makedirs(os.path.dirname(self.json_name), exist_ok=True)
-        if not self.json_name.endswith(".gz"):
-            self.json_name = self.json_name + ".gz"
-        if self.json_name.endswith(".gz"):
-            import gzip
+        if self.binomial_intervals is not None:
+            add_binomial_intervals(json_lines, self.binomial_intervals)
+
+        if self.permutation_test is not None:
+            json_data["permutation_test"] = permutation_test_lines(
+                lines, self.permutation_test
+            )
 
-            with gzip.open(self.json_name, "wt") as fileobj:
-                fileobj.write(json.dumps(json_data, indent=4))
+        if self.game_table is not None:
+            json_data["game_table"] = self.game_table.to_chart_json(self.json_name)
+
+        json_data = round_json_floats(json_data, self.float_digits)
+        if self.json_format == "columnar":
+            json_data = to_columnar_chart_json(json_data)
+            json_text = json.dumps(json_data, separators=(",", ":"))
         else:
-            with open(self.json_name, "w") as fileobj:
-                fileobj.write(json.dumps(json_data, indent=4))
+            json_text = json.dumps(json_data, indent=4)
+
+        # Make sure the directory exists
+        os.makedirs(os.path.dirname(self.json_name), exist_ok=True)
+        return write_if_changed(self.json_name, json_text)
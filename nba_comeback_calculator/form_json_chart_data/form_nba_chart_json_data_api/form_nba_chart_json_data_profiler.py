@@ -0,0 +1,339 @@
+# form_nba_chart_json_data_profiler.py
+"""
+Opt-in profiling of the chart pipeline.
+
+A ChartProfiler attached to a ChartContext records the wall time, call count
+and (optionally) peak traced memory of each pipeline stage, per chart and in
+total:
+
+    season_decode            reading a season file and creating its games
+    games_assembly           collecting the games of a year range
+    setup_point_margin_map   grouping the games by point margin
+    cumulate_point_totals    "or more" cumulation of the margin counts
+    shrinkage_prior          estimating the empirical Bayes prior of a time
+    fit_regression_lines     probit (or logit) fits
+    confidence_band          bootstrap refits of a line's confidence band
+    to_json                  building and writing the chart JSON
+    binomial_intervals       confidence intervals of the point win percents
+    permutation_test         permutation test of the two lines of a chart
+    write_output             gzip compression and file write
+
+Stage times include any stages nested inside them, and a chart's time
+includes all of its stages. Stages that run outside a chart (e.g. seasons
+decoded before the charts are built) only count towards the stage totals.
+
+Counters add up amounts per chart and in total:
+
+    fits                      probit maximum likelihood fits run
+    fit_iterations            optimizer iterations of those fits
+    fit_function_evaluations  likelihood evaluations of those fits
+    warm_started_fits         fits started from a neighboring line's fit
+    fit_cache_hits            fits read from the FitCache instead
+    permutations              permutations drawn by permutation tests
+
+Profiling is enabled by environment variables, or by the matching options of
+the nbacc-charts command:
+
+    NBACC_PROFILE=report.json   write the JSON report at exit (--profile)
+    NBACC_PROFILE_MEMORY=1      also record peak memory (--profile-memory)
+    NBACC_CPROFILE=run.prof     also write a cProfile dump (--cprofile)
+
+Memory tracking uses tracemalloc, which slows the build down noticeably, so
+it is off unless asked for. The cProfile dump only covers the process it was
+started in, so the scheduler builds in-process when one is requested. When
+profiling is off a stage costs one attribute check.
+"""
+
+# Standard library imports
+import atexit
+import contextlib
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+PROFILE_REPORT_VERSION = 1
+
+# Stage name under which a whole chart is recorded
+CHART_STAGE = "chart"
+
+_environment_profiler = None
+
+
+class ChartProfiler:
+    """
+    Records stage timings and writes the profile report.
+
+    Usage:
+        profiler = ChartProfiler("report.json", memory=True)
+        context = ChartContext(json_base_path, profiler=profiler)
+        ... build charts with context ...
+        profiler.finish()
+    """
+
+    def __init__(self, report_filename=None, memory=False, cprofile_filename=None):
+        """
+        Parameters:
+        -----------
+        report_filename : str or None
+            Path of the JSON report written by finish
+        memory : bool
+            If True, record the peak traced memory of each stage and chart
+        cprofile_filename : str or None
+            If set, run cProfile until finish and dump its stats here
+        """
+        self.report_filename = report_filename
+        self.memory = memory
+        self.cprofile_filename = cprofile_filename
+        # (chart name or None, stage name) to [calls, seconds, peak_bytes]
+        self.records = {}
+        # (chart name or None, counter name) to the counted total
+        self.counters = {}
+        # Chart name to the id of the process that built it
+        self.chart_pids = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cprofile = None
+        self.start_time = time.perf_counter()
+        self.finished = False
+
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if cprofile_filename is not None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def _get_stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def stage(self, name, chart_name=None):
+        """
+        Record a stage.
+
+        Parameters:
+        -----------
+        name : str
+            Stage name
+        chart_name : str or None
+            If set, the stage is a whole chart and the stages inside it are
+            recorded under this chart
+        """
+        stack = self._get_stack()
+        if chart_name is None:
+            chart_name = stack[-1]["chart"] if stack else None
+        else:
+            self.chart_pids[chart_name] = os.getpid()
+
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            else:
+                # Python 3.8 has no reset_peak; clearing the traces resets the
+                # peak but also the traced memory, so the enclosing stages'
+                # peaks leave out what was allocated before this one
+                tracemalloc.clear_traces()
+                current = 0
+        else:
+            current = 0
+        frame = {"chart": chart_name, "start_memory": current, "peak": current}
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+            peak_bytes = None
+            if self.memory:
+                _, peak = tracemalloc.get_traced_memory()
+                frame["peak"] = max(frame["peak"], peak)
+                peak_bytes = frame["peak"] - frame["start_memory"]
+                if stack:
+                    stack[-1]["peak"] = max(stack[-1]["peak"], frame["peak"])
+            self._add_record((chart_name, name), 1, seconds, peak_bytes)
+
+    def chart(self, chart_name):
+        """Record a whole chart (see stage)."""
+        return self.stage(CHART_STAGE, chart_name=chart_name)
+
+    def count(self, name, amount=1):
+        """
+        Add to a counter, for the current chart and in total.
+
+        Parameters:
+        -----------
+        name : str
+            Counter name
+        amount : int
+            Amount to add
+        """
+        stack = self._get_stack()
+        chart_name = stack[-1]["chart"] if stack else None
+        with self._lock:
+            key = (chart_name, name)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def _add_record(self, key, calls, seconds, peak_bytes):
+        with self._lock:
+            record = self.records.setdefault(key, [0, 0.0, None])
+            record[0] += calls
+            record[1] += seconds
+            if peak_bytes is not None:
+                record[2] = max(record[2] or 0, peak_bytes)
+
+    def take_records(self):
+        """Remove and return the records, e.g. to send them from a worker process."""
+        with self._lock:
+            records, self.records = self.records, {}
+            counters, self.counters = self.counters, {}
+            chart_pids, self.chart_pids = self.chart_pids, {}
+        return records, counters, chart_pids
+
+    def merge_records(self, taken_records):
+        """Add records returned by take_records (possibly from another process)."""
+        records, counters, chart_pids = taken_records
+        for key, (calls, seconds, peak_bytes) in records.items():
+            self._add_record(key, calls, seconds, peak_bytes)
+        with self._lock:
+            for key, amount in counters.items():
+                self.counters[key] = self.counters.get(key, 0) + amount
+        self.chart_pids.update(chart_pids)
+
+    def get_report(self):
+        """
+        Summarize the records.
+
+        Returns:
+        --------
+        dict
+            JSON-serializable report with the stage and counter totals and,
+            for every chart, its own time, peak memory, stages and counters
+        """
+
+        def to_json(record):
+            calls, seconds, peak_bytes = record
+            return {"calls": calls, "seconds": seconds, "peak_bytes": peak_bytes}
+
+        stages = {}
+        charts = {}
+        for (chart_name, name), record in self.records.items():
+            if chart_name is not None:
+                chart = charts.setdefault(
+                    chart_name,
+                    {"pid": self.chart_pids.get(chart_name), "stages": {}},
+                )
+                if name == CHART_STAGE:
+                    chart.update(to_json(record))
+                    continue
+                chart["stages"][name] = to_json(record)
+            total = stages.setdefault(name, [0, 0.0, None])
+            total[0] += record[0]
+            total[1] += record[1]
+            if record[2] is not None:
+                total[2] = max(total[2] or 0, record[2])
+
+        counters = {}
+        for (chart_name, name), amount in self.counters.items():
+            if chart_name is not None:
+                chart = charts.setdefault(
+                    chart_name,
+                    {"pid": self.chart_pids.get(chart_name), "stages": {}},
+                )
+                chart_counters = chart.setdefault("counters", {})
+                chart_counters[name] = chart_counters.get(name, 0) + amount
+            counters[name] = counters.get(name, 0) + amount
+
+        return {
+            "version": PROFILE_REPORT_VERSION,
+            "memory": self.memory,
+            "wall_seconds": time.perf_counter() - self.start_time,
+            "stages": {
+                name: to_json(record)
+                for name, record in sorted(
+                    stages.items(), key=lambda item: item[1][1], reverse=True
+                )
+                if name != CHART_STAGE
+            },
+            "counters": dict(sorted(counters.items())),
+            "charts": {
+                chart_name: charts[chart_name]
+                for chart_name in sorted(
+                    charts,
+                    key=lambda name: charts[name].get("seconds", 0.0),
+                    reverse=True,
+                )
+            },
+        }
+
+    def print_summary(self, report=None):
+        """Print the stage and counter totals of a report."""
+        report = self.get_report() if report is None else report
+        print(f"Profile: {report['wall_seconds']:.2f}s wall time")
+        for name, stage in report["stages"].items():
+            memory = ""
+            if stage["peak_bytes"] is not None:
+                memory = f"  peak {stage['peak_bytes'] / 2**20:8.1f} MiB"
+            print(
+                f"  {stage['seconds']:8.2f}s  {stage['calls']:6d} calls  "
+                f"{name}{memory}"
+            )
+        for name, amount in report.get("counters", {}).items():
+            print(f"  {amount:18d}  {name}")
+
+    def finish(self):
+        """
+        Stop profiling and write the report and cProfile dump.
+
+        Returns:
+        --------
+        dict
+            The report (see get_report)
+        """
+        report = self.get_report()
+        if self.finished:
+            return report
+        self.finished = True
+
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_filename)
+        if self.report_filename is not None:
+            report_dir = os.path.dirname(os.path.abspath(self.report_filename))
+            os.makedirs(report_dir, exist_ok=True)
+            with open(self.report_filename, "w") as fileobj:
+                json.dump(report, fileobj, indent=4)
+        return report
+
+
+def get_environment_profiler():
+    """
+    Get the process profiler configured by the NBACC_PROFILE variables.
+
+    Returns:
+    --------
+    ChartProfiler or None
+        The profiler, which writes its report at exit, or None if neither
+        NBACC_PROFILE nor NBACC_CPROFILE is set
+    """
+    global _environment_profiler
+    report_filename = os.environ.get("NBACC_PROFILE") or None
+    cprofile_filename = os.environ.get("NBACC_CPROFILE") or None
+    if report_filename is None and cprofile_filename is None:
+        return None
+    if _environment_profiler is None:
+        _environment_profiler = ChartProfiler(
+            report_filename,
+            memory=os.environ.get("NBACC_PROFILE_MEMORY", "") not in ("", "0"),
+            cprofile_filename=cprofile_filename,
+        )
+        atexit.register(_environment_profiler.finish)
+    return _environment_profiler
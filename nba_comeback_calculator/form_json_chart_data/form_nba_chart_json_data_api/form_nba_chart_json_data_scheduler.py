@@ -0,0 +1,291 @@
+# form_nba_chart_json_data_scheduler.py
+"""
+Parallel chart job scheduler for the Sphinx page generators.
+
+Page scripts describe their charts as ChartJob objects instead of calling the
+plot functions directly. A ChartScheduler collects the jobs of every page,
+skips the ones the BuildManifest reports as up to date and runs the rest on a
+process pool. Jobs are the unit of work: charts that share a GameSummaryTable
+must be built in the same process, so a page is one job.
+
+Shared inputs are deduplicated in two ways. A chart requested by several jobs
+with the same arguments is only built once. The season files read by the
+stale jobs are decoded once in the scheduler process before the pool starts,
+so forked workers (see get_pool_context) inherit them instead of each decoding
+their own copy.
+
+When the context has a ChartProfiler, each job's stage records are sent back
+with its results and merged into the scheduler's profiler.
+"""
+
+# Standard library imports
+import os
+import time
+
+# Local imports
+from .form_nba_chart_json_data_context import (
+    get_chart_context,
+    get_pool_context,
+    set_default_chart_context,
+)
+from .form_nba_chart_json_data_season_game_loader import Season
+from .form_nba_chart_json_data_build_manifest import (
+    build_chart_group,
+    encode_fingerprint_value,
+    get_output_name,
+    get_season_years,
+)
+
+
+class ChartJob:
+    """A group of chart calls that are built together in one process."""
+
+    def __init__(self, name, chart_calls=None, game_table=None):
+        """
+        Parameters:
+        -----------
+        name : str
+            Job name used in the timing report and the run results
+        chart_calls : list of tuples, optional
+            List of (plot_function, kwargs) calls, each with a json_name
+        game_table : GameSummaryTable or None
+            Shared table passed to every chart and saved after the job
+        """
+        self.name = name
+        self.chart_calls = list(chart_calls or [])
+        self.game_table = game_table
+
+    def add(self, plot_function, **kwargs):
+        """Add a chart call to the job, returning its index."""
+        self.chart_calls.append((plot_function, kwargs))
+        return len(self.chart_calls) - 1
+
+    @property
+    def season_years(self):
+        """Sorted season years read by any chart in the job."""
+        years = set()
+        for _, kwargs in self.chart_calls:
+            years.update(get_season_years(kwargs["year_groups"]))
+        return sorted(years)
+
+    @property
+    def output_names(self):
+        """Files written by the job."""
+        names = [get_output_name(kwargs["json_name"]) for _, kwargs in self.chart_calls]
+        if self.game_table is not None and self.game_table.json_name is not None:
+            names.append(get_output_name(self.game_table.json_name))
+        return names
+
+
+def init_worker(context):
+    """Pool initializer that makes the scheduler's context the worker default."""
+    set_default_chart_context(context)
+
+
+def run_chart_job(job, context=None):
+    """
+    Build every chart in a job, with context (or the default context) active.
+
+    Returns:
+    --------
+    tuple
+        (results, elapsed, pid, profile) with the plot function results, the
+        seconds taken by each chart, the id of the process that built them and
+        the profiler records of the job (None if not profiled)
+    """
+    results, elapsed = build_chart_group(job.chart_calls, job.game_table, context)
+    profiler = get_chart_context(context).profiler
+    profile = None if profiler is None else profiler.take_records()
+    return results, elapsed, os.getpid(), profile
+
+
+def _run_indexed_chart_job(indexed_job):
+    index, job = indexed_job
+    return index, run_chart_job(job)
+
+
+class ChartScheduler:
+    """
+    Collects chart jobs and builds the stale ones on a process pool.
+
+    Usage:
+        scheduler = ChartScheduler(context, workers=8, manifest=manifest)
+        scheduler.add(job)
+        results = scheduler.run()
+    """
+
+    def __init__(self, context, workers=None, manifest=None):
+        """
+        Parameters:
+        -----------
+        context : ChartContext
+            Season data and caches the jobs are built with
+        workers : int, optional
+            Number of worker processes, defaults to the CPU count. With one
+            worker the jobs are built in this process.
+        manifest : BuildManifest, optional
+            Manifest used to skip up to date jobs and record rebuilt ones
+        """
+        self.context = context
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.manifest = manifest
+        self.jobs = []
+        self.timings = []
+        self._job_names = set()
+        # Indices of the chart calls each job builds itself, by job name
+        self.kept_indices = {}
+        # First chart call for each output file, to catch jobs that collide
+        self._outputs = {}
+
+    def add(self, job):
+        """
+        Add a job, dropping chart calls another job already makes.
+
+        A chart is shared when it writes the same file with the same arguments;
+        writing the same file with different arguments raises ValueError. A
+        shared chart is built by the first job that adds it. If that job has a
+        shared game table, the chart records the table's path (see
+        GameSummaryTable.to_chart_json), so the pages of the other jobs load
+        its sample games from there.
+
+        The job's chart_calls are left as they are; the calls it builds are
+        given by kept_indices and get_build_job.
+        """
+        if job.name in self._job_names:
+            raise ValueError(f"Duplicate chart job name: {job.name}")
+        self._job_names.add(job.name)
+
+        # Where each chart's result comes from, as (job name, index in the
+        # calls that job builds)
+        sources = []
+        kept_indices = []
+        for call_index, (plot_function, kwargs) in enumerate(job.chart_calls):
+            output_name = os.path.abspath(get_output_name(kwargs["json_name"]))
+            inputs = (plot_function, encode_fingerprint_value(kwargs))
+            if output_name not in self._outputs:
+                self._outputs[output_name] = (job, len(kept_indices), inputs)
+                sources.append((job.name, len(kept_indices)))
+                kept_indices.append(call_index)
+                continue
+            other_job, index, other_inputs = self._outputs[output_name]
+            if other_inputs != inputs:
+                raise ValueError(
+                    f"Chart {output_name} is written by both {other_job.name} "
+                    f"and {job.name} with different inputs"
+                )
+            sources.append((other_job.name, index))
+
+        self.kept_indices[job.name] = kept_indices
+        self.jobs.append((job, sources))
+        return job
+
+    def get_build_job(self, job):
+        """The job with only the chart calls it builds itself (see add)."""
+        return ChartJob(
+            job.name,
+            [job.chart_calls[index] for index in self.kept_indices[job.name]],
+            job.game_table,
+        )
+
+    def _preload_seasons(self, jobs):
+        """Decode the seasons read by the jobs once, before forking the workers."""
+        for year in sorted({year for job in jobs for year in job.season_years}):
+            try:
+                Season.get_season(year, self.context).games
+            except FileNotFoundError:
+                # Reported by the chart that reads it
+                pass
+
+    def _run_stale_jobs(self, jobs):
+        """Build the jobs, yielding (job, run_chart_job result) as they finish."""
+        profiler = self.context.profiler
+        # A cProfile dump only sees this process
+        in_process = profiler is not None and profiler.cprofile_filename is not None
+        if self.workers == 1 or len(jobs) <= 1 or in_process:
+            for job in jobs:
+                yield job, run_chart_job(job, self.context)
+            return
+
+        pool_context = get_pool_context()
+        # Forked workers share the context with the preloaded seasons, other
+        # start methods (Windows, macOS) load them again in each worker
+        if pool_context.get_start_method() == "fork":
+            self._preload_seasons(jobs)
+        with pool_context.Pool(
+            processes=min(self.workers, len(jobs)),
+            initializer=init_worker,
+            initargs=(self.context,),
+        ) as pool:
+            for index, job_result in pool.imap_unordered(
+                _run_indexed_chart_job, list(enumerate(jobs))
+            ):
+                yield jobs[index], job_result
+
+    def run(self):
+        """
+        Build the stale jobs and collect the results of every job.
+
+        Returns:
+        --------
+        dict
+            Job name to the list of plot function results, in the order the
+            chart calls were added (including calls built by another job)
+        """
+        start = time.perf_counter()
+        job_results = {}
+        checks = {}
+        stale_jobs = []
+        for job, _ in self.jobs:
+            job = self.get_build_job(job)
+            if not job.chart_calls:
+                job_results[job.name] = []
+                continue
+            if self.manifest is None:
+                fingerprints, results = None, None
+            else:
+                fingerprints, results = self.manifest.check_group(
+                    job.chart_calls, job.game_table
+                )
+            checks[job.name] = fingerprints
+            if results is None:
+                stale_jobs.append(job)
+            else:
+                job_results[job.name] = results
+
+        # Start the longest jobs first so they do not finish last on one worker
+        stale_jobs.sort(key=lambda job: len(job.season_years), reverse=True)
+
+        self.timings = []
+        for job, (results, elapsed, pid, profile) in self._run_stale_jobs(stale_jobs):
+            job_results[job.name] = results
+            if profile is not None and self.context.profiler is not None:
+                self.context.profiler.merge_records(profile)
+            if self.manifest is not None:
+                self.manifest.record_group(job.chart_calls, checks[job.name], results)
+            for (_, kwargs), seconds in zip(job.chart_calls, elapsed):
+                self.timings.append((job.name, kwargs["json_name"], seconds, pid))
+            print(f"Built {job.name}: {len(results)} charts in {sum(elapsed):.2f}s")
+
+        self.elapsed = time.perf_counter() - start
+        self.print_report()
+
+        # Fill in the charts that were built by another job
+        return {
+            job.name: [job_results[source][index] for source, index in sources]
+            for job, sources in self.jobs
+        }
+
+    def print_report(self, slowest=10):
+        """Print the total build time and the slowest charts."""
+        if not self.timings:
+            print(f"No charts needed rebuilding ({self.elapsed:.2f}s)")
+            return
+        chart_seconds = sum(seconds for _, _, seconds, _ in self.timings)
+        process_count = len({pid for _, _, _, pid in self.timings})
+        print(
+            f"Built {len(self.timings)} charts in {self.elapsed:.2f}s "
+            f"({chart_seconds:.2f}s of chart time on {process_count} processes)"
+        )
+        timings = sorted(self.timings, key=lambda timing: timing[2], reverse=True)
+        for job_name, json_name, seconds, _ in timings[:slowest]:
+            print(f"  {seconds:8.2f}s  {job_name}  {os.path.basename(json_name)}")
@@ -8,14 +8,24 @@ along with utility functions for filtering and analyzing game data.
 
 The module defines granular time intervals for game analysis, supporting
 minute-by-minute analysis as well as sub-minute intervals (down to 5-second
-increments) in the final minute of the game.
+increments) in the final minute of the game. Season files may optionally
+carry a per-second margin timeline for each game, which allows queries at
+arbitrary clock values (e.g. 7:30 left) without re-bucketing the data.
 """
 
 # Standard library imports
+import bisect
 import json
 import os
 import gzip
 
+# Third-party imports
+import numpy as np
+
+# Local imports
+from .form_nba_chart_json_data_context import get_chart_context
+from .form_nba_chart_json_data_empirical_bayes import ShrinkagePrior
+
 
 # Defines time intervals for analysis, from start of game (48 minutes)
 # to end of game (0), with sub-minute intervals in the final minute
@@ -58,35 +68,75 @@ GAME_MINUTES = [
 # Mapping from time point to array index for efficient lookup
 TIME_TO_INDEX_MAP = {key: index for index, key in enumerate(GAME_MINUTES)}
 
+# Length of regulation in seconds (overtime is not tracked)
+SECONDS_PER_GAME = 48 * 60
+
+
+def get_seconds_remaining(time):
+    """
+    Convert a time point into seconds remaining in regulation.
+
+    Parameters:
+    -----------
+    time : int, float or str
+        Either minutes remaining (e.g. 6 or 7.5), a seconds string as used in
+        GAME_MINUTES (e.g. "45s"), or a clock string (e.g. "7:30")
+
+    Returns:
+    --------
+    int
+        Seconds remaining in the game
+
+    Raises:
+    -------
+    ValueError
+        If the time cannot be parsed or is outside of regulation
+    """
+    if isinstance(time, str):
+        if time.endswith("s"):
+            seconds = int(time[:-1])
+        elif ":" in time:
+            minutes, seconds = time.split(":")
+            seconds = int(minutes) * 60 + int(seconds)
+        else:
+            seconds = int(round(float(time) * 60.0))
+    else:
+        seconds = int(round(time * 60.0))
+
+    if not 0 <= seconds <= SECONDS_PER_GAME:
+        raise ValueError(f"Time out of range: {time}")
+    return seconds
+
 
 class Season:
     """Manages loading of season data from JSON files."""
 
-    _seasons = {}  # Class-level cache of loaded seasons
-
     @classmethod
-    def get_season(cls, year):
-        """Get a season by year, loading it if necessary."""
-        if year not in cls._seasons:
-            cls._seasons[year] = Season(year)
-        return cls._seasons[year]
-
-    def __init__(self, year):
+    def get_season(cls, year, context=None):
+        """Get a season by year from the context's cache, loading it if necessary."""
+        context = get_chart_context(context)
+        if year not in context.seasons:
+            context.seasons[year] = Season(year, context)
+        return context.seasons[year]
+
+    def __init__(self, year, context=None):
         """Initialize a season by loading its JSON data."""
         self.year = year
-        self.filename = f"{json_base_path}/nba_season_{year}.json.gz"
+        self.context = get_chart_context(context)
+        self.filename = self.context.get_season_filename(year)
 
         # Verify the file exists
         if not os.path.exists(self.filename):
             raise FileNotFoundError(f"Season data file not found: {self.filename}")
 
         # Load the season data
-        if self.filename.endswith(".gz"):
-            with gzip.open(self.filename, "rt") as f:  # 'rt' for text mode
-                self.data = json.load(f)
-        else:
-            with open(self.filename, "r") as f:
-                self.data = json.load(f)
+        with self.context.profile("season_decode"):
+            if self.filename.endswith(".gz"):
+                with gzip.open(self.filename, "rt") as f:  # 'rt' for text mode
+                    self.data = json.load(f)
+            else:
+                with open(self.filename, "r") as f:
+                    self.data = json.load(f)
 
         # Extract season metadata
         self.season_year = self.data["season_year"]
@@ -101,16 +151,29 @@ class Season:
     def games(self):
         """Lazy load and cache the game objects."""
         if self._games is None:
-            self._games = {}
-            for game_id, game_data in self.data["games"].items():
-                self._games[game_id] = Game(game_data, game_id, self)
+            with self.context.profile("season_decode"):
+                self._games = {}
+                for game_id, game_data in self.data["games"].items():
+                    self._games[game_id] = Game(game_data, game_id, self)
         return self._games
 
 
 class Games:
     """Collection of NBA games for specified seasons loaded from JSON files."""
 
-    def __init__(self, start_year, stop_year, season_type="all"):
+    @classmethod
+    def get_games(cls, start_year, stop_year, season_type="all", context=None):
+        """
+        Get a games collection for a year range from the context's cache,
+        assembling it if necessary.
+        """
+        context = get_chart_context(context)
+        key = (start_year, stop_year, season_type)
+        if key not in context.games:
+            context.games[key] = Games(start_year, stop_year, season_type, context)
+        return context.games[key]
+
+    def __init__(self, start_year, stop_year, season_type="all", context=None):
         """
         Initialize games collection for the given year range with optional filtering.
 
@@ -120,23 +183,35 @@ class Games:
             First season year to include
         stop_year : int
             Last season year to include
-        game_filter : GameFilter or None
-            Filter to apply to games. If None, all games in the date range are included.
+        season_type : str
+            'Regular Season', 'Playoffs' or 'all'
+        context : ChartContext or None
+            Context the seasons are loaded through, see get_chart_context
         """
+        context = get_chart_context(context)
         self.games = {}
         self.start_year = start_year
         self.stop_year = stop_year
 
         self.season_type = season_type
 
+        # Cache of game filter results, keyed by filter signature
+        self._filter_masks = {}
+        self._filter_mask_arrays = {}
+        # Cache of PointMarginTable objects, keyed by (start_time, down_mode)
+        self._point_margin_tables = {}
+        # Cache of ShrinkagePrior objects, keyed by (start_time, down_mode, cumulate)
+        self._shrinkage_priors = {}
+
         # Load all games from the date range
-        for year in range(start_year, stop_year + 1):
-            season = Season.get_season(year)
+        with context.profile("games_assembly"):
+            for year in range(start_year, stop_year + 1):
+                season = Season.get_season(year, context)
 
-            for game_id, game in season.games.items():
-                if season_type != "all" and game.season_type != season_type:
-                    continue
-                self.games[game_id] = game
+                for game_id, game in season.games.items():
+                    if season_type != "all" and game.season_type != season_type:
+                        continue
+                    self.games[game_id] = game
 
     def __getitem__(self, game_id):
         return self.games[game_id]
@@ -150,6 +225,95 @@ class Games:
     def keys(self):
         return self.games.keys()
 
+    def get_filter_mask(self, game_filter):
+        """
+        Get the filter results for every game, computing them once per filter.
+
+        Parameters:
+        -----------
+        game_filter : GameFilter
+            Filter to apply to the games
+
+        Returns:
+        --------
+        dict
+            Mapping of game_id to (is_win_match, is_loss_match)
+        """
+        key = game_filter.get_signature()
+        if key not in self._filter_masks:
+            self._filter_masks[key] = {
+                game_id: (
+                    game_filter.is_match(game, is_win=True),
+                    game_filter.is_match(game, is_win=False),
+                )
+                for game_id, game in self.games.items()
+            }
+        return self._filter_masks[key]
+
+    def get_filter_mask_arrays(self, game_filter):
+        """
+        Get the filter results as boolean arrays in game order (see get_filter_mask).
+
+        Returns:
+        --------
+        tuple
+            (is_win_match, is_loss_match) boolean arrays
+        """
+        key = game_filter.get_signature()
+        if key not in self._filter_mask_arrays:
+            filter_mask = self.get_filter_mask(game_filter)
+            self._filter_mask_arrays[key] = tuple(
+                np.fromiter(
+                    (filter_mask[game_id][index] for game_id in self.games),
+                    dtype=bool,
+                    count=len(self.games),
+                )
+                for index in range(2)
+            )
+        return self._filter_mask_arrays[key]
+
+    def get_point_margin_table(self, start_time, down_mode):
+        """
+        Get the point margins of every game, scanning the games once per
+        (start_time, down_mode).
+
+        Every chart variant of a page (cumulated or not, wins or occurrences,
+        any game filter or y axis) is counted from the same table.
+
+        Parameters:
+        -----------
+        start_time : int or str
+            Time point to start analysis from (see Game.get_point_margins)
+        down_mode : str
+            Analysis mode ('at' or 'max')
+
+        Returns:
+        --------
+        PointMarginTable
+        """
+        key = (start_time, down_mode)
+        if key not in self._point_margin_tables:
+            self._point_margin_tables[key] = PointMarginTable(
+                self, start_time, down_mode
+            )
+        return self._point_margin_tables[key]
+
+    def get_shrinkage_prior(self, start_time, down_mode, cumulate):
+        """
+        Get the empirical Bayes prior of the win percents, estimating it once
+        per (start_time, down_mode, cumulate) from every team's counts.
+
+        Returns:
+        --------
+        ShrinkagePrior
+        """
+        key = (start_time, down_mode, cumulate)
+        if key not in self._shrinkage_priors:
+            self._shrinkage_priors[key] = ShrinkagePrior.build(
+                self, self.get_point_margin_table(start_time, down_mode), cumulate
+            )
+        return self._shrinkage_priors[key]
+
     def get_years_string(self):
         """Format the years string for display."""
 
@@ -179,8 +343,6 @@ class Game:
     the game, enabling detailed analysis of game progression and comebacks.
     """
 
-    index = 0  # Class variable to track game index
-
     def __init__(self, game_data, game_id, season):
         """
         Initialize game with data from JSON.
@@ -194,8 +356,8 @@ class Game:
         season : Season
             Reference to the Season object this game belongs to
         """
-        self.index = Game.index
-        Game.index += 1
+        # Load order of the game within its season's ChartContext
+        self.index = next(season.context.game_indexes)
 
         # Store the game ID and reference to season
         self.game_id = game_id
@@ -233,15 +395,130 @@ class Game:
             game_data["point_margins"]
         )
 
+        # Optional per-second timeline, decoded on first use
+        self._timeline_data = game_data.get("timeline")
+        self._timeline = None
+
         # Set team win percentages and rankings from season data
         self.home_team_win_pct = season.team_stats[self.home_team_abbr]["win_pct"]
         self.away_team_win_pct = season.team_stats[self.away_team_abbr]["win_pct"]
         self.home_team_rank = season.team_stats[self.home_team_abbr]["rank"]
         self.away_team_rank = season.team_stats[self.away_team_abbr]["rank"]
 
+        # Summary string, formatted on first use
+        self._game_summary_json_string = None
+
+    @property
+    def timeline(self):
+        """The GameTimeline for this game, or None if the season has none."""
+        if self._timeline is None and self._timeline_data is not None:
+            self._timeline = GameTimeline.from_json(self._timeline_data)
+            self._timeline_data = None
+        return self._timeline
+
+    def get_point_margins(self, start_time, down_mode):
+        """
+        Get the point margins of the winning and losing teams for an analysis mode.
+
+        Parameters:
+        -----------
+        start_time : int or str
+            Time point to start analysis from. Times not in TIME_TO_INDEX_MAP
+            (e.g. "7:30" or 2.25) are answered from the per-second timeline.
+        down_mode : str
+            Analysis mode:
+            - 'at': Point margin at start_time
+            - 'max': Smallest point margin (largest deficit) from start_time
+              to the end of the game
+
+        Returns:
+        --------
+        tuple
+            (win_point_margin, lose_point_margin)
+
+        Raises:
+        -------
+        AssertionError
+            If start_time is not in TIME_TO_INDEX_MAP and the game has no timeline
+        NotImplementedError
+            If down_mode is not 'at' or 'max'
+        """
+        use_timeline = start_time not in TIME_TO_INDEX_MAP
+        if use_timeline:
+            if self.timeline is None:
+                raise AssertionError(
+                    f"Invalid start_time: {start_time}, not found in "
+                    f"TIME_TO_INDEX_MAP and game {self.game_id} has no timeline"
+                )
+            point_margin, min_point_margin, max_point_margin = (
+                self.timeline.margin_range_since(get_seconds_remaining(start_time))
+            )
+
+        if down_mode == "at" and use_timeline:
+            # Analyze point deficit at an arbitrary time point
+            sign = 1 if self.score_diff > 0 else -1
+            win_point_margin = sign * point_margin
+            lose_point_margin = -1 * win_point_margin
+
+        elif down_mode == "max" and use_timeline:
+            # The timeline already tracks the extremes to the end of the game
+            if self.score_diff > 0:  # Home team won
+                win_point_margin = min_point_margin
+                lose_point_margin = -1.0 * max_point_margin
+            else:  # Away team won
+                win_point_margin = -1.0 * max_point_margin
+                lose_point_margin = min_point_margin
+
+        elif down_mode == "at":
+            # Analyze point deficit at the specific time point
+            sign = 1 if self.score_diff > 0 else -1
+            point_margin = self.point_margin_map[start_time]["point_margin"]
+            win_point_margin = sign * point_margin
+            lose_point_margin = -1 * win_point_margin
+
+        elif down_mode == "max":
+            # Analyze maximum point deficit faced during the period
+            win_point_margin = float("inf")
+            lose_point_margin = float("inf")
+
+            # Determine the range of time to analyze
+            start_index = TIME_TO_INDEX_MAP[start_time]
+            stop_index = TIME_TO_INDEX_MAP[0]  # End of game
+
+            # Find the maximum deficit throughout the period
+            for index in range(start_index, stop_index + 1):
+                time = GAME_MINUTES[index]
+                point_margin_data = self.point_margin_map[time]
+
+                # For first time point, use the current margin
+                if index == start_index:
+                    min_point_margin = point_margin_data["point_margin"]
+                    max_point_margin = point_margin_data["point_margin"]
+                else:
+                    # For subsequent time points, use min/max values
+                    min_point_margin = point_margin_data["min_point_margin"]
+                    max_point_margin = point_margin_data["max_point_margin"]
+
+                if self.score_diff > 0:  # Home team won
+                    win_point_margin = min(min_point_margin, win_point_margin)
+                    lose_point_margin = min(-1.0 * max_point_margin, lose_point_margin)
+                elif self.score_diff < 0:  # Away team won
+                    win_point_margin = min(-1.0 * max_point_margin, win_point_margin)
+                    lose_point_margin = min(min_point_margin, lose_point_margin)
+                else:
+                    raise AssertionError("NBA games can't end in a tie")
+        else:
+            raise NotImplementedError(f"Unsupported down_mode: {down_mode}")
+
+        return win_point_margin, lose_point_margin
+
     def get_game_summary_json_string(self):
         """Returns a formatted string summary of the game suitable for JSON display."""
+        if self._game_summary_json_string is None:
+            self._game_summary_json_string = self.format_game_summary_json_string()
+        return self._game_summary_json_string
 
+    def format_game_summary_json_string(self):
         # Format the rank as ordinal (1st, 2nd, 3rd, etc.)
         def ordinal(n):
             if 10 <= n % 100 <= 20:
@@ -268,6 +545,201 @@ class Game:
         )
 
 
+class PointMarginTable:
+    """
+    Win and loss point margins of every game in a Games collection.
+
+    The margins are stored as one array of entries, [win_0, loss_0, win_1,
+    loss_1, ...] in game order, sorted once so the point margin map for any
+    game filter is grouped without another pass over the games.
+    """
+
+    def __init__(self, games, start_time, down_mode):
+        """
+        Scan the games for one (start_time, down_mode).
+
+        Parameters:
+        -----------
+        games : Games
+            Collection of games to scan
+        start_time : int or str
+            Time point to start analysis from
+        down_mode : str
+            Analysis mode ('at' or 'max')
+        """
+        self.game_ids = np.array(list(games.keys()), dtype=object)
+        point_margins = []
+        for game in games:
+            point_margins.extend(game.get_point_margins(start_time, down_mode))
+
+        values = np.array(point_margins, dtype=float)
+        # Margins are ints or floats depending on how they were computed, and
+        # the first entry seen for a margin decides the type of its map key
+        self.is_float = np.array(
+            [isinstance(point_margin, float) for point_margin in point_margins],
+            dtype=bool,
+        )
+        # Stable, so equal margins keep game order (wins before losses)
+        self.order = np.argsort(values, kind="stable")
+        self.sorted_values = values[self.order]
+
+    def get_point_margin_groups(self, filter_mask_arrays=None):
+        """
+        Group the games by point margin.
+
+        Parameters:
+        -----------
+        filter_mask_arrays : tuple or None
+            (is_win_match, is_loss_match) arrays from Games.get_filter_mask_arrays,
+            or None to include every game
+
+        Returns:
+        --------
+        list of tuples
+            (point_margin, win_game_ids, loss_game_ids) in ascending margin order
+        """
+        if filter_mask_arrays is None:
+            order = self.order
+            sorted_values = self.sorted_values
+        else:
+            is_match = np.empty(2 * len(self.game_ids), dtype=bool)
+            is_match[0::2], is_match[1::2] = filter_mask_arrays
+            is_sorted_match = is_match[self.order]
+            order = self.order[is_sorted_match]
+            sorted_values = self.sorted_values[is_sorted_match]
+
+        starts = np.flatnonzero(np.diff(sorted_values, prepend=np.nan) != 0)
+        stops = np.append(starts[1:], len(sorted_values))
+        game_ids = self.game_ids[order // 2]
+        is_loss = (order % 2).astype(bool)
+
+        groups = []
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            value = sorted_values[start]
+            point_margin = float(value) if self.is_float[order[start]] else int(value)
+            group_is_loss = is_loss[start:stop]
+            group_game_ids = game_ids[start:stop]
+            groups.append(
+                (
+                    point_margin,
+                    group_game_ids[~group_is_loss].tolist(),
+                    group_game_ids[group_is_loss].tolist(),
+                )
+            )
+        return groups
+
+
+class GameTimeline:
+    """
+    Per-second point margin timeline for a single game.
+
+    Holds every change in point margin (home minus away) as it happened, so
+    the margin at any second of regulation can be found with a binary search
+    instead of being limited to the GAME_MINUTES buckets.
+    """
+
+    def __init__(self, seconds_remaining, point_margins):
+        """
+        Initialize the timeline from decoded events.
+
+        Parameters:
+        -----------
+        seconds_remaining : list of int
+            Seconds remaining at each margin change, in game order
+        point_margins : list of int
+            Point margin after each change
+        """
+        # Include the opening tip so every query time has a preceding event,
+        # and store elapsed seconds so the list is ascending for bisect.
+        self.elapsed_seconds = [0] + [
+            SECONDS_PER_GAME - seconds for seconds in seconds_remaining
+        ]
+        self.point_margins = [0] + list(point_margins)
+
+        # Suffix extremes: min/max margin from each event to the final buzzer
+        count = len(self.point_margins)
+        self.min_point_margins_since = [0] * count
+        self.max_point_margins_since = [0] * count
+        min_point_margin = max_point_margin = self.point_margins[-1]
+        for index in range(count - 1, -1, -1):
+            min_point_margin = min(min_point_margin, self.point_margins[index])
+            max_point_margin = max(max_point_margin, self.point_margins[index])
+            self.min_point_margins_since[index] = min_point_margin
+            self.max_point_margins_since[index] = max_point_margin
+
+    @classmethod
+    def from_json(cls, timeline_data):
+        """
+        Decode the delta-encoded timeline stored in the season JSON.
+
+        Parameters:
+        -----------
+        timeline_data : list of int
+            Flat [seconds_delta, margin_delta, ...] pairs, starting from the
+            opening tip (48:00 remaining, margin 0)
+
+        Returns:
+        --------
+        GameTimeline
+        """
+        seconds_remaining = []
+        point_margins = []
+        seconds = SECONDS_PER_GAME
+        point_margin = 0
+        for index in range(0, len(timeline_data), 2):
+            seconds -= timeline_data[index]
+            point_margin += timeline_data[index + 1]
+            seconds_remaining.append(seconds)
+            point_margins.append(point_margin)
+        return cls(seconds_remaining, point_margins)
+
+    def get_event_index(self, seconds_remaining):
+        """Index of the last margin change at or before the given time."""
+        elapsed = SECONDS_PER_GAME - seconds_remaining
+        return bisect.bisect_right(self.elapsed_seconds, elapsed) - 1
+
+    def margin_at(self, seconds_remaining):
+        """Point margin (home minus away) with the given seconds remaining."""
+        return self.point_margins[self.get_event_index(seconds_remaining)]
+
+    def margin_range_since(self, seconds_remaining):
+        """
+        Point margin at a time and its extremes from then to the end of the game.
+
+        Parameters:
+        -----------
+        seconds_remaining : int
+            Seconds remaining in the game
+
+        Returns:
+        --------
+        tuple
+            (point_margin, min_point_margin, max_point_margin)
+        """
+        index = self.get_event_index(seconds_remaining)
+        return (
+            self.point_margins[index],
+            self.min_point_margins_since[index],
+            self.max_point_margins_since[index],
+        )
+
+    def max_deficit_since(self, seconds_remaining, for_home_team):
+        """
+        Largest deficit faced by a team from the given time to the end of the game.
+
+        Returns the lowest point margin from that team's perspective, matching
+        the 'max' down_mode (e.g. -15 for trailing by 15 at some point, or a
+        positive value if the team led throughout).
+        """
+        _, min_point_margin, max_point_margin = self.margin_range_since(
+            seconds_remaining
+        )
+        if for_home_team:
+            return min_point_margin
+        else:
+            return -1 * max_point_margin
+
+
 def get_point_margin_map_from_json(point_margins_data):
     """
     Process point margins from JSON data into a structured map.
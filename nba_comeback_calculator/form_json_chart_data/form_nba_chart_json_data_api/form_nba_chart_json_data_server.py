@@ -0,0 +1,282 @@
+# form_nba_chart_json_data_server.py
+"""
+Local query server for NBA chart data generation.
+
+This module runs a long-lived process on localhost that keeps the season data,
+assembled game collections and game filter results resident in memory. Build
+scripts and notebooks send chart or probability lookup requests as JSON over
+HTTP and get the results back without paying Python startup, the scipy import
+and the season decode on every run.
+
+Usage:
+    python -m nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_server \\
+        --seasons <season_json_dir>
+
+Requests are POSTed to / as {"command": ..., "kwargs": {...}}; ChartClient
+wraps this protocol. Chart output paths are resolved by the server process,
+so clients should send absolute json_name paths.
+"""
+
+# Standard library imports
+import argparse
+import json
+import math
+import sys
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Local imports
+from .form_nba_chart_json_data_context import ChartContext
+from .form_nba_chart_json_data_season_game_loader import Games
+from .form_nba_chart_json_data_api import (
+    GameFilter,
+    parse_season_type,
+    plot_biggest_deficit,
+    plot_percent_versus_time,
+)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def decode_chart_kwargs(kwargs):
+    """
+    Convert JSON chart request arguments into API arguments.
+
+    Year groups arrive as lists and game filters as dictionaries of
+    GameFilter arguments (or null for no filter).
+    """
+    kwargs = dict(kwargs)
+    if "year_groups" in kwargs:
+        kwargs["year_groups"] = [tuple(group) for group in kwargs["year_groups"]]
+    game_filters = kwargs.get("game_filters")
+    if isinstance(game_filters, dict):
+        game_filters = [game_filters]
+    if game_filters is not None:
+        kwargs["game_filters"] = [
+            None if game_filter is None else GameFilter(**game_filter)
+            for game_filter in game_filters
+        ]
+    return kwargs
+
+
+def encode_chart_kwargs(kwargs):
+    """Convert API chart arguments into a JSON-serializable request (see decode_chart_kwargs)."""
+    kwargs = dict(kwargs)
+    game_filters = kwargs.get("game_filters")
+    if isinstance(game_filters, GameFilter):
+        game_filters = [game_filters]
+    if game_filters is not None:
+        kwargs["game_filters"] = [
+            None if game_filter is None else game_filter.to_json()
+            for game_filter in game_filters
+        ]
+    return kwargs
+
+
+def to_json_values(values):
+    """Convert lookup arrays to lists, replacing NaN with None."""
+    return [None if math.isnan(value) else value for value in values.tolist()]
+
+
+class ChartServer:
+    """Dispatches chart and lookup requests against resident season data."""
+
+    def __init__(self, json_base_path, cube_filename=None):
+        """
+        Initialize the server state.
+
+        Parameters:
+        -----------
+        json_base_path : str
+            Directory holding the nba_season_{year}.json.gz files
+        cube_filename : str or None
+            Optional WinProbabilityCube archive used for lookup requests
+        """
+        self.context = ChartContext(json_base_path)
+        self.cube = None
+        if cube_filename is not None:
+            from .form_nba_chart_json_data_lookup_cube import WinProbabilityCube
+
+            self.cube = WinProbabilityCube.load(cube_filename)
+
+        self.commands = {
+            "ping": self.ping,
+            "preload": self.preload,
+            "plot_biggest_deficit": self.plot_biggest_deficit,
+            "plot_percent_versus_time": self.plot_percent_versus_time,
+            "lookup": self.lookup,
+        }
+
+    def dispatch(self, command, kwargs):
+        """Run a single request with the server's ChartContext active."""
+        try:
+            handler = self.commands[command]
+        except KeyError:
+            raise ValueError(f"Unknown command: {command}")
+
+        with self.context.activate():
+            return handler(**kwargs)
+
+    def ping(self):
+        return {"seasons": sorted(self.context.seasons)}
+
+    def preload(self, year_groups):
+        """Load seasons and assemble the games for each (start_year, stop_year) group."""
+        for start_year, stop_year in year_groups:
+            start_year_numeric, season_type = parse_season_type(start_year)
+            stop_year_numeric, _ = parse_season_type(stop_year)
+            Games.get_games(start_year_numeric, stop_year_numeric, season_type)
+        return self.ping()
+
+    def plot_biggest_deficit(self, **kwargs):
+        return list(plot_biggest_deficit(**decode_chart_kwargs(kwargs)))
+
+    def plot_percent_versus_time(self, **kwargs):
+        return list(plot_percent_versus_time(**decode_chart_kwargs(kwargs)))
+
+    def lookup(self, times, margins, game_filter="all", era=None):
+        if self.cube is None:
+            raise ValueError("Server was started without a lookup cube")
+        result = self.cube.lookup(times, margins, game_filter, era)
+        return {
+            "win_count": result["win_count"].tolist(),
+            "loss_count": result["loss_count"].tolist(),
+            "percent": to_json_values(result["percent"]),
+            "fit_percent": to_json_values(result["fit_percent"]),
+        }
+
+
+class ChartRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler that forwards JSON requests to the ChartServer."""
+
+    chart_server = None
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        start = time.perf_counter()
+        try:
+            request = json.loads(self.rfile.read(length))
+            result = self.chart_server.dispatch(
+                request["command"], request.get("kwargs", {})
+            )
+        except Exception as excep:
+            status = 500
+            response = {"error": f"{type(excep).__name__}: {excep}"}
+        else:
+            status = 200
+            response = {"result": result}
+        response["elapsed"] = time.perf_counter() - start
+
+        body = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ChartClient:
+    """
+    Thin client for a running ChartServer.
+
+    The plot methods take the same arguments as the API functions (GameFilter
+    objects are encoded automatically) and return the same values.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=600.0):
+        self.url = f"http://{host}:{port}/"
+        self.timeout = timeout
+
+    def request(self, command, **kwargs):
+        """Send a request and return its result, raising RuntimeError on failure."""
+        body = json.dumps({"command": command, "kwargs": kwargs}).encode("utf-8")
+        http_request = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(http_request, timeout=self.timeout) as f:
+                response = json.loads(f.read())
+        except urllib.error.HTTPError as excep:
+            response = json.loads(excep.read())
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    def ping(self):
+        return self.request("ping")
+
+    def preload(self, year_groups):
+        return self.request("preload", year_groups=year_groups)
+
+    def plot_biggest_deficit(self, **kwargs):
+        return tuple(
+            self.request("plot_biggest_deficit", **encode_chart_kwargs(kwargs))
+        )
+
+    def plot_percent_versus_time(self, **kwargs):
+        return tuple(
+            self.request("plot_percent_versus_time", **encode_chart_kwargs(kwargs))
+        )
+
+    def lookup(self, times, margins, game_filter="all", era=None):
+        return self.request(
+            "lookup", times=times, margins=margins, game_filter=game_filter, era=era
+        )
+
+
+def create_http_server(chart_server, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """
+    Bind an HTTP server that forwards requests to a ChartServer.
+
+    Parameters:
+    -----------
+    chart_server : ChartServer
+        Server state the requests run against
+    host : str
+        Interface to listen on
+    port : int
+        Port to listen on, 0 for any free port (see server_address)
+
+    Returns:
+    --------
+    http.server.HTTPServer
+        Bound server; call serve_forever to handle requests
+    """
+    handler = type(
+        "BoundChartRequestHandler",
+        (ChartRequestHandler,),
+        {"chart_server": chart_server},
+    )
+    return HTTPServer((host, port), handler)
+
+
+def serve(json_base_path, host=DEFAULT_HOST, port=DEFAULT_PORT, cube_filename=None):
+    """Run the chart server until interrupted."""
+    httpd = create_http_server(ChartServer(json_base_path, cube_filename), host, port)
+    print(f"Serving NBA chart requests on http://{host}:{port}/")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local NBA chart query server")
+    parser.add_argument("--seasons", required=True, help="Season JSON directory")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cube", default=None, help="Lookup cube archive")
+    args = parser.parse_args(argv)
+    serve(args.seasons, args.host, args.port, args.cube)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
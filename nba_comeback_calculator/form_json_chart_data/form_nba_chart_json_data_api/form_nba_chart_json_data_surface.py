@@ -0,0 +1,429 @@
+# form_nba_chart_json_data_surface.py
+"""
+Smooth win probability surface over point margin and time remaining.
+
+The per-minute PointsDownLine fits give a probit line (m, b) only at the
+GAME_MINUTES time points. This module fits a single model for all times at
+once, with the coefficients written as smooth functions of s = sqrt(t) (the
+plot_calculated_guides analysis shows margins scaling with sqrt(t)):
+
+    m(t) = (a0 + a1 * s + a2 * s^2) / s
+    b(t) = c0 + c1 * s + c2 * s^2
+    P(win | margin, t) = CDF(m(t) * margin + b(t))
+
+The six coefficients are estimated once per era/filter by maximum likelihood
+over the aggregated win/loss counts and stored as a small JSON object, so
+live-game lookups at any clock value evaluate in closed form.
+"""
+
+# Standard library imports
+import json
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from .form_nba_chart_json_data_season_game_loader import (
+    GAME_MINUTES,
+    get_seconds_remaining,
+)
+from .form_nba_chart_json_data_plot_primitives import PointsDownLine
+from .form_nba_chart_json_data_num import Num
+
+# Times are clamped to one second remaining so that m(t) stays finite
+MIN_MINUTES = 1.0 / 60.0
+
+
+def get_minutes_remaining(times):
+    """
+    Convert time points to minutes remaining as a float array.
+
+    Parameters:
+    -----------
+    times : int, float, str or sequence
+        Minutes remaining, GAME_MINUTES strings (e.g. "45s") or clock strings
+        (e.g. "7:30")
+
+    Returns:
+    --------
+    numpy.ndarray
+        Minutes remaining, clamped to at least one second
+    """
+    if isinstance(times, str) or (
+        np.ndim(times) > 0 and any(isinstance(time, str) for time in times)
+    ):
+        times = np.vectorize(get_seconds_remaining, otypes=[float])(times) / 60.0
+    minutes = np.asarray(times, dtype=float)
+    return np.maximum(minutes, MIN_MINUTES)
+
+
+def get_design_matrix(margins, minutes):
+    """Columns [margin/s, margin, margin*s, 1, s, s^2] with s = sqrt(minutes)."""
+    s = np.sqrt(minutes)
+    return np.column_stack(
+        [margins / s, margins, margins * s, np.ones_like(s), s, s * s]
+    )
+
+
+def get_surface_counts(games, game_filter, max_fit_margin=-1, down_mode="at"):
+    """
+    Aggregate win/loss counts by (time, point margin) for fitting a surface.
+
+    Tip-off and the final buzzer are excluded since every margin is 0 at the
+    start and the outcome is known at the end.
+
+    Parameters:
+    -----------
+    games : Games
+        Collection of games to analyze
+    game_filter : GameFilter or None
+        Filter to apply to games
+    max_fit_margin : int
+        Largest point margin included in the fit
+    down_mode : str
+        Analysis mode passed to PointsDownLine.get_point_margin_map
+
+    Returns:
+    --------
+    tuple
+        Arrays (minutes, margins, win_counts, loss_counts)
+    """
+    minutes = []
+    margins = []
+    win_counts = []
+    loss_counts = []
+    for time in GAME_MINUTES:
+        if time in (48, 0):
+            continue
+        point_margin_map = PointsDownLine.get_point_margin_map(
+            games, game_filter, time, down_mode
+        )
+        for point_margin, data in sorted(point_margin_map.items()):
+            if point_margin > max_fit_margin:
+                break
+            minutes.append(get_seconds_remaining(time) / 60.0)
+            margins.append(point_margin)
+            win_counts.append(len(data.wins))
+            loss_counts.append(len(data.losses))
+    return (
+        np.array(minutes, dtype=float),
+        np.array(margins, dtype=float),
+        np.array(win_counts, dtype=float),
+        np.array(loss_counts, dtype=float),
+    )
+
+
+def get_cube_surface_counts(cube, era, game_filter, max_fit_margin=-1):
+    """
+    Aggregate win/loss counts for fitting a surface from a WinProbabilityCube.
+
+    Returns the same arrays as get_surface_counts without loading any seasons.
+    """
+    era_index = cube.era_index_map[era]
+    filter_index = cube.filter_index_map[game_filter]
+    margin_values = np.arange(cube.min_margin, cube.max_margin + 1, dtype=float)
+    minutes = []
+    margins = []
+    win_counts = []
+    loss_counts = []
+    for time_index, time in enumerate(GAME_MINUTES):
+        if time in (48, 0):
+            continue
+        cells = cube.counts[era_index, filter_index, time_index]
+        keep = ((cells[:, 0] + cells[:, 1]) > 0) & (margin_values <= max_fit_margin)
+        minutes.extend([get_seconds_remaining(time) / 60.0] * int(keep.sum()))
+        margins.extend(margin_values[keep])
+        win_counts.extend(cells[keep, 0])
+        loss_counts.extend(cells[keep, 1])
+    return (
+        np.array(minutes, dtype=float),
+        np.array(margins, dtype=float),
+        np.array(win_counts, dtype=float),
+        np.array(loss_counts, dtype=float),
+    )
+
+
+def surface_neg_log_likelihood(params, X, win_counts, loss_counts, link):
+    """
+    Binomial negative log-likelihood and its gradient for the surface model.
+
+    Parameters:
+    -----------
+    params : array-like
+        The six surface coefficients
+    X : numpy.ndarray
+        Design matrix from get_design_matrix
+    win_counts, loss_counts : numpy.ndarray
+        Aggregated outcomes for each row of X
+    link : str
+        'probit' or 'logit'
+
+    Returns:
+    --------
+    tuple
+        (negative log-likelihood, gradient)
+    """
+    from scipy.special import expit, log_ndtr
+
+    z = X @ params
+    # Far from the margins in the data the derivative terms underflow to 0
+    with np.errstate(under="ignore"):
+        if link == "probit":
+            log_p = log_ndtr(z)
+            log_q = log_ndtr(-z)
+            # d/dz log CDF(z) = pdf(z) / CDF(z), computed in log space
+            log_pdf = -0.5 * z * z - 0.5 * np.log(2.0 * np.pi)
+            d_log_p = np.exp(log_pdf - log_p)
+            d_log_q = -np.exp(log_pdf - log_q)
+        elif link == "logit":
+            log_p = -np.logaddexp(0.0, -z)
+            log_q = -np.logaddexp(0.0, z)
+            d_log_p = expit(-z)
+            d_log_q = -expit(z)
+        else:
+            raise NotImplementedError(link)
+
+        neg_loglik = -np.sum(win_counts * log_p + loss_counts * log_q)
+        gradient = -X.T @ (win_counts * d_log_p + loss_counts * d_log_q)
+    return neg_loglik, gradient
+
+
+class WinProbabilitySurface:
+    """
+    Closed-form P(win | margin, t) model with coefficients smooth in sqrt(t).
+
+    Margins are from the "for" team's perspective (negative = down) and times
+    are minutes remaining (or clock strings such as "7:30").
+    """
+
+    version = 1
+
+    def __init__(
+        self,
+        m_coefficients,
+        b_coefficients,
+        link="probit",
+        max_fit_margin=-1,
+        number_of_observations=None,
+        neg_log_likelihood=None,
+    ):
+        """
+        Initialize a surface from its coefficients.
+
+        Parameters:
+        -----------
+        m_coefficients : list of float
+            (a0, a1, a2) in m(t) = (a0 + a1 * s + a2 * s^2) / s
+        b_coefficients : list of float
+            (c0, c1, c2) in b(t) = c0 + c1 * s + c2 * s^2
+        link : str
+            'probit' or 'logit'
+        max_fit_margin : int
+            Largest point margin that was included in the fit
+        number_of_observations : int or None
+            Number of win/loss outcomes the surface was fit to
+        neg_log_likelihood : float or None
+            Fit diagnostic
+        """
+        self.m_coefficients = [float(x) for x in m_coefficients]
+        self.b_coefficients = [float(x) for x in b_coefficients]
+        self.link = link
+        self.max_fit_margin = max_fit_margin
+        self.number_of_observations = number_of_observations
+        self.neg_log_likelihood = neg_log_likelihood
+
+    @classmethod
+    def fit_counts(
+        cls, minutes, margins, win_counts, loss_counts, link="probit", max_fit_margin=-1
+    ):
+        """
+        Fit a surface to aggregated (time, margin) win/loss counts.
+
+        The least squares fit of the empirical transformed rates (weighted by
+        game count) seeds the maximum likelihood fit, mirroring how
+        PointsDownLine seeds Num.fit_it_mle.
+
+        Returns:
+        --------
+        WinProbabilitySurface
+        """
+        from scipy.special import logit, ndtri
+
+        if link == "probit":
+            ppf = ndtri
+        elif link == "logit":
+            ppf = logit
+        else:
+            raise NotImplementedError(link)
+
+        totals = win_counts + loss_counts
+        keep = totals > 0
+        minutes = minutes[keep]
+        margins = margins[keep]
+        win_counts = win_counts[keep]
+        loss_counts = loss_counts[keep]
+        totals = totals[keep]
+        if len(np.unique(minutes)) < 3:
+            raise AssertionError("At least three time points are needed for a surface")
+
+        X = get_design_matrix(margins, np.maximum(minutes, MIN_MINUTES))
+
+        # Weighted least squares on the transformed empirical rates
+        rates = np.clip(win_counts / totals, 0.5 / totals, 1.0 - 0.5 / totals)
+        weights = np.sqrt(totals)
+        initial_params = np.linalg.lstsq(
+            X * weights[:, None], ppf(rates) * weights, rcond=None
+        )[0]
+
+        result = Num.minimize(
+            surface_neg_log_likelihood,
+            initial_params,
+            args=(X, win_counts, loss_counts, link),
+            jac=True,
+        )
+        params = result["x"]
+        return cls(
+            m_coefficients=params[:3],
+            b_coefficients=params[3:],
+            link=link,
+            max_fit_margin=max_fit_margin,
+            number_of_observations=int(np.sum(totals)),
+            neg_log_likelihood=float(result["fun"]),
+        )
+
+    @classmethod
+    def fit(cls, games, game_filter=None, link="probit", max_fit_margin=-1):
+        """Fit a surface directly from a Games collection."""
+        minutes, margins, win_counts, loss_counts = get_surface_counts(
+            games, game_filter, max_fit_margin=max_fit_margin
+        )
+        return cls.fit_counts(
+            minutes, margins, win_counts, loss_counts, link, max_fit_margin
+        )
+
+    @classmethod
+    def fit_cube(
+        cls, cube, era=None, game_filter="all", link="probit", max_fit_margin=-1
+    ):
+        """Fit a surface from the counts stored in a WinProbabilityCube."""
+        era = cube.era_names[0] if era is None else era
+        minutes, margins, win_counts, loss_counts = get_cube_surface_counts(
+            cube, era, game_filter, max_fit_margin=max_fit_margin
+        )
+        return cls.fit_counts(
+            minutes, margins, win_counts, loss_counts, link, max_fit_margin
+        )
+
+    def get_m_b(self, times):
+        """Evaluate the line coefficients m(t) and b(t) at the given times."""
+        s = np.sqrt(get_minutes_remaining(times))
+        a0, a1, a2 = self.m_coefficients
+        c0, c1, c2 = self.b_coefficients
+        m = (a0 + a1 * s + a2 * s * s) / s
+        b = c0 + c1 * s + c2 * s * s
+        return m, b
+
+    def probability(self, margins, times):
+        """
+        Win probability for a batch of (margin, time) game states.
+
+        Parameters:
+        -----------
+        margins : float or array-like
+            Point margins (negative = down)
+        times : float, str or sequence
+            Minutes remaining or clock strings, broadcast against margins
+
+        Returns:
+        --------
+        numpy.ndarray
+            Win probabilities
+        """
+        from scipy.special import expit, ndtr
+
+        m, b = self.get_m_b(times)
+        z = m * np.asarray(margins, dtype=float) + b
+        with np.errstate(under="ignore"):
+            return ndtr(z) if self.link == "probit" else expit(z)
+
+    def margins_at_percents(self, percents, times):
+        """Point margins at which the win probability equals each percent (0-100)."""
+        from scipy.special import logit, ndtri
+
+        m, b = self.get_m_b(times)
+        percents = np.asarray(percents, dtype=float) * 0.01
+        z = ndtri(percents) if self.link == "probit" else logit(percents)
+        return (z - b) / m
+
+    def to_json(self):
+        return {
+            "model": "sqrt_time",
+            "version": self.version,
+            "link": self.link,
+            "m_coefficients": self.m_coefficients,
+            "b_coefficients": self.b_coefficients,
+            "max_fit_margin": self.max_fit_margin,
+            "number_of_observations": self.number_of_observations,
+            "neg_log_likelihood": self.neg_log_likelihood,
+        }
+
+    @classmethod
+    def from_json(cls, json_data):
+        if (
+            json_data.get("model") != "sqrt_time"
+            or json_data.get("version") != cls.version
+        ):
+            raise ValueError(f"Unsupported surface model: {json_data.get('model')}")
+        return cls(
+            m_coefficients=json_data["m_coefficients"],
+            b_coefficients=json_data["b_coefficients"],
+            link=json_data["link"],
+            max_fit_margin=json_data["max_fit_margin"],
+            number_of_observations=json_data.get("number_of_observations"),
+            neg_log_likelihood=json_data.get("neg_log_likelihood"),
+        )
+
+
+def fit_cube_surfaces(cube, link="probit", max_fit_margin=-1):
+    """
+    Fit a surface for every era and game filter stored in a cube.
+
+    Combinations without enough data to fit are skipped.
+
+    Returns:
+    --------
+    dict
+        Mapping of (era, game_filter) to WinProbabilitySurface
+    """
+    surfaces = {}
+    for era in cube.era_names:
+        for game_filter in cube.filter_names:
+            try:
+                surfaces[(era, game_filter)] = WinProbabilitySurface.fit_cube(
+                    cube, era, game_filter, link, max_fit_margin
+                )
+            except (AssertionError, np.linalg.LinAlgError):
+                continue
+    return surfaces
+
+
+def save_surfaces(filename, surfaces):
+    """Save a mapping of (era, game_filter) to surfaces as one JSON file."""
+    json_data = {
+        "surfaces": [
+            {"era": era, "game_filter": game_filter, **surface.to_json()}
+            for (era, game_filter), surface in surfaces.items()
+        ]
+    }
+    with open(filename, "w") as fileobj:
+        fileobj.write(json.dumps(json_data, indent=4))
+
+
+def load_surfaces(filename):
+    """Load surfaces written by save_surfaces."""
+    with open(filename, "r") as fileobj:
+        json_data = json.load(fileobj)
+    return {
+        (entry["era"], entry["game_filter"]): WinProbabilitySurface.from_json(entry)
+        for entry in json_data["surfaces"]
+    }
@@ -0,0 +1,341 @@
+# form_nba_chart_json_data_synthetic_seasons.py
+"""
+Synthetic season data for tests and benchmarks.
+
+The real nba_season_{year}.json.gz files are built from a play-by-play
+database that is not part of the repository. This module writes files in the
+same schema (see form_nba_game_json_seasons.py) from a simple random walk
+model, so the chart pipeline can be exercised and timed without them.
+
+Each game is a sequence of possessions. A possession lasts a few seconds and
+the team with the ball scores 1, 2 or 3 points with a probability that
+depends on the team strengths and home court. The point margin after every
+score is bucketed into the GAME_MINUTES intervals the same way the season
+builder buckets plays, and optionally stored as the per-second timeline.
+Games tied at the buzzer are decided in an untracked overtime, which only
+changes the final score, like real overtime games.
+
+Usage:
+    write_synthetic_seasons("seasons", 2015, season_count=10, games_per_season=1230)
+"""
+
+# Standard library imports
+import bisect
+import datetime
+import gzip
+import json
+import os
+import random as random_lib
+
+# Local imports
+from .form_nba_chart_json_data_season_game_loader import (
+    GAME_MINUTES,
+    SECONDS_PER_GAME,
+    get_seconds_remaining,
+)
+
+TEAM_ABBRS = [
+    "ATL", "BKN", "BOS", "CHA", "CHI", "CLE", "DAL", "DEN", "DET", "GSW",
+    "HOU", "IND", "LAC", "LAL", "MEM", "MIA", "MIL", "MIN", "NOP", "NYK",
+    "OKC", "ORL", "PHI", "PHX", "POR", "SAC", "SAS", "TOR", "UTA", "WAS",
+]  # fmt: skip
+
+# Games in a full regular season, and the share of playoff games added to it
+GAMES_PER_SEASON = 1230
+PLAYOFF_FRACTION = 0.07
+
+# Seconds remaining at each GAME_MINUTES time, negated so it is ascending
+_NEGATED_BUCKET_SECONDS = [-get_seconds_remaining(time) for time in GAME_MINUTES]
+
+
+def get_bucket_index(seconds_remaining):
+    """
+    Get the GAME_MINUTES index of the interval a play falls in.
+
+    A play with t seconds remaining belongs to the first time point at or
+    before it, so index i holds the plays from GAME_MINUTES[i - 1] (exclusive)
+    down to GAME_MINUTES[i].
+    """
+    return bisect.bisect_left(_NEGATED_BUCKET_SECONDS, -seconds_remaining)
+
+
+def make_synthetic_game(
+    rng,
+    home_strength,
+    away_strength,
+    home_advantage=2.5,
+    include_timeline=False,
+):
+    """
+    Simulate one game.
+
+    Parameters:
+    -----------
+    rng : random.Random
+        Random number generator
+    home_strength, away_strength : float
+        Team ratings, in points per game above an average team
+    home_advantage : float
+        Extra points per game for the home team
+    include_timeline : bool
+        If True, also return the delta-encoded per-second timeline
+
+    Returns:
+    --------
+    tuple
+        (home_points, away_points, point_margins, timeline) where
+        point_margins is in the season JSON "index=margin[,min,max]" format
+        and timeline is None unless include_timeline is set
+    """
+    # A team has about 100 possessions worth 2.2 points on average, so this
+    # per possession edge makes the rating difference the expected margin
+    edge = (home_strength - away_strength + home_advantage) / 440.0
+    home_points = away_points = 0
+    seconds = SECONDS_PER_GAME
+    home_has_ball = rng.random() < 0.5
+    # Bucket index to [margin, min margin, max margin]
+    buckets = {0: [0, 0, 0]}
+    events = []
+    while True:
+        seconds -= rng.randint(6, 22)
+        if seconds < 0:
+            break
+        score_chance = 0.5 + (edge if home_has_ball else -edge)
+        if rng.random() < score_chance:
+            points = rng.choices((1, 2, 3), weights=(1, 6, 3))[0]
+            if home_has_ball:
+                home_points += points
+            else:
+                away_points += points
+            point_margin = home_points - away_points
+            events.append((seconds, point_margin))
+            bucket_index = get_bucket_index(seconds)
+            bucket = buckets.get(bucket_index)
+            if bucket is None:
+                buckets[bucket_index] = [point_margin] * 3
+            else:
+                bucket[0] = point_margin
+                bucket[1] = min(bucket[1], point_margin)
+                bucket[2] = max(bucket[2], point_margin)
+        home_has_ball = not home_has_ball
+
+    # Overtime is not part of the margins, only of the final score
+    while home_points == away_points:
+        home_points += rng.randint(6, 14)
+        away_points += rng.randint(6, 14)
+
+    point_margins = []
+    for index, (point_margin, min_point_margin, max_point_margin) in sorted(
+        buckets.items()
+    ):
+        if point_margin == min_point_margin == max_point_margin:
+            point_margins.append(f"{index}={point_margin}")
+        else:
+            point_margins.append(
+                f"{index}={point_margin},{min_point_margin},{max_point_margin}"
+            )
+
+    timeline = None
+    if include_timeline:
+        timeline = []
+        last_seconds = SECONDS_PER_GAME
+        last_point_margin = 0
+        for event_seconds, point_margin in events:
+            timeline.append(last_seconds - event_seconds)
+            timeline.append(point_margin - last_point_margin)
+            last_seconds = event_seconds
+            last_point_margin = point_margin
+    return home_points, away_points, point_margins, timeline
+
+
+def get_team_stats(games, teams):
+    """
+    Regular season records and win percentage ranks, as in the season builder.
+
+    Parameters:
+    -----------
+    games : dict
+        Game ID to game JSON data
+    teams : list of str
+        Team abbreviations
+
+    Returns:
+    --------
+    dict
+        Team abbreviation to its wins, losses, games, win_pct and rank
+    """
+    team_stats = {
+        team: {"wins": 0, "losses": 0, "games": 0, "win_pct": 0.0, "rank": 0}
+        for team in teams
+    }
+    for game in games.values():
+        if game["season_type"] != "Regular Season":
+            continue
+        away_points, home_points = [int(x) for x in game["score"].split(" - ")]
+        home_won = home_points > away_points
+        for team, won in [
+            (game["home_team_abbr"], home_won),
+            (game["away_team_abbr"], not home_won),
+        ]:
+            team_stats[team]["games"] += 1
+            team_stats[team]["wins" if won else "losses"] += 1
+
+    for stats in team_stats.values():
+        if stats["games"] > 0:
+            stats["win_pct"] = stats["wins"] / stats["games"]
+
+    # Ties share the rank of the team before them
+    current_rank = 1
+    previous_pct = None
+    for team in sorted(
+        team_stats, key=lambda team: team_stats[team]["win_pct"], reverse=True
+    ):
+        pct = team_stats[team]["win_pct"]
+        if pct != previous_pct:
+            rank = current_rank
+            previous_pct = pct
+        else:
+            rank = current_rank - 1
+        team_stats[team]["rank"] = rank
+        current_rank += 1
+    return team_stats
+
+
+def make_synthetic_season(
+    year,
+    games_per_season=GAMES_PER_SEASON,
+    rng=None,
+    team_count=len(TEAM_ABBRS),
+    include_timeline=False,
+):
+    """
+    Simulate the regular season and playoff games of one season.
+
+    Parameters:
+    -----------
+    year : int
+        Season start year
+    games_per_season : int
+        Number of regular season games; PLAYOFF_FRACTION as many playoff
+        games are added
+    rng : random.Random or None
+        Random number generator, seeded from the year if None
+    team_count : int
+        Number of teams, at most len(TEAM_ABBRS)
+    include_timeline : bool
+        If True, store the per-second timeline of every game
+
+    Returns:
+    --------
+    dict
+        Season JSON data, as read by Season
+    """
+    if not 2 <= team_count <= len(TEAM_ABBRS):
+        raise ValueError(f"team_count must be between 2 and {len(TEAM_ABBRS)}")
+    rng = random_lib.Random(year) if rng is None else rng
+    teams = sorted(TEAM_ABBRS[:team_count])
+    strengths = {team: rng.gauss(0.0, 4.0) for team in teams}
+    # Playoff games are between the stronger half of the league
+    playoff_teams = sorted(teams, key=strengths.get, reverse=True)[
+        : max(2, team_count // 2)
+    ]
+    playoff_game_count = int(round(games_per_season * PLAYOFF_FRACTION))
+
+    games = {}
+    season_year = f"{year}-{(year + 1) % 100:02d}"
+    for index in range(games_per_season + playoff_game_count):
+        is_playoffs = index >= games_per_season
+        home_team, away_team = rng.sample(playoff_teams if is_playoffs else teams, 2)
+        home_points, away_points, point_margins, timeline = make_synthetic_game(
+            rng,
+            strengths[home_team],
+            strengths[away_team],
+            include_timeline=include_timeline,
+        )
+        # Game IDs follow the NBA scheme: 2 for the regular season, 4 for playoffs
+        game_number = index - games_per_season if is_playoffs else index
+        game_id = f"00{4 if is_playoffs else 2}{year % 100:02d}{game_number + 1:05d}"
+        # Regular season from late October, playoffs from mid April
+        if is_playoffs:
+            game_date = datetime.date(year + 1, 4, 15) + datetime.timedelta(
+                days=game_number * 60 // max(1, playoff_game_count)
+            )
+        else:
+            game_date = datetime.date(year, 10, 22) + datetime.timedelta(
+                days=game_number * 170 // games_per_season
+            )
+        game = {
+            "game_date": game_date.isoformat(),
+            "season_type": "Playoffs" if is_playoffs else "Regular Season",
+            "season_year": season_year,
+            "home_team_abbr": home_team,
+            "away_team_abbr": away_team,
+            "score": f"{away_points} - {home_points}",
+            "point_margins": point_margins,
+        }
+        if timeline is not None:
+            game["timeline"] = timeline
+        games[game_id] = game
+
+    return {
+        "season_year": year,
+        "team_count": team_count,
+        "teams": teams,
+        "team_stats": get_team_stats(games, teams),
+        "games": games,
+    }
+
+
+def write_synthetic_seasons(
+    json_base_path,
+    start_year,
+    season_count=1,
+    games_per_season=GAMES_PER_SEASON,
+    seed=0,
+    team_count=len(TEAM_ABBRS),
+    include_timeline=False,
+):
+    """
+    Write synthetic nba_season_{year}.json.gz files.
+
+    Parameters:
+    -----------
+    json_base_path : str
+        Directory to write the season files to, created if missing
+    start_year : int
+        First season year
+    season_count : int
+        Number of consecutive seasons
+    games_per_season : int
+        Regular season games per season
+    seed : int
+        Seed of the random number generator; the same arguments always
+        write the same files
+    team_count : int
+        Number of teams
+    include_timeline : bool
+        If True, store the per-second timeline of every game
+
+    Returns:
+    --------
+    list of str
+        Paths of the written files
+    """
+    os.makedirs(json_base_path, exist_ok=True)
+    filenames = []
+    for year in range(start_year, start_year + season_count):
+        rng = random_lib.Random(f"{seed}-{year}")
+        season = make_synthetic_season(
+            year,
+            games_per_season,
+            rng,
+            team_count=team_count,
+            include_timeline=include_timeline,
+        )
+        filename = os.path.join(json_base_path, f"nba_season_{year}.json.gz")
+        # mtime=0 keeps the files byte-identical between runs
+        with open(filename, "wb") as raw_fileobj:
+            with gzip.GzipFile(fileobj=raw_fileobj, mode="wb", mtime=0) as fileobj:
+                fileobj.write(json.dumps(season).encode("utf-8"))
+        filenames.append(filename)
+    return filenames
@@ -0,0 +1,30 @@
+# form_nba_chart_json_data_cli.py
+"""
+Entry point of the nbacc-charts console command.
+
+Running this file directly (python form_nba_chart_json_data_cli.py build ...)
+also works from a checkout where the package is not installed: the repository
+root is then put on the path so the package can be imported.
+"""
+
+import os
+import sys
+
+
+def main():
+    if not __package__:
+        repo_dir = os.path.dirname(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        if repo_dir not in sys.path:
+            sys.path.insert(0, repo_dir)
+
+    from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_chart_spec import (  # noqa: E501
+        main as chart_spec_main,
+    )
+
+    return chart_spec_main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
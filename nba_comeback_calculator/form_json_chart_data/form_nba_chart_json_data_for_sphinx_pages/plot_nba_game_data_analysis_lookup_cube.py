@@ -0,0 +1,53 @@
+# plot_nba_game_data_analysis_lookup_cube.py
+"""
+Script for building the precomputed win probability lookup cube.
+
+This script materializes win/loss counts and fitted probit lines for every
+standard era, game filter and time point into a single compressed file that
+WinProbabilityCube.load can query without reading any season files. The
+smooth sqrt-time win probability surfaces fit from the cube are written
+alongside it for lookups at arbitrary clock values.
+"""
+
+import sys
+import os
+
+# Put the repository root on the path, unless the package is installed
+script_dir = os.path.dirname(os.path.abspath(__file__))
+try:
+    import nba_comeback_calculator  # noqa: F401
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(script_dir))))
+
+# Import API functions
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api import (
+    WinProbabilityCube,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api import (
+    fit_cube_surfaces,
+    save_surfaces,
+)
+
+# Calculate script directory from __file__
+script_dir = os.path.dirname(os.path.abspath(__file__))
+print(f"Script directory: {script_dir}")
+
+# Base paths for input and output files
+json_base_path = "../../../docs/frontend/source/_static/json/seasons"
+cube_base_path = "../../../docs/frontend/source/_static/json/cube"
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api import (
+    ChartContext,
+)
+
+# Convert the relative paths to absolute paths
+json_base_path = os.path.abspath(os.path.join(script_dir, json_base_path))
+cube_base_path = os.path.abspath(os.path.join(script_dir, cube_base_path))
+
+os.makedirs(cube_base_path, exist_ok=True)
+
+cube = WinProbabilityCube.build(context=ChartContext(json_base_path))
+cube.save(f"{cube_base_path}/nbacc_lookup_cube.npz")
+
+surfaces = fit_cube_surfaces(cube)
+save_surfaces(f"{cube_base_path}/nbacc_win_probability_surfaces.json", surfaces)
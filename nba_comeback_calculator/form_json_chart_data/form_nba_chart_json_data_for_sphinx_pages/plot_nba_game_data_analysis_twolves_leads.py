@@ -8,16 +8,15 @@ and win probabilities, with a focus on the 2020-2018 seasons.
 import sys
 import os
 
-# Add the API directory to the path using relative path from script location
+# Put the repository root on the path, unless the package is installed
 script_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(script_dir)
-form_nba_chart_json_data_api_dir = os.path.join(
-    parent_dir, "form_nba_chart_json_data_api"
-)
-sys.path.append(form_nba_chart_json_data_api_dir)
+try:
+    import nba_comeback_calculator  # noqa: F401
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(script_dir))))
 
 # Import API functions
-from form_nba_chart_json_data_api import (
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api import (
     plot_biggest_deficit,
     plot_percent_versus_time,
     GameFilter,
@@ -27,9 +26,6 @@ from form_nba_chart_json_data_api import (
 script_dir = os.path.dirname(os.path.abspath(__file__))
 print(f"Script directory: {script_dir}")
 
-# Change working directory to the script's location
-os.chdir(script_dir)
-print(f"Working directory changed to: {os.getcwd()}")
 # Base paths for input and output files
 json_base_path = (
     "/Users/ajcarter/workspace/GIT_NBACC_GITHUB_IO/docs/_static/json/seasons"
@@ -38,11 +34,17 @@ chart_base_path = (
     "/Users/ajcarter/workspace/GIT_NBACC/docs/frontend/source/_static/json/charts"
 )
 
-import form_nba_chart_json_data_season_game_loader as loader
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api import (
+    ChartContext,
+    set_default_chart_context,
+)
 
-# Convert relative json_base_path to an absolute path
+# Convert the relative paths to absolute paths
 json_base_path = os.path.abspath(os.path.join(script_dir, json_base_path))
-loader.json_base_path = json_base_path
+chart_base_path = os.path.abspath(os.path.join(script_dir, chart_base_path))
+
+# The plot calls below read these seasons and write under this chart directory
+set_default_chart_context(ChartContext(json_base_path, chart_base_path))
 
 
 eras = [
@@ -177,8 +177,18 @@ class Games:
             team_stats[team]["rank"] = rank
             current_rank += 1
 
-    def to_json(self, filename):
-        """Export games data to a JSON file."""
+    def to_json(self, filename, include_timeline=False):
+        """
+        Export games data to a JSON file.
+
+        Parameters:
+        -----------
+        filename : str
+            Output path (a .gz suffix is added if missing)
+        include_timeline : bool
+            If True, also store the per-second point margin timeline for each
+            game alongside the bucketed point margins
+        """
         # Create the top-level dictionary structure
         season_data = {
             "season_year": self.start_year,
@@ -200,7 +210,9 @@ class Games:
 
         # Add each game to the games dictionary with game_id as key
         for game in self:
-            season_data["games"][game.game_id] = game.to_json()
+            season_data["games"][game.game_id] = game.to_json(
+                include_timeline=include_timeline
+            )
 
         # Write the data to a JSON file, using gzip if filename ends with .gz
         # Make sure filename ends with .gz
@@ -255,9 +267,9 @@ class Game:
         elif self.score_diff == 0:
             raise AssertionError("NBA games can't end in a tie")
 
-    def to_json(self):
+    def to_json(self, include_timeline=False):
         """Convert game data to a JSON-serializable dictionary."""
-        return {
+        game_data = {
             "game_date": self.game_date,
             "season_type": self.season_type,
             "season_year": self.season_year,
@@ -266,6 +278,9 @@ class Game:
             "score": self.score,
             "point_margins": self.score_stats_by_minute.point_margins,
         }
+        if include_timeline:
+            game_data["timeline"] = ScoreTimeline(self).timeline
+        return game_data
 
 
 class ScoreStat:
@@ -340,6 +355,55 @@ class ScoreStatsByMinute:
         return margins
 
 
+class ScoreTimeline:
+    """
+    Per-second point margin timeline for a game.
+
+    Unlike ScoreStatsByMinute, which buckets plays into the GAME_MINUTES
+    intervals, this keeps every change in point margin so the margin can be
+    queried at any second of regulation.
+    """
+
+    seconds_per_game = 48 * 60
+
+    def __init__(self, game):
+        """Collect (seconds_remaining, point_margin) events for a game."""
+        self.events = []
+        last_seconds = self.seconds_per_game
+        last_point_margin = 0
+        for play in game.play_by_plays:
+            time = float(play.time)
+            if time < 0:
+                continue
+            # Clock strings only resolve to whole seconds; clamp so that
+            # out-of-order plays never move the clock backwards.
+            seconds = min(int(round(time * 60.0)), last_seconds)
+            point_margin = play.home_score - play.away_score
+            if point_margin == last_point_margin:
+                continue
+            self.events.append((seconds, point_margin))
+            last_seconds = seconds
+            last_point_margin = point_margin
+
+    @property
+    def timeline(self):
+        """
+        Delta-encode the events as a flat list of integers.
+
+        The list holds [seconds_elapsed_since_last_event, margin_change, ...]
+        pairs, starting from the opening tip (48:00 remaining, margin 0).
+        """
+        timeline = []
+        last_seconds = self.seconds_per_game
+        last_point_margin = 0
+        for seconds, point_margin in self.events:
+            timeline.append(last_seconds - seconds)
+            timeline.append(point_margin - last_point_margin)
+            last_seconds = seconds
+            last_point_margin = point_margin
+        return timeline
+
+
 class PlayByPlays:
     """Collection of play-by-play events for a game."""
 
@@ -379,11 +443,16 @@ class PlayByPlay:
 # Define base path for output JSON files
 base_path = "../../docs/frontend/source/_static/json/seasons"
 
+# Store the optional per-second margin timeline in each game (larger files)
+include_timeline = False
+
 # Process each NBA season and create corresponding JSON files
 for year in range(2019, 2025, 1):
     print(f"Processing season {year}...")
     games = Games(cursor, start_year=year, stop_year=year)
-    games.to_json(f"{base_path}/nba_season_{year}.json.gz")
+    games.to_json(
+        f"{base_path}/nba_season_{year}.json.gz", include_timeline=include_timeline
+    )
 
 # Close the database connection
 con.close()
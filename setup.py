@@ -19,6 +19,12 @@ setup(
         "Operating System :: OS Independent",
     ],
     python_requires=">=3.8",
+    entry_points={
+        "console_scripts": [
+            "nbacc-charts=nba_comeback_calculator.form_json_chart_data."
+            "form_nba_chart_json_data_cli:main",
+        ],
+    },
     install_requires=[
         "numpy",
         "scipy",
@@ -27,4 +33,7 @@ setup(
         "matplotlib",
         "tqdm",
     ],
+    extras_require={
+        "yaml": ["pyyaml"],
+    },
 )
\ No newline at end of file
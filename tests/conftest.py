@@ -4,4 +4,22 @@ import sys
 import pytest
 
 # Add the project root directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
\ No newline at end of file
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture(scope="session")
+def synthetic_seasons(tmp_path_factory):
+    """Directory of small synthetic 2017 and 2018 season files, with timelines."""
+    from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api import (
+        write_synthetic_seasons,
+    )
+
+    json_base_path = str(tmp_path_factory.mktemp("seasons"))
+    write_synthetic_seasons(
+        json_base_path,
+        2017,
+        season_count=2,
+        games_per_season=150,
+        include_timeline=True,
+    )
+    return json_base_path
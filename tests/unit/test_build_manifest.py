@@ -0,0 +1,96 @@
+"""Unit tests for the incremental chart build manifest."""
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_api import (
+    GameFilter,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_build_manifest import (
+    BuildManifest,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_context import (
+    ChartContext,
+)
+
+
+def make_plot_function(calls):
+    def plot_biggest_deficit(json_name, year_groups, game_filters=None, **kwargs):
+        calls.append(json_name)
+        with open(f"{json_name}.gz", "w") as fileobj:
+            fileobj.write("chart")
+        return (f"Title {len(calls)}", ["years"], ["filters"])
+
+    return plot_biggest_deficit
+
+
+def write_season(tmp_path, year, text):
+    with open(tmp_path / f"nba_season_{year}.json.gz", "w") as fileobj:
+        fileobj.write(text)
+
+
+def test_unchanged_charts_are_skipped(tmp_path):
+    """Test that charts are rebuilt only when their inputs change."""
+    write_season(tmp_path, 2020, "2020")
+    write_season(tmp_path, 2021, "2021")
+    calls = []
+    plot_function = make_plot_function(calls)
+    manifest_name = str(tmp_path / "manifest.json")
+
+    def build(game_filter, year_groups=((2020, 2020), (2021, 2021))):
+        manifest = BuildManifest(manifest_name, ChartContext(str(tmp_path)))
+        kwargs = dict(year_groups=list(year_groups), game_filters=[game_filter])
+        result = manifest.run(
+            plot_function, json_name=str(tmp_path / "a.json"), **kwargs
+        )
+        manifest.run(
+            plot_function,
+            json_name=str(tmp_path / "b.json"),
+            year_groups=[(2020, 2020)],
+        )
+        manifest.save()
+        return result
+
+    assert build(GameFilter()) == ("Title 1", ["years"], ["filters"])
+    assert len(calls) == 2
+
+    # Nothing changed, the stored results are returned
+    assert build(GameFilter()) == ("Title 1", ["years"], ["filters"])
+    assert len(calls) == 2
+
+    # A new filter only rebuilds the chart that uses it
+    build(GameFilter(for_at_home=True))
+    assert calls[2:] == [str(tmp_path / "a.json")]
+
+    # A changed season only rebuilds the charts that read it
+    write_season(tmp_path, 2021, "2021 with one more game day")
+    build(GameFilter(for_at_home=True))
+    assert calls[3:] == [str(tmp_path / "a.json")]
+
+
+def test_group_is_rebuilt_together(tmp_path):
+    """Test that a group sharing a game table is rebuilt when one chart changes."""
+    write_season(tmp_path, 2020, "2020")
+    calls = []
+    plot_function = make_plot_function(calls)
+    manifest_name = str(tmp_path / "manifest.json")
+
+    for start_time, expected_calls in [(12, 2), (12, 2), (6, 4)]:
+        manifest = BuildManifest(manifest_name, ChartContext(str(tmp_path)))
+        manifest.run_group(
+            [
+                (
+                    plot_function,
+                    dict(
+                        json_name=str(tmp_path / "a.json"), year_groups=[(2020, 2020)]
+                    ),
+                ),
+                (
+                    plot_function,
+                    dict(
+                        json_name=str(tmp_path / "b.json"),
+                        year_groups=[(2020, 2020)],
+                        start_time=start_time,
+                    ),
+                ),
+            ]
+        )
+        manifest.save()
+        assert len(calls) == expected_calls
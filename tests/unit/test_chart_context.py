@@ -0,0 +1,97 @@
+"""Unit tests for the chart build context."""
+
+import gzip
+import json
+import multiprocessing
+import sys
+import threading
+
+import pytest
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_context import (
+    ChartContext,
+    get_chart_context,
+    get_pool_context,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_num import (
+    Num,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_season_game_loader import (
+    Season,
+)
+
+
+def write_season(season_dir, year, team_count):
+    season_dir.mkdir()
+    season = {
+        "season_year": year,
+        "team_count": team_count,
+        "teams": {},
+        "team_stats": {},
+        "games": {},
+    }
+    with gzip.open(season_dir / f"nba_season_{year}.json.gz", "wt") as fileobj:
+        json.dump(season, fileobj)
+
+
+def test_contexts_have_separate_seasons(tmp_path):
+    """Test that two contexts load the same season year from their own data."""
+    write_season(tmp_path / "a", 2020, 30)
+    write_season(tmp_path / "b", 2020, 2)
+    context_a = ChartContext(str(tmp_path / "a"))
+    context_b = ChartContext(str(tmp_path / "b"))
+
+    assert Season.get_season(2020, context_a).team_count == 30
+    assert Season.get_season(2020, context_b).team_count == 2
+    with context_b.activate():
+        assert Season.get_season(2020) is context_b.seasons[2020]
+    assert list(context_a.seasons) == [2020]
+
+
+def test_chart_contexts_do_not_interfere():
+    """Test that charts built in threads keep their own y axis transforms."""
+    context = ChartContext(None)
+    barrier = threading.Barrier(2)
+    results = {}
+
+    def build(y_axis):
+        with context.for_chart(y_axis).activate():
+            # Both threads have activated their context before either reads it
+            barrier.wait()
+            results[y_axis] = float(Num.PPF(0.25))
+
+    threads = [
+        threading.Thread(target=build, args=(y_axis,))
+        for y_axis in ["linear", "probit"]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results["linear"] == 0.25
+    assert results["probit"] == pytest.approx(-0.6744897501960817)
+    assert context.y_axis == "probit"
+    assert get_chart_context().y_axis == "probit"
+
+
+@pytest.mark.parametrize("y_axis", ["probit", "logit", "linear"])
+def test_transforms_apply_to_arrays(y_axis):
+    """Test that a transform of a whole array matches transforming each value."""
+    percents = [0.02, 0.25, 0.5, 0.9]
+    transform = Num.transform(y_axis)
+    sigmas = transform.ppf(percents)
+    assert sigmas.tolist() == [float(transform.ppf(p)) for p in percents]
+    assert transform.cdf(sigmas) == pytest.approx(percents)
+    with ChartContext(None).for_chart(y_axis).activate():
+        assert Num.transform() is transform
+
+
+@pytest.mark.parametrize("platform", ["linux", "darwin", "win32"])
+def test_pool_context_forks_only_on_linux(monkeypatch, platform):
+    """Test that worker pools keep the default start method off Linux."""
+    monkeypatch.setattr(sys, "platform", platform)
+    if platform == "linux":
+        assert get_pool_context().get_start_method() == "fork"
+    else:
+        assert get_pool_context() is multiprocessing.get_context()
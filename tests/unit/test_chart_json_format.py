@@ -0,0 +1,251 @@
+"""Unit tests for the chart JSON output formats and game tables."""
+
+import gzip
+import json
+import os
+
+import numpy as np
+from scipy.stats import binomtest
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_context import (
+    get_chart_context,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_plot_primitives import (
+    FinalPlot,
+    GameSummaryTable,
+    add_binomial_intervals,
+    from_columnar_chart_json,
+    read_chart_json,
+    round_json_floats,
+    to_columnar_chart_json,
+    write_if_changed,
+)
+
+
+class StaticLine:
+    def __init__(self, json_data):
+        self.json_data = json_data
+
+    def to_json(self, calculate_occurrences=False, game_table=None):
+        return self.json_data
+
+
+class StaticGame:
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.game_date = f"2024-01-{game_id}"
+
+    def get_game_summary_json_string(self):
+        return f"Game {self.game_id}"
+
+
+class GameLine:
+    """Line whose points sample games the way PointMarginPercent.to_json does."""
+
+    def __init__(self, game_ids):
+        self.games = [StaticGame(game_id) for game_id in game_ids]
+
+    def to_json(self, calculate_occurrences=False, game_table=None):
+        if game_table is None:
+            win_games = [
+                {
+                    "game_id": game.game_id,
+                    "game_date": game.game_date,
+                    "game_summary": game.get_game_summary_json_string(),
+                }
+                for game in self.games
+            ]
+        else:
+            win_games = [game_table.get_handle(game) for game in self.games]
+        return {"x_values": [0], "y_values": [{"y_value": 1.0, "win_games": win_games}]}
+
+
+class RandomLine:
+    """Line that draws from the chart context's sampling random generator."""
+
+    def to_json(self, calculate_occurrences=False, game_table=None):
+        return {
+            "x_values": [0],
+            "y_values": [{"y_value": get_chart_context().random.random()}],
+        }
+
+
+def make_chart_json():
+    return {
+        "title": "Test",
+        "lines": [
+            {
+                "legend": "Line",
+                "m": 0.123456789,
+                "x_values": [-2, -1],
+                "y_values": [
+                    {
+                        "win_count": 1,
+                        "sigma": np.float64(-1.23456789),
+                        "y_value": np.float64(-1.23456789),
+                        "x_value": -2,
+                        "win_games": [{"game_id": "1"}],
+                    },
+                    {
+                        "win_count": 3,
+                        "sigma": np.float64(0.5),
+                        "y_value": np.float64(0.5),
+                        "x_value": -1,
+                        "win_games": [],
+                        "percent": 0.75,
+                    },
+                ],
+            },
+            {"legend": "Guide", "x_values": [1], "y_values": [{"y_value": 2.0}]},
+        ],
+    }
+
+
+def test_columnar_round_trip():
+    """Test that the columnar format expands back to the point format."""
+    json_data = make_chart_json()
+    columnar = to_columnar_chart_json(json_data)
+    line = columnar["lines"][0]
+    assert columnar["format_version"] == 2
+    assert "y_values" not in line
+    assert line["column_aliases"] == {"y_value": "sigma", "x_value": "x_values"}
+    assert line["columns"]["percent"] == [None, 0.75]
+    assert from_columnar_chart_json(json.loads(json.dumps(columnar))) == json_data
+
+
+def test_round_json_floats():
+    """Test that floats are rounded and other values are left alone."""
+    rounded = round_json_floats(make_chart_json(), 3)
+    line = rounded["lines"][0]
+    assert line["m"] == 0.123
+    assert line["y_values"][0]["sigma"] == -1.235
+    assert line["y_values"][0]["win_count"] == 1
+    assert round_json_floats(make_chart_json(), None) == make_chart_json()
+
+
+def test_final_plot_writes_both_formats(tmp_path):
+    """Test that FinalPlot output reads back the same in either format."""
+    charts = {}
+    for json_format in ["points", "columnar"]:
+        final_plot = FinalPlot(
+            plot_type="time_v_point_margin",
+            title="Test",
+            x_label="x",
+            y_label="y",
+            y_ticks=[0],
+            y_tick_labels=[0],
+            min_x=0,
+            max_x=1,
+            lines=[StaticLine(line) for line in make_chart_json()["lines"]],
+            json_name=str(tmp_path / f"{json_format}.json"),
+            json_format=json_format,
+            float_digits=4,
+        )
+        final_plot.to_json()
+        charts[json_format] = read_chart_json(final_plot.json_name)
+
+    assert charts["points"] == charts["columnar"]
+    assert "json_format" not in charts["points"]
+    assert charts["points"]["lines"][0]["y_values"][0]["sigma"] == -1.2346
+
+
+def test_binomial_intervals():
+    """Test the bulk point intervals against scipy's scalar intervals."""
+    counts = [(0, 3), (1, 2), (3, 0), (5, 35), (40, 10)]
+    json_lines = [
+        {
+            "y_values": [
+                {"win_count": win_count, "loss_count": loss_count}
+                for win_count, loss_count in counts
+            ]
+        },
+        {"y_values": [{"y_value": 2.0}]},
+    ]
+    add_binomial_intervals(json_lines, 0.9)
+
+    assert json_lines[1]["y_values"] == [{"y_value": 2.0}]
+    for point, (win_count, loss_count) in zip(json_lines[0]["y_values"], counts):
+        test = binomtest(win_count, win_count + loss_count)
+        for method, key in [("wilson", "wilson"), ("exact", "clopper_pearson")]:
+            interval = test.proportion_ci(confidence_level=0.9, method=method)
+            assert abs(point[f"{key}_lower"] - interval.low) < 1e-12
+            assert abs(point[f"{key}_upper"] - interval.high) < 1e-12
+
+
+def test_game_summary_table_handles():
+    """Test that games are added to the table once."""
+    game_table = GameSummaryTable()
+    handles = [game_table.get_handle(StaticGame(game_id)) for game_id in "1213"]
+    assert handles == [0, 1, 0, 2]
+    assert len(game_table) == 3
+    assert game_table.games[1]["game_summary"] == "Game 2"
+
+
+def test_final_plot_game_tables(tmp_path):
+    """Test that embedded and shared game tables read back like inline games."""
+
+    def write_chart(name, game_table):
+        final_plot = FinalPlot(
+            plot_type="time_v_point_margin",
+            title="Test",
+            x_label="x",
+            y_label="y",
+            y_ticks=[0],
+            y_tick_labels=[0],
+            min_x=0,
+            max_x=1,
+            lines=[GameLine("12"), GameLine("23")],
+            json_name=str(tmp_path / "charts" / f"{name}.json"),
+            game_table=game_table,
+        )
+        final_plot.to_json()
+        return final_plot.json_name
+
+    inline = read_chart_json(write_chart("inline", None))
+    embedded_name = write_chart("embedded", GameSummaryTable())
+    shared_table = GameSummaryTable(str(tmp_path / "game_table.json"))
+    shared_name = write_chart("shared", shared_table)
+    shared_table.save()
+
+    with open(shared_name, "rb") as fileobj:
+        assert b"Game 1" not in gzip.decompress(fileobj.read())
+    assert read_chart_json(embedded_name) == inline
+    assert read_chart_json(shared_name) == inline
+
+
+def test_final_plot_seed_ignores_gz_suffix(tmp_path):
+    """Test that a chart samples the same games whether named with .gz or not."""
+    charts = []
+    for directory, json_name in [("plain", "chart.json"), ("gz", "chart.json.gz")]:
+        final_plot = FinalPlot(
+            plot_type="time_v_point_margin",
+            title="Test",
+            x_label="x",
+            y_label="y",
+            y_ticks=[0],
+            y_tick_labels=[0],
+            min_x=0,
+            max_x=1,
+            lines=[RandomLine()],
+            json_name=str(tmp_path / directory / json_name),
+        )
+        final_plot.to_json()
+        assert final_plot.json_name.endswith("chart.json.gz")
+        charts.append(read_chart_json(final_plot.json_name))
+    assert charts[0] == charts[1]
+
+
+def test_write_if_changed(tmp_path):
+    """Test that unchanged content is not rewritten and gzip output is stable."""
+    filename = str(tmp_path / "chart.json.gz")
+    assert write_if_changed(filename, '{"a": 1}')
+    with open(filename, "rb") as fileobj:
+        data = fileobj.read()
+    assert not write_if_changed(filename, '{"a": 1}')
+    assert write_if_changed(filename, '{"a": 2}')
+    assert write_if_changed(filename, '{"a": 1}')
+    with open(filename, "rb") as fileobj:
+        assert fileobj.read() == data
+    # Written through a uniquely named temporary file, which is not left over
+    assert os.listdir(tmp_path) == ["chart.json.gz"]
+    assert os.stat(filename).st_mode & 0o777 == 0o644
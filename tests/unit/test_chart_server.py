@@ -0,0 +1,97 @@
+"""Unit tests for the local chart query server request handling."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_api import (
+    GameFilter,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_lookup_cube import (
+    WinProbabilityCube,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_plot_primitives import (
+    read_chart_json,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_season_game_loader import (
+    GAME_MINUTES,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_server import (
+    ChartClient,
+    ChartServer,
+    create_http_server,
+    decode_chart_kwargs,
+    encode_chart_kwargs,
+)
+
+
+def test_chart_kwargs_round_trip():
+    """Test that GameFilters and year groups survive JSON encoding."""
+    kwargs = encode_chart_kwargs(
+        {
+            "year_groups": [(2017, 2024)],
+            "game_filters": [None, GameFilter(for_team_abbr="MIN", for_at_home=False)],
+        }
+    )
+    decoded = decode_chart_kwargs(kwargs)
+    assert decoded["year_groups"] == [(2017, 2024)]
+    assert decoded["game_filters"][0] is None
+    game_filter = decoded["game_filters"][1]
+    assert game_filter.for_team_abbr == ["MIN"]
+    assert game_filter.for_at_home is False
+    assert (
+        game_filter.get_signature()
+        == GameFilter(for_team_abbr="MIN", for_at_home=False).get_signature()
+    )
+
+
+def test_dispatch_unknown_command(tmp_path):
+    """Test that unknown commands and lookups without a cube are rejected."""
+    server = ChartServer(str(tmp_path))
+    with pytest.raises(ValueError):
+        server.dispatch("not_a_command", {})
+    with pytest.raises(ValueError):
+        server.dispatch("lookup", {"times": [6], "margins": [-5]})
+    assert server.dispatch("ping", {}) == {"seasons": []}
+
+
+def test_client_server_round_trip(synthetic_seasons, tmp_path):
+    """Test lookup and chart requests sent over HTTP to a served ChartServer."""
+    counts = np.zeros((1, 1, len(GAME_MINUTES), 5, 2), dtype=np.int32)
+    counts[0, 0, GAME_MINUTES.index(6), 0] = (1, 9)
+    m = np.full((1, 1, len(GAME_MINUTES)), 0.5)
+    b = np.zeros((1, 1, len(GAME_MINUTES)))
+    cube_filename = str(tmp_path / "cube.npz")
+    WinProbabilityCube(counts, m, b, ["2017-2018"], ["all"], -2).save(cube_filename)
+
+    httpd = create_http_server(ChartServer(synthetic_seasons, cube_filename), port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = ChartClient(port=httpd.server_address[1], timeout=60.0)
+        result = client.lookup([6, 6], [-2, -1])
+        assert result["win_count"] == [1, 0]
+        assert result["loss_count"] == [9, 0]
+        assert result["percent"] == [pytest.approx(0.1), None]
+
+        json_name = str(tmp_path / "charts" / "down_max_24.json")
+        title, game_years_strings, game_filter_strings = client.plot_biggest_deficit(
+            json_name=json_name,
+            year_groups=[(2017, 2018)],
+            start_time=24,
+            down_mode="max",
+            game_filters=[GameFilter(for_at_home=True)],
+        )
+        assert title.startswith("Max Points Down During 2nd Half")
+        assert len(game_years_strings) == len(game_filter_strings) == 1
+        chart = read_chart_json(f"{json_name}.gz")
+        assert chart["title"] == title
+        assert len(chart["lines"]) == 1
+
+        with pytest.raises(RuntimeError):
+            client.request("not_a_command")
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        thread.join()
@@ -0,0 +1,92 @@
+"""Unit tests for chart spec files and the batch runner."""
+
+import json
+import os
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api import (
+    form_nba_chart_json_data_plot_pages as plot_pages_module,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_chart_spec import (
+    load_chart_spec,
+    run_chart_spec,
+)
+
+
+def plot_biggest_deficit(
+    json_name, year_groups, start_time, game_filters=None, **kwargs
+):
+    os.makedirs(os.path.dirname(json_name), exist_ok=True)
+    with open(f"{json_name}.gz", "w") as fileobj:
+        fileobj.write(str(start_time))
+    filter_strings = [str(game_filter) for game_filter in game_filters or []]
+    return (f"Down At {start_time} (100 Games)", ["years"], filter_strings)
+
+
+def write_spec(tmp_path):
+    spec = {
+        "seasons": "seasons",
+        "charts": "out/charts",
+        "rst": "out/rst",
+        "filters": {"home": {"for_at_home": True}},
+        "pages": [
+            {
+                "name": "late",
+                "title": "Late Deficits",
+                "year_groups": [[2020, 2020]],
+                "game_filters": ["home"],
+                "charts": [
+                    {
+                        "id": "down_at_6",
+                        "kind": "biggest_deficit",
+                        "section": "Points Down At Time",
+                        "start_time": 6,
+                        "down_mode": "at",
+                    },
+                    {
+                        "id": "down_at_1",
+                        "kind": "biggest_deficit",
+                        "section": "Points Down At Time",
+                        "title": "Last Minute",
+                        "start_time": 1,
+                        "down_mode": "at",
+                        "game_filters": [None],
+                    },
+                ],
+            }
+        ],
+    }
+    (tmp_path / "seasons").mkdir()
+    with open(tmp_path / "spec.json", "w") as fileobj:
+        json.dump(spec, fileobj)
+    return str(tmp_path / "spec.json")
+
+
+def test_run_chart_spec(tmp_path, monkeypatch):
+    """Test that a spec page is built, written as RST and skipped when current."""
+    monkeypatch.setitem(
+        plot_pages_module.PLOT_FUNCTIONS, "biggest_deficit", plot_biggest_deficit
+    )
+    spec = load_chart_spec(write_spec(tmp_path))
+    assert spec["charts"] == str(tmp_path / "out" / "charts")
+    # The manifest is kept next to the spec, outside the published charts
+    assert spec["manifest"] == str(tmp_path / ".nbacc_build_manifest.json")
+
+    manifest = run_chart_spec(spec, workers=1)
+    assert manifest.built_count == 2
+    assert (tmp_path / ".nbacc_build_manifest.json").exists()
+    assert not list((tmp_path / "out").rglob("*manifest*"))
+
+    with open(tmp_path / "out" / "rst" / "late.rst") as fileobj:
+        rst = fileobj.read()
+    assert rst.startswith("*************\nLate Deficits\n*************\n\n")
+    assert rst.count("Points Down At Time\n===") == 1
+    assert "Down At 6\n---------\n" in rst
+    assert "Last Minute\n" in rst
+    assert '<div id="plots/late/down_at_6" class="nbacc-chart">' in rst
+    assert (
+        tmp_path / "out" / "charts" / "plots" / "late" / "down_at_1.json.gz"
+    ).exists()
+
+    manifest = run_chart_spec(load_chart_spec(str(tmp_path / "spec.json")), workers=1)
+    assert manifest.built_count == 0
+    assert manifest.skipped_count == 2
@@ -0,0 +1,128 @@
+"""Unit tests for the bootstrap confidence bands of fit lines."""
+
+import numpy as np
+import pytest
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_api import (
+    plot_biggest_deficit,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_bootstrap import (
+    bootstrap_probit_fits,
+    fit_probit_counts,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_context import (
+    ChartContext,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_num import (
+    Num,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_plot_primitives import (
+    read_chart_json,
+)
+
+POINT_MARGIN_COUNTS = [(-12, 1, 30), (-9, 4, 40), (-6, 10, 35), (-3, 25, 30)]
+
+
+def test_batch_fit_matches_mle():
+    """Test that the batch Fisher scoring fit finds the scipy maximum likelihood fit."""
+    X = []
+    Y = []
+    for point_margin, win_count, loss_count in POINT_MARGIN_COUNTS:
+        X.extend([point_margin] * (win_count + loss_count))
+        Y.extend([1] * win_count + [0] * loss_count)
+    mle = Num.fit_it_mle(Num.array(X), Num.array(Y), "probit", 0.1, 0.0)
+
+    counts = np.array(POINT_MARGIN_COUNTS, dtype=float)
+    fits = fit_probit_counts(
+        counts[:, 0],
+        counts[None, :, 1],
+        counts[None, :, 1] + counts[None, :, 2],
+        0.1,
+        0,
+    )
+    assert fits["converged"].all()
+    assert abs(fits["m"][0] - mle["m"]) < 1e-5
+    assert abs(fits["b"][0] - mle["b"]) < 1e-4
+
+    logit_mle = Num.fit_it_mle(Num.array(X), Num.array(Y), "logit", 0.1, 0.0)
+    logit_fits = fit_probit_counts(
+        counts[:, 0],
+        counts[None, :, 1],
+        counts[None, :, 1] + counts[None, :, 2],
+        0.1,
+        0,
+        link="logit",
+    )
+    assert logit_fits["converged"].all()
+    assert abs(logit_fits["m"][0] - logit_mle["m"]) < 1e-4
+    assert abs(logit_fits["b"][0] - logit_mle["b"]) < 1e-3
+
+    for method in ["parametric", "nonparametric"]:
+        replicates = bootstrap_probit_fits(
+            POINT_MARGIN_COUNTS, mle["m"], mle["b"], replicates=500, method=method
+        )
+        assert len(replicates["m"]) > 450
+        assert abs(np.median(replicates["m"]) - mle["m"]) < 0.02
+        # Seeded from the counts
+        again = bootstrap_probit_fits(
+            POINT_MARGIN_COUNTS, mle["m"], mle["b"], replicates=500, method=method
+        )
+        assert np.array_equal(replicates["m"], again["m"])
+
+
+def test_chart_confidence_band(synthetic_seasons, tmp_path):
+    """Test that a chart's lines get a band around their fit line."""
+    context = ChartContext(synthetic_seasons)
+    for json_format in ["points", "columnar"]:
+        json_name = str(tmp_path / json_format / "down_at_24.json")
+        plot_biggest_deficit(
+            json_name,
+            [(2017, 2018)],
+            24,
+            "at",
+            json_format=json_format,
+            confidence_band={"replicates": 200, "level": 0.9},
+            context=context,
+        )
+        line = read_chart_json(f"{json_name}.gz")["lines"][0]
+        band = line["confidence_band"]
+        assert band["replicates"] == 200
+        assert band["method"] == "parametric"
+        assert 0 < band["fit_replicates"] <= 200
+
+        fit_values = line["m"] * np.array(line["x_values"]) + line["b"]
+        assert len(band["lower"]) == len(band["upper"]) == len(fit_values)
+        assert (np.array(band["lower"]) < fit_values).all()
+        assert (fit_values < np.array(band["upper"])).all()
+
+
+def test_logit_chart_confidence_band(synthetic_seasons, tmp_path):
+    """Test that a logit chart's band is drawn and refit with the logit link."""
+    context = ChartContext(synthetic_seasons)
+    json_name = str(tmp_path / "down_max_24.json")
+    plot_biggest_deficit(
+        json_name,
+        [(2017, 2018)],
+        24,
+        "max",
+        use_logit=True,
+        confidence_band={"replicates": 200},
+        context=context,
+    )
+    line = read_chart_json(f"{json_name}.gz")["lines"][0]
+    band = line["confidence_band"]
+    assert band["fit_replicates"] == 200
+    fit_values = line["m"] * np.array(line["x_values"]) + line["b"]
+    assert (np.array(band["lower"]) < fit_values).all()
+    assert (fit_values < np.array(band["upper"])).all()
+
+    with pytest.raises(ValueError):
+        plot_biggest_deficit(
+            str(tmp_path / "linear" / "down_max_24.json"),
+            [(2017, 2018)],
+            24,
+            "max",
+            linear_y_axis=True,
+            confidence_band=True,
+            context=context,
+        )
@@ -0,0 +1,83 @@
+"""Unit tests for the empirical Bayes shrinkage of filtered lines."""
+
+import numpy as np
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_api import (
+    GameFilter,
+    plot_biggest_deficit,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_context import (
+    ChartContext,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_empirical_bayes import (
+    ShrinkagePrior,
+    get_team_counts,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_plot_primitives import (
+    PointsDownLine,
+    read_chart_json,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_season_game_loader import (
+    Games,
+)
+
+
+def test_team_counts_match_team_filters(synthetic_seasons):
+    """Test the one pass team counts against the point margin map of each team."""
+    context = ChartContext(synthetic_seasons)
+    games = Games.get_games(2017, 2018, context=context)
+    table = games.get_point_margin_table(24, "at")
+    point_margins, win_counts, game_counts = get_team_counts(games, table, False)
+
+    teams = sorted({game.home_team_abbr for game in games})
+    assert win_counts.shape == (len(teams), len(point_margins))
+    for team_index, team in enumerate(teams):
+        point_margin_map = PointsDownLine.get_point_margin_map(
+            games, GameFilter(for_team_abbr=team), 24, "at"
+        )
+        for point_margin, data in point_margin_map.items():
+            margin_index = point_margins.tolist().index(point_margin)
+            assert win_counts[team_index, margin_index] == len(data.wins)
+            assert game_counts[team_index, margin_index] == len(data.wins) + len(
+                data.losses
+            )
+    assert game_counts.sum() == 2 * len(games)
+
+    prior = games.get_shrinkage_prior(24, "at", False)
+    assert games.get_shrinkage_prior(24, "at", False) is prior
+    assert prior.concentration > 0
+
+
+def test_shrink_toward_prior(synthetic_seasons, tmp_path):
+    """Test the posterior means and the chart fields of a shrunk line."""
+    prior = ShrinkagePrior([-10, 0], [0.1, 0.5], 20.0)
+    shrunk = prior.shrink([-10, -5, 0], [0, 2, 30], [0, 10, 30])
+    np.testing.assert_allclose(shrunk, [0.1, (2 + 20 * 0.3) / 30, (30 + 10) / 50])
+
+    context = ChartContext(synthetic_seasons)
+    lines = []
+    for empirical_bayes in [False, True]:
+        json_name = str(tmp_path / str(empirical_bayes) / "down_max_24.json")
+        plot_biggest_deficit(
+            json_name,
+            [(2017, 2018)],
+            24,
+            "max",
+            game_filters=[GameFilter(for_rank="top_10"), GameFilter()],
+            empirical_bayes=empirical_bayes,
+            context=context,
+        )
+        lines.append(read_chart_json(f"{json_name}.gz")["lines"])
+    # The all-games line is the prior's own data, so it is not shrunk
+    assert "empirical_bayes" not in lines[1][1]
+    assert "shrunk_percent" not in lines[1][1]["y_values"][0]
+    lines = [chart_lines[0] for chart_lines in lines]
+    line = lines[1]
+    assert line["empirical_bayes"]["concentration"] > 0
+    # Shrinking only adds fields, the fit and the plotted points are the same
+    assert (line["m"], line["b"]) == (lines[0]["m"], lines[0]["b"])
+    for point, other_point in zip(line["y_values"], lines[0]["y_values"]):
+        assert point["percent"] == other_point["percent"]
+        assert point["y_value"] == other_point["y_value"]
+        assert "shrunk_percent" not in other_point
+        assert 0 <= point["shrunk_percent"] <= 1
@@ -0,0 +1,67 @@
+"""Unit tests for the chart engine equivalence harness."""
+
+import functools
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_api import (
+    plot_biggest_deficit,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_equivalence import (
+    REFERENCE_ENGINE,
+    ChartEngine,
+    diff_chart_json,
+    get_comparison_chart_calls,
+    run_equivalence,
+)
+
+
+def test_diff_chart_json_tolerances():
+    """Test that fitted values get the fit tolerance and counts must match."""
+    reference = {"m": 0.1, "y_values": [{"win_count": 3, "percent": 0.25}]}
+    close = {"m": 0.1 + 1e-9, "y_values": [{"win_count": 3, "percent": 0.25}]}
+    assert diff_chart_json(reference, close) == []
+
+    different = {"m": 0.1, "y_values": [{"win_count": 4, "percent": 0.25 + 1e-9}]}
+    assert [
+        difference.path for difference in diff_chart_json(reference, different)
+    ] == [
+        "y_values[0].percent",
+        "y_values[0].win_count",
+    ]
+    assert diff_chart_json([1, 2], [1])[0].path == ".length"
+
+
+def test_run_equivalence(synthetic_seasons, tmp_path):
+    """Test that a same engine matches and a logit engine is reported."""
+    chart_calls = [
+        (kind, kwargs)
+        for kind, kwargs in get_comparison_chart_calls([(2017, 2018)])
+        if kwargs["json_name"].endswith(
+            ("down_at_24.json", "percent_plot_1_percent.json")
+        )
+    ]
+    assert len(chart_calls) == 2
+    engines = [
+        REFERENCE_ENGINE,
+        ChartEngine("same", {"biggest_deficit": plot_biggest_deficit}),
+        ChartEngine(
+            "logit",
+            {
+                "biggest_deficit": functools.partial(
+                    plot_biggest_deficit, use_logit=True
+                )
+            },
+        ),
+    ]
+    report = run_equivalence(chart_calls, synthetic_seasons, engines, str(tmp_path))
+
+    down_at_24 = report.differences["plots/equivalence/down_at_24.json"]
+    assert down_at_24["same"] == []
+    assert {"lines[0].m", "lines[0].b"} <= {
+        difference.path for difference in down_at_24["logit"]
+    }
+    assert (
+        report.differences["plots/equivalence/percent_plot_1_percent.json"]["logit"]
+        == []
+    )
+    assert not report.ok
+    assert set(report.to_json()["charts"]) == set(report.seconds)
@@ -0,0 +1,136 @@
+"""Unit tests for the persistent line fit cache."""
+
+import os
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api import (
+    form_nba_chart_json_data_fit_cache as fit_cache_module,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api import (
+    form_nba_chart_json_data_plot_primitives as plot_primitives_module,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_api import (
+    plot_biggest_deficit,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_context import (
+    ChartContext,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_plot_primitives import (
+    PointsDownLine,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_season_game_loader import (
+    Games,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_fit_cache import (
+    FitCache,
+    get_environment_fit_cache,
+    get_fit_key,
+)
+
+
+def test_fit_cache_entries(tmp_path):
+    """Test keys, the round trip of a fit and least recently used pruning."""
+    counts = [(-10, 1, 20), (-9, 3, 18)]
+    key = get_fit_key(counts, -9, "probit")
+    assert key == get_fit_key(list(counts), -9.0, "probit")
+    assert key != get_fit_key(counts, -9, "logit")
+    assert key != get_fit_key([(-10, 2, 19), (-9, 3, 18)], -9, "probit")
+
+    cache = FitCache(str(tmp_path / "cache"), max_entries=2)
+    assert cache.get(key) is None
+    fit = {"m": 0.123456789012345, "b": -1.5, "iterations": 7, "converged": True}
+    cache.put(key, fit)
+    assert cache.get(key) == fit
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    other_keys = [get_fit_key(counts, point, "probit") for point in (-8, -7)]
+    for index, other_key in enumerate(other_keys):
+        cache.put(other_key, fit)
+        os.utime(cache.get_filename(other_key), (index, index))
+    assert cache.prune() == 1
+    assert cache.get(other_keys[0]) is None
+    assert cache.get(key) == fit
+
+
+def test_environment_fit_cache_is_pruned(tmp_path, monkeypatch):
+    """Test that the NBACC_FIT_CACHE cache is pruned when a process first uses it."""
+    pruned_dirs = []
+    monkeypatch.setattr(
+        FitCache, "prune", lambda cache: pruned_dirs.append(cache.cache_dir)
+    )
+    monkeypatch.setattr(fit_cache_module, "_environment_fit_cache", None)
+    monkeypatch.setenv("NBACC_FIT_CACHE", str(tmp_path / "cache"))
+    cache = get_environment_fit_cache()
+    assert get_environment_fit_cache() is cache
+    assert ChartContext(None).fit_cache is cache
+    assert pruned_dirs == [cache.cache_dir]
+
+
+def test_cached_fits_build_the_same_chart(synthetic_seasons, tmp_path):
+    """Test that a chart built from cached fits is identical and skips the fits."""
+    cache = FitCache(str(tmp_path / "cache"))
+    outputs = []
+    for name in ["cold", "warm"]:
+        json_name = str(tmp_path / name / "down_at_24.json")
+        plot_biggest_deficit(
+            json_name,
+            [(2017, 2018)],
+            24,
+            "at",
+            cumulate=True,
+            context=ChartContext(synthetic_seasons, fit_cache=cache),
+        )
+        with open(f"{json_name}.gz", "rb") as fileobj:
+            outputs.append(fileobj.read())
+
+    assert outputs[0] == outputs[1]
+    assert cache.hits > 0
+    assert cache.hits == cache.misses
+
+
+def test_warm_started_fits_use_the_cache(synthetic_seasons, tmp_path):
+    """Test that a fit started from another line's fit hits the cached fit."""
+    cache = FitCache(str(tmp_path / "cache"))
+    context = ChartContext(synthetic_seasons, fit_cache=cache)
+    with context.activate():
+        games = Games.get_games(start_year=2017, stop_year=2018, context=context)
+        lines = [
+            PointsDownLine(
+                games, None, 24, "at", fit_max_points="10%", fit_start=fit_start
+            )
+            for fit_start in [None, (0.2, 1.0)]
+        ]
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert (lines[1].m, lines[1].b) == (lines[0].m, lines[0].b)
+
+
+def test_fit_cache_keys_the_link_function(synthetic_seasons, tmp_path, monkeypatch):
+    """Test that fits are keyed by the chart's link, so axes never share fits."""
+    models = []
+
+    def spy_fit_key(point_margin_counts, max_fit_point, model):
+        models.append(model)
+        return get_fit_key(point_margin_counts, max_fit_point, model)
+
+    monkeypatch.setattr(plot_primitives_module, "get_fit_key", spy_fit_key)
+    cache = FitCache(str(tmp_path / "cache"))
+    outputs = {}
+    for name, fit_cache, use_logit in [
+        ("probit", cache, False),
+        ("logit", cache, True),
+        ("logit_uncached", None, True),
+    ]:
+        json_name = str(tmp_path / name / "down_at_24.json")
+        plot_biggest_deficit(
+            json_name,
+            [(2017, 2018)],
+            24,
+            "at",
+            use_logit=use_logit,
+            context=ChartContext(synthetic_seasons, fit_cache=fit_cache),
+        )
+        with open(f"{json_name}.gz", "rb") as fileobj:
+            outputs[name] = fileobj.read()
+
+    assert set(models) == {"probit", "logit"}
+    assert cache.hits == 0
+    assert outputs["logit"] == outputs["logit_uncached"]
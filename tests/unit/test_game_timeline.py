@@ -0,0 +1,55 @@
+"""Unit tests for the per-second GameTimeline."""
+
+import pytest
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_season_game_loader import (
+    GameTimeline,
+    get_seconds_remaining,
+)
+
+
+def make_timeline():
+    # 48:00 tip, home up 2 at 47:30, away up 1 at 30:00, home up 10 at 7:30,
+    # home up 4 at 2:15 (final margin)
+    return GameTimeline.from_json([30, 2, 1050, -3, 1350, 11, 315, -6])
+
+
+def test_get_seconds_remaining():
+    """Test that minutes, seconds strings and clock strings are supported."""
+    assert get_seconds_remaining(48) == 2880
+    assert get_seconds_remaining(6) == 360
+    assert get_seconds_remaining("45s") == 45
+    assert get_seconds_remaining("7:30") == 450
+    assert get_seconds_remaining(2.25) == 135
+    with pytest.raises(ValueError):
+        get_seconds_remaining(49)
+
+
+def test_timeline_decodes_delta_encoding():
+    """Test that the delta-encoded pairs decode to absolute events."""
+    timeline = make_timeline()
+    assert timeline.point_margins == [0, 2, -1, 10, 4]
+    assert timeline.elapsed_seconds == [0, 30, 1080, 2430, 2745]
+
+
+def test_timeline_margin_at():
+    """Test that margin_at returns the margin after the last change."""
+    timeline = make_timeline()
+    assert timeline.margin_at(2880) == 0
+    assert timeline.margin_at(2850) == 2
+    assert timeline.margin_at(2000) == 2
+    assert timeline.margin_at(1800) == -1
+    assert timeline.margin_at(get_seconds_remaining("7:30")) == 10
+    assert timeline.margin_at(get_seconds_remaining("2:15")) == 4
+    assert timeline.margin_at(0) == 4
+
+
+def test_timeline_margin_range_since():
+    """Test the margin extremes from a time to the end of the game."""
+    timeline = make_timeline()
+    assert timeline.margin_range_since(2880) == (0, -1, 10)
+    assert timeline.margin_range_since(1800) == (-1, -1, 10)
+    assert timeline.margin_range_since(450) == (10, 4, 10)
+    assert timeline.max_deficit_since(2880, for_home_team=True) == -1
+    assert timeline.max_deficit_since(2880, for_home_team=False) == -10
+    assert timeline.max_deficit_since(450, for_home_team=True) == 4
@@ -1,23 +1,56 @@
 """Unit tests for the GameFilter class."""
+
 import pytest
 
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_api import (
+    GameFilter,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_context import (
+    ChartContext,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_season_game_loader import (
+    Games,
+)
+
+
+@pytest.fixture
+def games(synthetic_seasons):
+    return Games.get_games(2017, 2018, context=ChartContext(synthetic_seasons))
+
 
 def test_gamefilter_initialization():
     """Test that GameFilter initializes with the correct attributes."""
-    # This is a placeholder test that will be implemented
-    # once the actual GameFilter class is migrated to the package
-    pass
+    game_filter = GameFilter(
+        for_at_home=True, for_team_abbr="BOS, LAL", vs_rank="top_5"
+    )
+    assert game_filter.for_team_abbr == ["BOS", "LAL"]
+    assert game_filter.vs_at_home is False
+    assert GameFilter(**game_filter.to_json()).get_signature() == (
+        game_filter.get_signature()
+    )
+    assert game_filter.get_filter_string() == "For BOS, LAL @ Home Plays Top 5"
 
 
 def test_gamefilter_validation():
     """Test that GameFilter validates input parameters correctly."""
-    # This is a placeholder test that will be implemented
-    # once the actual GameFilter class is migrated to the package
-    pass
+    with pytest.raises(ValueError):
+        GameFilter(for_rank="top_5", for_team_abbr="BOS")
+    with pytest.raises(ValueError):
+        GameFilter(vs_rank="bot_10", vs_team_abbr="BOS")
 
 
-def test_gamefilter_is_match():
+def test_gamefilter_is_match(games):
     """Test that GameFilter's is_match method filters games correctly."""
-    # This is a placeholder test that will be implemented
-    # once the actual GameFilter class is migrated to the package
-    pass
\ No newline at end of file
+    home = GameFilter(for_at_home=True)
+    for game in games:
+        home_won = game.score_diff > 0
+        assert home.is_match(game, is_win=True) == home_won
+        assert home.is_match(game, is_win=False) == (not home_won)
+
+    top_5 = GameFilter(for_rank="top_5")
+    winners = [
+        game.home_team_rank if game.score_diff > 0 else game.away_team_rank
+        for game in games
+        if top_5.is_match(game, is_win=True)
+    ]
+    assert winners and all(rank <= 5 for rank in winners)
@@ -0,0 +1,54 @@
+"""Unit tests for the lazy imports of the chart API package."""
+
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PACKAGE = "nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api"
+
+
+def get_imported_modules(code):
+    """Run code in a fresh interpreter, returning the names of the imported modules."""
+    script = f"import sys\n{code}\nprint(' '.join(sorted(sys.modules)))"
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=REPO_DIR,
+    ).stdout
+    return set(output.split())
+
+
+def test_chart_modules_do_not_import_scipy():
+    """Test that importing the package and the build modules leaves scipy out."""
+    modules = get_imported_modules(
+        f"import {PACKAGE}.form_nba_chart_json_data_chart_spec\n"
+        f"import {PACKAGE}.form_nba_chart_json_data_lookup_cube\n"
+        f"import {PACKAGE}.form_nba_chart_json_data_server\n"
+        f"import {PACKAGE}.form_nba_chart_json_data_surface\n"
+        f"from {PACKAGE} import ChartContext, GameFilter, plot_biggest_deficit\n"
+        "ChartContext(None).set_y_axis('logit')"
+    )
+    assert f"{PACKAGE}.form_nba_chart_json_data_api" in modules
+    assert "scipy" not in modules
+
+
+def test_lazy_package_exports():
+    """Test that the package names resolve to their submodule definitions."""
+    modules = get_imported_modules(f"import {PACKAGE}")
+    assert f"{PACKAGE}.form_nba_chart_json_data_context" not in modules
+
+    from nba_comeback_calculator.form_json_chart_data import (
+        form_nba_chart_json_data_api as package,
+    )
+    from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_context import (  # noqa: E501
+        ChartContext,
+    )
+
+    assert package.ChartContext is ChartContext
+    assert set(package.__all__) <= set(dir(package))
+    for name in package.__all__:
+        assert getattr(package, name) is not None
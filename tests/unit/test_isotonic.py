@@ -0,0 +1,59 @@
+"""Unit tests for the isotonic smoothing of win percents."""
+
+import numpy as np
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_api import (
+    plot_biggest_deficit,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_context import (
+    ChartContext,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_isotonic import (
+    IsotonicCurve,
+    pool_adjacent_violators,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_plot_primitives import (
+    read_chart_json,
+)
+
+
+def test_pool_adjacent_violators():
+    """Test the pooled means, weights and lookups of an isotonic curve."""
+    assert pool_adjacent_violators([1, 3, 2, 4], [1, 1, 1, 1]).tolist() == [
+        1,
+        2.5,
+        2.5,
+        4,
+    ]
+    # The 1 of weight 3 pulls the pooled block down to (3 * 1 + 1 * 5) / 4
+    assert pool_adjacent_violators([5, 1, 6], [1, 3, 1]).tolist() == [2, 2, 6]
+    assert pool_adjacent_violators([3, 2, 1], [1, 1, 1]).tolist() == [2, 2, 2]
+
+    curve = IsotonicCurve.from_counts([-9, -6, -3, 0], [2, 0, 3, 0], [8, 10, 7, 0])
+    assert curve.point_margins.tolist() == [-9, -6, -3]
+    assert curve.percents.tolist() == [0.1, 0.1, 0.3]
+    assert curve.percent_at([-20, -4.5, 5]).tolist() == [0.1, 0.2, 0.3]
+
+
+def test_chart_isotonic_percents(synthetic_seasons, tmp_path):
+    """Test that a chart's points get non-decreasing isotonic percents."""
+    json_name = str(tmp_path / "down_max_24.json")
+    plot_biggest_deficit(
+        json_name,
+        [(2017, 2018)],
+        24,
+        "max",
+        isotonic=True,
+        context=ChartContext(synthetic_seasons),
+    )
+    points = read_chart_json(f"{json_name}.gz")["lines"][0]["y_values"]
+    isotonic_percents = np.array([point["isotonic_percent"] for point in points])
+    isotonic_y_values = np.array([point["isotonic_y_value"] for point in points])
+    assert (np.diff(isotonic_percents) >= 0).all()
+    assert (np.diff(isotonic_y_values) >= 0).all()
+    # The weighted mean of the percents is kept
+    game_counts = np.array(
+        [point["win_count"] + point["loss_count"] for point in points]
+    )
+    win_counts = np.array([point["win_count"] for point in points])
+    assert abs(isotonic_percents @ game_counts - win_counts.sum()) < 1e-9
@@ -0,0 +1,109 @@
+"""Unit tests for the WinProbabilityCube lookup API."""
+
+import numpy as np
+import pytest
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_api import (
+    GameFilter,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_context import (
+    ChartContext,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_season_game_loader import (
+    GAME_MINUTES,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_lookup_cube import (
+    WinProbabilityCube,
+    has_fit_window,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_plot_primitives import (
+    PointMarginPercent,
+)
+
+
+def make_cube():
+    # One era, two filters, margins -2..2
+    counts = np.zeros((1, 2, len(GAME_MINUTES), 5, 2), dtype=np.int32)
+    counts[0, 0, GAME_MINUTES.index(6), 0] = (1, 9)
+    counts[0, 0, GAME_MINUTES.index(6), 4] = (9, 1)
+    counts[0, 1, GAME_MINUTES.index("45s"), 1] = (3, 1)
+    m = np.full((1, 2, len(GAME_MINUTES)), 0.5)
+    b = np.zeros((1, 2, len(GAME_MINUTES)))
+    return WinProbabilityCube(counts, m, b, ["2017-2024"], ["all", "home"], -2)
+
+
+def test_lookup_batch():
+    """Test that batches of times and margins index the right cells."""
+    cube = make_cube()
+    result = cube.lookup([6, 6, 6], [-2, 0, 5], "all")
+    assert result["win_count"].tolist() == [1, 0, 9]
+    assert result["loss_count"].tolist() == [9, 0, 1]
+    assert result["percent"][0] == pytest.approx(0.1)
+    assert np.isnan(result["percent"][1])
+    # Margins outside the cube are folded into the end bins for the counts,
+    # but the fit line is evaluated at the margin itself
+    assert result["fit_percent"][2] == pytest.approx(0.9937903, rel=1e-6)
+
+
+def test_margins_at_percents_inverts_lookup():
+    """Test that margins_at_percents takes the 0-1 scale of the lookup fit."""
+    cube = make_cube()
+    fit_percents = cube.lookup([6, 6], [-2.5, 1.5])["fit_percent"]
+    result = cube.margins_at_percents([6, 6], fit_percents)
+    np.testing.assert_allclose(result["margin"], [-2.5, 1.5])
+
+
+def test_lookup_mixed_filters():
+    """Test that filters can be given per query."""
+    cube = make_cube()
+    result = cube.lookup(["45s", 6], [-1, -2], ["home", "all"])
+    assert result["win_count"].tolist() == [3, 1]
+
+
+def test_save_and_load(tmp_path):
+    """Test that the cube round trips through the compressed archive."""
+    cube = make_cube()
+    filename = str(tmp_path / "cube.npz")
+    cube.save(filename)
+    loaded = WinProbabilityCube.load(filename)
+    assert loaded.filter_names == ["all", "home"]
+    assert loaded.min_margin == -2
+    np.testing.assert_array_equal(loaded.counts, cube.counts)
+
+
+def test_build_fits_probit_lines(synthetic_seasons):
+    """Test that the cube lines do not depend on the ambient chart's y axis."""
+    context = ChartContext(synthetic_seasons)
+    cubes = []
+    for y_axis in ["probit", "logit"]:
+        with context.for_chart(y_axis).activate():
+            cubes.append(
+                WinProbabilityCube.build(
+                    eras=[(2017, 2018)],
+                    game_filters={"all": GameFilter()},
+                    context=context,
+                )
+            )
+    assert np.isfinite(cubes[0].m).any()
+    np.testing.assert_array_equal(cubes[0].m, cubes[1].m)
+    np.testing.assert_array_equal(cubes[0].b, cubes[1].b)
+
+
+def make_point_margin_map(outcomes):
+    point_margin_map = {}
+    for point_margin, (wins, losses) in outcomes.items():
+        data = point_margin_map[point_margin] = PointMarginPercent()
+        data.wins.update(f"{point_margin}w{index}" for index in range(wins))
+        data.losses.update(f"{point_margin}l{index}" for index in range(losses))
+    return point_margin_map
+
+
+def test_has_fit_window():
+    """Test the check for enough point margins to fit a cube line."""
+    assert not has_fit_window(make_point_margin_map({0: (5, 5)}))
+    # The all-loss margins below -2 fold into -2, leaving -2, -1 and 0
+    outcomes = {-9: (0, 3), -5: (0, 1), -2: (0, 2), -1: (1, 2), 0: (3, 3)}
+    assert has_fit_window(make_point_margin_map(outcomes))
+    # Folding leaves no -1 margin to end the fit window at
+    outcomes = {-9: (0, 3), -5: (0, 1), -3: (0, 2), 0: (3, 3), 2: (4, 1)}
+    assert not has_fit_window(make_point_margin_map(outcomes))
@@ -0,0 +1,81 @@
+"""Unit tests for the permutation test of two chart lines."""
+
+import multiprocessing
+
+import pytest
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api import (
+    form_nba_chart_json_data_permutation_test as permutation_test_module,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_api import (
+    GameFilter,
+    plot_biggest_deficit,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_context import (
+    ChartContext,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_permutation_test import (
+    get_permutation_test_options,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_plot_primitives import (
+    read_chart_json,
+)
+
+
+@pytest.mark.parametrize("use_logit", [False, True])
+def test_identical_lines_do_not_differ(synthetic_seasons, tmp_path, use_logit):
+    """Test that two lines of the same games get a p-value of 1."""
+    json_name = str(tmp_path / "down_max_24.json")
+    plot_biggest_deficit(
+        json_name,
+        [(2017, 2018), (2017, 2018)],
+        24,
+        "max",
+        use_logit=use_logit,
+        permutation_test={"permutations": 300, "workers": 1},
+        context=ChartContext(synthetic_seasons),
+    )
+    permutation_test = read_chart_json(f"{json_name}.gz")["permutation_test"]
+    assert permutation_test["statistic"] == 0
+    assert permutation_test["p_value"] == 1
+    assert permutation_test["permutations"] == 300
+
+    with pytest.raises(ValueError):
+        get_permutation_test_options({"replicates": 100})
+    with pytest.raises(ValueError):
+        plot_biggest_deficit(
+            str(tmp_path / "linear" / "down_max_24.json"),
+            [(2017, 2018), (2017, 2018)],
+            24,
+            "max",
+            linear_y_axis=True,
+            permutation_test={"permutations": 300, "workers": 1},
+            context=ChartContext(synthetic_seasons),
+        )
+
+
+def test_p_value_does_not_depend_on_workers(synthetic_seasons, tmp_path, monkeypatch):
+    """Test that a pool of workers finds the p-value of a single process."""
+    # Workers are started as on macOS, without fork
+    pool_context = multiprocessing.get_context("spawn")
+    monkeypatch.setattr(
+        permutation_test_module, "get_pool_context", lambda: pool_context
+    )
+    context = ChartContext(synthetic_seasons)
+    permutation_tests = []
+    for workers in [1, 2]:
+        json_name = str(tmp_path / str(workers) / "down_max_24.json")
+        plot_biggest_deficit(
+            json_name,
+            [(2017, 2018)],
+            24,
+            "max",
+            game_filters=[GameFilter(for_rank="top_10"), GameFilter(for_rank="bot_10")],
+            permutation_test={"permutations": 2500, "workers": workers},
+            context=context,
+        )
+        permutation_tests.append(read_chart_json(f"{json_name}.gz")["permutation_test"])
+    assert permutation_tests[0] == permutation_tests[1]
+    assert permutation_tests[0]["statistic"] > 0
+    assert 0 < permutation_tests[0]["p_value"] < 1
+    assert permutation_tests[0]["fit_permutations"] <= 2500
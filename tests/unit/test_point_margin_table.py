@@ -0,0 +1,67 @@
+"""Unit tests for the shared point margin table."""
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_season_game_loader import (
+    PointMarginTable,
+)
+
+
+class FakeGame:
+    def __init__(self, game_id, win_point_margin, lose_point_margin):
+        self.game_id = game_id
+        self.point_margins = (win_point_margin, lose_point_margin)
+
+    def get_point_margins(self, start_time, down_mode):
+        return self.point_margins
+
+
+class FakeGames(dict):
+    def __iter__(self):
+        return iter(self.values())
+
+
+def make_games():
+    games = FakeGames()
+    for game_id, win, lose in [
+        ("g1", -3, -10),
+        ("g2", -3.0, -3),
+        ("g3", 0, -7.5),
+        ("g4", -10.0, -3),
+    ]:
+        games[game_id] = FakeGame(game_id, win, lose)
+    return games
+
+
+def naive_groups(games, is_win_match=None, is_loss_match=None):
+    point_margin_map = {}
+    for index, game in enumerate(games):
+        win, lose = game.point_margins
+        if is_win_match is None or is_win_match[index]:
+            point_margin_map.setdefault(win, ([], []))[0].append(game.game_id)
+        if is_loss_match is None or is_loss_match[index]:
+            point_margin_map.setdefault(lose, ([], []))[1].append(game.game_id)
+    return [
+        (point_margin, win_ids, loss_ids)
+        for point_margin, (win_ids, loss_ids) in sorted(point_margin_map.items())
+    ]
+
+
+def assert_same_groups(groups, expected):
+    assert groups == expected
+    # The first game seen with a margin decides whether its key is an int or float
+    assert [type(group[0]) for group in groups] == [
+        type(group[0]) for group in expected
+    ]
+
+
+def test_point_margin_groups_match_naive_grouping():
+    """Test that grouping matches a loop over the games, with and without filters."""
+    games = make_games()
+    table = PointMarginTable(games, 48, "max")
+    assert_same_groups(table.get_point_margin_groups(), naive_groups(games))
+
+    is_win_match = [False, True, True, False]
+    is_loss_match = [True, False, True, True]
+    assert_same_groups(
+        table.get_point_margin_groups((is_win_match, is_loss_match)),
+        naive_groups(games, is_win_match, is_loss_match),
+    )
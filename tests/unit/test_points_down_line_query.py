@@ -0,0 +1,54 @@
+"""Unit tests for the vectorized PointsDownLine queries."""
+
+import numpy as np
+import pytest
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_isotonic import (
+    IsotonicCurve,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_plot_primitives import (
+    PointMarginPercent,
+    PointsDownLine,
+)
+
+
+def make_line():
+    # A fitted line with three empirical points, built without season data
+    line = PointsDownLine.__new__(PointsDownLine)
+    line.m = 0.1
+    line.b = 0.0
+    line.point_margins = [-10, -5, -1]
+    line.point_margin_map = {}
+    for point_margin, wins, losses in [(-10, 1, 9), (-5, 3, 7), (-1, 5, 5)]:
+        data = PointMarginPercent()
+        data.wins = {f"w{point_margin}_{i}" for i in range(wins)}
+        data.losses = {f"l{point_margin}_{i}" for i in range(losses)}
+        line.point_margin_map[point_margin] = data
+    line.percents = [0.1, 0.3, 0.5]
+    return line
+
+
+def test_query_margins():
+    """Test fitted probabilities and nearest empirical counts for margins."""
+    line = make_line()
+    result = line.query_margins([-12, -7.4, -7.6, 0])
+    np.testing.assert_allclose(result["fit_percent"][3], 0.5)
+    assert result["point_margin"].tolist() == [-10, -5, -10, -1]
+    assert result["win_count"].tolist() == [1, 3, 1, 5]
+    assert result["loss_count"].tolist() == [9, 7, 9, 5]
+    assert "isotonic_percent" not in result
+
+    line.isotonic_curve = IsotonicCurve.from_counts(
+        line.point_margins, line.wins_count, line.losses_count
+    )
+    result = line.query_margins([-12, -7.5, 0])
+    np.testing.assert_allclose(result["isotonic_percent"], [0.1, 0.2, 0.5])
+
+
+def test_query_percents_matches_margin_at_percent():
+    """Test that the batch query agrees with the scalar margin_at_percent."""
+    line = make_line()
+    result = line.query_percents([20.0, 10.0, 5.0])
+    for index, percent in enumerate([20.0, 10.0, 5.0]):
+        margin = line.margin_at_percent(percent)[0]
+        assert result["margin"][index] == pytest.approx(margin)
@@ -0,0 +1,104 @@
+"""Unit tests for the chart pipeline profiler."""
+
+import contextlib
+import json
+import tracemalloc
+
+import pytest
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_api import (
+    plot_percent_versus_time,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_context import (
+    ChartContext,
+    profiled,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_profiler import (
+    ChartProfiler,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_equivalence import (
+    diff_chart_json,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_plot_primitives import (
+    read_chart_json,
+)
+
+
+@profiled("fit_regression_lines")
+def fit():
+    return 1
+
+
+@pytest.mark.parametrize("has_reset_peak", [True, False])
+def test_stages_are_recorded_per_chart(tmp_path, monkeypatch, has_reset_peak):
+    """Test nested stages, chart attribution and merging records from a worker."""
+    if not has_reset_peak:
+        # As on Python 3.8
+        monkeypatch.delattr(tracemalloc, "reset_peak", raising=False)
+    profiler = ChartProfiler(str(tmp_path / "report.json"), memory=True)
+    context = ChartContext(None, profiler=profiler)
+
+    with context.profile("season_decode"):
+        pass
+    with context.activate(), context.profile_chart("plots/a"):
+        with context.profile("setup_point_margin_map"):
+            assert fit() == 1
+        assert fit() == 1
+
+    worker = ChartProfiler()
+    with worker.chart("plots/b"), worker.stage("fit_regression_lines"):
+        bytearray(1000)
+    profiler.merge_records(worker.take_records())
+    assert worker.records == {}
+
+    report = profiler.finish()
+    assert report["stages"]["fit_regression_lines"]["calls"] == 3
+    assert report["stages"]["season_decode"]["calls"] == 1
+    assert "chart" not in report["stages"]
+    assert set(report["charts"]["plots/a"]["stages"]) == {
+        "fit_regression_lines",
+        "setup_point_margin_map",
+    }
+    assert report["charts"]["plots/a"]["calls"] == 1
+    assert report["charts"]["plots/a"]["peak_bytes"] >= 0
+    assert report["charts"]["plots/b"]["stages"]["fit_regression_lines"]["calls"] == 1
+
+    with open(tmp_path / "report.json") as fileobj:
+        assert json.load(fileobj)["charts"].keys() == report["charts"].keys()
+
+
+def test_disabled_profiling(monkeypatch):
+    """Test that a context without a profiler records nothing."""
+    monkeypatch.delenv("NBACC_PROFILE", raising=False)
+    monkeypatch.delenv("NBACC_CPROFILE", raising=False)
+    context = ChartContext(None)
+    assert context.profiler is None
+    assert isinstance(context.profile("to_json"), contextlib.nullcontext)
+    with context.activate():
+        assert fit() == 1
+
+
+def test_warm_started_fits(synthetic_seasons, tmp_path):
+    """Test that chaining the fits of a sweep takes fewer optimizer iterations."""
+    reports = {}
+    charts = {}
+    for warm_start_fits in [False, True]:
+        profiler = ChartProfiler()
+        json_name = str(tmp_path / str(warm_start_fits) / "percent_plot.json")
+        plot_percent_versus_time(
+            json_name,
+            [(2017, 2018)],
+            6,
+            ["20%", "5%"],
+            warm_start_fits=warm_start_fits,
+            context=ChartContext(synthetic_seasons, profiler=profiler),
+        )
+        reports[warm_start_fits] = profiler.finish()
+        charts[warm_start_fits] = read_chart_json(f"{json_name}.gz")
+
+    cold, warm = reports[False]["counters"], reports[True]["counters"]
+    assert cold["fits"] == warm["fits"] == 6
+    assert warm["warm_started_fits"] == 5
+    assert warm["fit_iterations"] < cold["fit_iterations"]
+    assert reports[True]["charts"][json_name]["counters"] == warm
+    assert diff_chart_json(charts[False], charts[True]) == []
@@ -0,0 +1,122 @@
+"""Unit tests for the parallel chart job scheduler."""
+
+import gzip
+import json
+import multiprocessing
+
+import pytest
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_build_manifest import (
+    BuildManifest,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_context import (
+    ChartContext,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_plot_primitives import (
+    GameSummaryTable,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api import (
+    form_nba_chart_json_data_scheduler as scheduler_module,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_scheduler import (
+    ChartJob,
+    ChartScheduler,
+)
+
+
+def plot_biggest_deficit(json_name, year_groups, start_time=48, **kwargs):
+    with open(f"{json_name}.gz", "w") as fileobj:
+        fileobj.write(str(start_time))
+    return (f"Title {start_time}", ["years"], ["filters"])
+
+
+def write_season(tmp_path, year):
+    # An empty season, since the pool decodes the seasons before it starts
+    season = {
+        "season_year": year,
+        "team_count": 0,
+        "teams": {},
+        "team_stats": {},
+        "games": {},
+    }
+    with gzip.open(tmp_path / f"nba_season_{year}.json.gz", "wt") as fileobj:
+        json.dump(season, fileobj)
+
+
+def make_jobs(tmp_path):
+    jobs = []
+    for name in ["a", "b"]:
+        job = ChartJob(name)
+        for start_time in [24, 12]:
+            job.add(
+                plot_biggest_deficit,
+                json_name=str(tmp_path / f"{name}_{start_time}.json"),
+                year_groups=[(2020, 2020)],
+                start_time=start_time,
+            )
+        jobs.append(job)
+    # Shared with job a
+    jobs[1].add(
+        plot_biggest_deficit,
+        json_name=str(tmp_path / "a_24.json"),
+        year_groups=[(2020, 2020)],
+        start_time=24,
+    )
+    return jobs
+
+
+@pytest.mark.parametrize("workers, start_method", [(1, None), (2, None), (2, "spawn")])
+def test_scheduler_runs_jobs(tmp_path, monkeypatch, workers, start_method):
+    """Test that jobs are built, shared charts deduped and up to date jobs skipped."""
+    if start_method is not None:
+        # As on macOS, where the workers load the seasons themselves
+        pool_context = multiprocessing.get_context(start_method)
+        monkeypatch.setattr(scheduler_module, "get_pool_context", lambda: pool_context)
+    write_season(tmp_path, 2020)
+    manifest_name = str(tmp_path / "manifest.json")
+
+    for expected_built in [4, 0]:
+        context = ChartContext(str(tmp_path))
+        manifest = BuildManifest(manifest_name, context)
+        scheduler = ChartScheduler(context, workers=workers, manifest=manifest)
+        for job in make_jobs(tmp_path):
+            scheduler.add(job)
+        results = scheduler.run()
+        manifest.save()
+
+        assert [title for title, _, _ in results["b"]] == [
+            "Title 24",
+            "Title 12",
+            "Title 24",
+        ]
+        assert len(results["a"]) == 2
+        assert manifest.built_count == expected_built
+        assert len(scheduler.timings) == manifest.built_count
+
+
+def test_charts_shared_between_pages_with_game_tables(tmp_path):
+    """Test that pages with their own game tables share a chart with the same inputs."""
+    write_season(tmp_path, 2020)
+    scheduler = ChartScheduler(ChartContext(str(tmp_path)), workers=1)
+    jobs = make_jobs(tmp_path)
+    for job in jobs:
+        job.game_table = GameSummaryTable(str(tmp_path / job.name / "game_table.json"))
+        scheduler.add(job)
+    results = scheduler.run()
+
+    # The pages keep every chart call, in the order of their results
+    assert len(jobs[1].chart_calls) == len(results["b"]) == 3
+    assert scheduler.kept_indices == {"a": [0, 1], "b": [0, 1]}
+    assert len(scheduler.get_build_job(jobs[1]).chart_calls) == 2
+    assert results["b"][2] == results["a"][0]
+    assert len(scheduler.timings) == 4
+
+
+def test_conflicting_outputs_raise(tmp_path):
+    """Test that two jobs writing one chart with different inputs are rejected."""
+    scheduler = ChartScheduler(ChartContext(str(tmp_path)), workers=1)
+    first, second = make_jobs(tmp_path)
+    second.chart_calls[0][1]["json_name"] = first.chart_calls[1][1]["json_name"]
+    scheduler.add(first)
+    with pytest.raises(ValueError):
+        scheduler.add(second)
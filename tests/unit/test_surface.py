@@ -0,0 +1,59 @@
+"""Unit tests for the sqrt-time win probability surface."""
+
+import numpy as np
+from scipy.special import ndtr
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_surface import (
+    WinProbabilitySurface,
+    get_design_matrix,
+    get_minutes_remaining,
+)
+
+
+def make_counts():
+    # Expected counts from a known surface, so the fit should recover it exactly
+    surface = WinProbabilitySurface([0.25, 0.01, 0.001], [-0.2, 0.1, -0.01])
+    minutes, margins = np.meshgrid([1.0, 3.0, 6.0, 12.0, 24.0, 36.0], np.arange(-20, 1))
+    minutes = minutes.ravel()
+    margins = margins.ravel().astype(float)
+    totals = np.full(len(minutes), 1000.0)
+    win_counts = totals * surface.probability(margins, minutes)
+    return surface, minutes, margins, win_counts, totals - win_counts
+
+
+def test_get_minutes_remaining():
+    """Test that minutes, GAME_MINUTES strings and clock strings agree."""
+    minutes = get_minutes_remaining([6, "45s", "7:30", 0])
+    np.testing.assert_allclose(minutes, [6.0, 0.75, 7.5, 1.0 / 60.0])
+
+
+def test_fit_counts_recovers_surface():
+    """Test that the maximum likelihood fit recovers known coefficients."""
+    surface, minutes, margins, win_counts, loss_counts = make_counts()
+    fitted = WinProbabilitySurface.fit_counts(minutes, margins, win_counts, loss_counts)
+    np.testing.assert_allclose(
+        fitted.probability([-10, -3], ["7:30", 2]),
+        surface.probability([-10, -3], [7.5, 2]),
+        atol=1e-4,
+    )
+    m, b = fitted.get_m_b(12)
+    z = get_design_matrix(np.array([-8.0]), np.array([12.0])) @ (
+        fitted.m_coefficients + fitted.b_coefficients
+    )
+    np.testing.assert_allclose(ndtr(m * -8 + b), ndtr(z[0]))
+
+
+def test_margins_at_percents_inverts_probability():
+    """Test that margins_at_percents is the inverse of probability."""
+    surface, *_ = make_counts()
+    margins = surface.margins_at_percents([10.0, 25.0], [6, "1:00"])
+    np.testing.assert_allclose(surface.probability(margins, [6, 1]), [0.1, 0.25])
+
+
+def test_json_round_trip():
+    """Test that a surface survives to_json/from_json."""
+    surface, *_ = make_counts()
+    loaded = WinProbabilitySurface.from_json(surface.to_json())
+    assert loaded.m_coefficients == surface.m_coefficients
+    assert loaded.b_coefficients == surface.b_coefficients
+    assert loaded.link == surface.link
@@ -0,0 +1,49 @@
+"""Unit tests for the synthetic season generator."""
+
+import filecmp
+
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_context import (
+    ChartContext,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_season_game_loader import (
+    GAME_MINUTES,
+    Games,
+    Season,
+    get_seconds_remaining,
+)
+from nba_comeback_calculator.form_json_chart_data.form_nba_chart_json_data_api.form_nba_chart_json_data_synthetic_seasons import (
+    write_synthetic_seasons,
+)
+
+
+def test_synthetic_seasons_load(synthetic_seasons):
+    """Test that the seasons load and their margins agree with their timelines."""
+    context = ChartContext(synthetic_seasons)
+    season = Season.get_season(2017, context)
+    assert season.team_count == 30
+    assert sum(stats["games"] for stats in season.team_stats.values()) == 300
+    assert sorted(stats["rank"] for stats in season.team_stats.values())[0] == 1
+
+    games = Games.get_games(2017, 2018, context=context)
+    assert {game.season_type for game in games} == {"Regular Season", "Playoffs"}
+    for index, game in enumerate(games):
+        assert game.final_home_points > 50 and game.final_away_points > 50
+        for time in GAME_MINUTES:
+            seconds = get_seconds_remaining(time)
+            assert game.point_margin_map[time]["point_margin"] == (
+                game.timeline.margin_at(seconds)
+            )
+            if index >= 20:
+                continue
+            # The same time as a clock string is answered from the timeline
+            clock = f"{seconds // 60}:{seconds % 60:02d}"
+            assert game.get_point_margins(time, "max") == (
+                game.get_point_margins(clock, "max")
+            )
+
+
+def test_synthetic_seasons_are_reproducible(tmp_path):
+    """Test that the same arguments write byte-identical files."""
+    first = write_synthetic_seasons(str(tmp_path / "a"), 2020, games_per_season=20)
+    second = write_synthetic_seasons(str(tmp_path / "b"), 2020, games_per_season=20)
+    assert filecmp.cmp(first[0], second[0], shallow=False)